@@ -1,32 +1,481 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
+import base64
+import bisect
+import cProfile
+import hashlib
+import io
 import json
+import math
 import os
-import requests
+import pstats
+import tempfile
+import time
+from urllib.parse import urlencode
 from dotenv import load_dotenv
+from werkzeug.datastructures import MultiDict
+from employee_store import EmployeeStore, INDEX_FIELDS
+from taxonomy_store import TaxonomyStore
+from taxonomy_index import iter_bits, normalize
+from snapshot import load_or_build
+from opportunity_store import OpportunityStore
+from profiles import DEFAULT_SUMMARY_FIELDS, SUMMARY_FIELDS
+from response_cache import PreparedResponse, ResponseCache
+from resume_parser import ResumeParser, UnsupportedResume
+from skill_extractor import SkillExtractor
+from skill_analytics import GROUP_FIELDS
+from forum_store import CATEGORIES as FORUM_CATEGORIES, ForumStore
+from llm_cache import LLMCache, make_key
+from json_sections import SectionParser
+from structured_output import OutputFormats, parse_json, sections_prompt, validate_sections
+from rate_limiter import UpstreamQuota
+from prompt_budget import PromptBudget
+from batch_jobs import BatchRunner
+from job_queue import JobQueue, QueueFullError
+from singleflight import SingleFlight
+from metrics import Metrics
+from structured_log import get_logger, setup_logging, start_listener, stop_listener
+from azure_client import (AzureOpenAIClient, AzureOpenAIConfigError, AzureOpenAIError,
+                          AzureOpenAITimeout)
 
 load_dotenv()
+setup_logging()
+log = get_logger('app')
+
+
+class UploadRequest(Request):
+    """Multipart file parts are streamed straight into named temp files on
+    disk (deleted when the request ends), never buffered in memory"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.NamedTemporaryFile('w+b', prefix='upload-')
+
+
 app = Flask(__name__)
-CORS(app)
+app.request_class = UploadRequest
+# Whole-request cap; larger uploads are refused with 413 while streaming
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+# Paged lists hand out their next cursor in headers the browser must be allowed to read
+CORS(app, expose_headers=['X-Next-Cursor', 'Link'])
 
 # TEMPORARY - For testing only! Remove before pushing to GitHub!
 TEST_API_KEY = None  # Set to None to use .env, or paste key as string for testing
 
-# Load employee data
-with open('../data/Employee_Profiles.json', 'r', encoding='utf-8') as f:
-    employees = json.load(f)
+# Paths are anchored to this file so the app can be started from any directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv('DATA_DIR', os.path.join(BASE_DIR, '..', 'data'))
+EMPLOYEES_PATH = os.path.join(DATA_DIR, 'Employee_Profiles.json')
+TAXONOMY_PATH = os.path.join(DATA_DIR, 'skills_taxonomy.json')
+OPPORTUNITIES_PATH = os.path.join(DATA_DIR, 'opportunities.json')
+
+# Profiles, taxonomy and derived indexes from the prebuilt snapshot
+# (rebuilt from the JSON sources when they changed)
+snapshot = load_or_build(
+    os.getenv('SNAPSHOT_PATH', os.path.join(BASE_DIR, 'snapshot.bin')),
+    EMPLOYEES_PATH, TAXONOMY_PATH,
+    mentor_dim=int(os.getenv('MENTOR_INDEX_DIM', 512)),
+    mentor_exact_limit=int(os.getenv('MENTOR_EXACT_LIMIT', 20000))
+)
+
+# Employee data (indexed, reloads when the file changes)
+employee_store = EmployeeStore(EMPLOYEES_PATH, state=snapshot['employees'])
+
+# Compiled skills taxonomy (swapped in atomically when parse_skills.py rewrites it)
+taxonomy_store = TaxonomyStore(TAXONOMY_PATH, taxonomy=snapshot['taxonomy'])
+
+# Internal opportunity catalog, scored against every employee up front
+# (reloads when the file changes, e.g. after an upsert in another worker)
+opportunity_store = OpportunityStore(OPPORTUNITIES_PATH)
+OPPORTUNITIES_MAX_K = 100
+
+# Nearest-neighbour index of colleagues for mentor matching
+mentor_index = snapshot['mentor_index']
+MENTORS_MAX_K = 50
+
+# Employee x skill matrices with per-department/unit/office aggregates
+skill_gaps = snapshot['skill_gaps']
+
+# Packed per-skill employee bitsets for assembling project teams
+staffing_index = snapshot['staffing']
+STAFFING_MAX_SKILLS = 64
+STAFFING_MAX_TEAM = 50
+STAFFING_MAX_TEAMS = 5
+# Weights are relative; the cap keeps sums over a project's skills finite
+STAFFING_MAX_WEIGHT = 1000000
+STAFFING_MEMBER_FIELDS = ('id', 'name', 'title', 'department', 'unit', 'office_location')
+
+# Resume ingestion: text extraction in worker processes, skills matched locally
+resume_parser = ResumeParser(
+    max_workers=int(os.getenv('RESUME_PARSE_WORKERS', 0)) or None,
+    timeout=float(os.getenv('RESUME_PARSE_TIMEOUT', 30))
+)
+skill_extractor = SkillExtractor()
+RESUME_MAX_FILES = int(os.getenv('RESUME_MAX_FILES', 20))
+RESUME_TOKEN_BUDGET = int(os.getenv('PROMPT_RESUME_TOKENS', 1500))
+
+# Serialized, compressed, ETag'd bodies of the read-only GET endpoints
+response_cache = ResponseCache()
+READ_CACHE_MAX_AGE = int(os.getenv('READ_CACHE_MAX_AGE', 30))
+EMPLOYEES_MAX_PAGE = 1000
+
+# Community forum posts with full-text search (SQLite, WAL, batched writes)
+forum_store = ForumStore(
+    os.getenv('FORUM_DB_PATH', os.path.join(BASE_DIR, 'forum.sqlite3')),
+    batch_size=int(os.getenv('FORUM_WRITE_BATCH', 100))
+)
+FORUM_MAX_PAGE = 100
+FORUM_TITLE_MAX = 200
+FORUM_CONTENT_MAX = 10000
+
+# Cache for AI responses (in-memory LRU backed by SQLite)
+llm_cache = LLMCache(
+    os.getenv('LLM_CACHE_PATH', os.path.join(BASE_DIR, 'llm_cache.sqlite3')),
+    ttl=int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600)),
+    max_memory_entries=int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', 256)),
+    max_disk_entries=int(os.getenv('LLM_CACHE_DISK_ENTRIES', 10000))
+)
+
+# Shared upstream client (pooled keep-alive connections, retries with backoff)
+azure_client = AzureOpenAIClient.from_env(api_key=TEST_API_KEY)
+
+# Answers are requested as schema-constrained JSON where the deployment allows
+output_formats = OutputFormats(os.getenv('AZURE_OPENAI_RESPONSE_FORMAT', 'json_schema'))
+AI_SECTION_ROUNDS = int(os.getenv('AI_SECTION_ROUNDS', 2))
+
+# Token accounting: adaptive max_completion_tokens and prompt section budgets
+prompt_budget = PromptBudget()
+SKILLS_TOKEN_BUDGET = int(os.getenv('PROMPT_SKILLS_TOKENS', 80))
+CONTEXT_TOKEN_BUDGET = int(os.getenv('PROMPT_CONTEXT_TOKENS', 120))
+COMPLETION_CEILINGS = {'analyze': 3500, 'learning-detail': 2000, 'analyze-opportunity': 2500,
+                       'resume-refine': 1200}
+
+# Coalesces identical AI requests that are in flight at the same time
+inflight = SingleFlight()
+
+# Deployment quota model; batch work waits on it, interactive calls just debit it.
+# Under gunicorn (gunicorn.conf.py) every worker process models an equal share
+SERVER_WORKERS = max(1, int(os.getenv('BACKEND_WORKERS', 1)))
+upstream_quota = UpstreamQuota(
+    requests_per_minute=int(os.getenv('AZURE_OPENAI_RPM', 60)) / SERVER_WORKERS,
+    tokens_per_minute=int(os.getenv('AZURE_OPENAI_TPM', 60000)) / SERVER_WORKERS
+)
+
+
+# Prometheus metrics, served on /api/metrics
+metrics = Metrics(prefix='talentflow_')
+http_latency = metrics.histogram(
+    'http_request_duration_seconds', 'Time to produce the response (streams: until headers)',
+    labels=('route', 'method', 'status'))
+upstream_latency = metrics.histogram(
+    'upstream_request_duration_seconds', 'Azure OpenAI attempts by HTTP status or failure kind',
+    labels=('status',))
+ai_prompt_tokens = metrics.counter(
+    'ai_prompt_tokens_total', 'Prompt tokens sent (usage block, or local estimate when streaming)',
+    labels=('route',))
+ai_completion_tokens = metrics.counter(
+    'ai_completion_tokens_total', 'Completion tokens received (usage block, or local estimate when streaming)',
+    labels=('route',))
+ai_completions = metrics.counter(
+    'ai_completions_total', 'Completions by finish_reason; "length" means truncated',
+    labels=('route', 'finish_reason'))
+ai_json_failures = metrics.counter(
+    'ai_json_parse_failures_total', 'Completions that were not valid JSON', labels=('route',))
+ai_output_repairs = metrics.counter(
+    'ai_output_repairs_total',
+    'Answers that failed their schema: fixed locally, completed by a follow-up call '
+    'for the missing sections, or failed', labels=('route', 'outcome'))
+
+# Opt-in per-request cProfile (X-Profile: 1); off unless PROFILE_REQUESTS is set
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+PROFILE_TOP = 25
+
+
+class AIResponseError(Exception):
+    """The model answered, but not with anything usable"""
+
+
+def build_request_body(prompt, max_completion_tokens):
+    return {
+        "messages": [{"role": "user", "content": prompt}],
+        "max_completion_tokens": max_completion_tokens
+    }
+
+
+def ai_cache_key(route, body, *versions):
+    # The completion limit adapts over time and the response_format is
+    # negotiated per deployment; neither may invalidate the cache
+    params = {k: v for k, v in body.items() if k not in ('max_completion_tokens', 'response_format')}
+    return make_key(route, azure_client.endpoint, params, *versions)
+
+
+def reserve_quota(body, block=False):
+    """Debit (or with block=True, wait for) RPM/TPM capacity for one call"""
+    prompt = body['messages'][-1]['content']
+    upstream_quota.acquire(prompt_budget.estimate(prompt) + body['max_completion_tokens'], block=block)
+
+
+def generate_json(route, prompt, *versions, wait_for_quota=False):
+    """Run a prompt through the model (or the cache) and return the parsed JSON
+
+    max_completion_tokens is sized from the route's observed completion
+    lengths, up to its entry in COMPLETION_CEILINGS. versions are extra
+    cache-key parts such as the employee's last_updated date, so a changed
+    profile never gets a stale cached plan. Background callers pass
+    wait_for_quota=True to queue for capacity instead of risking a 429.
+    """
+    ceiling = COMPLETION_CEILINGS[route]
+    body = build_request_body(prompt, prompt_budget.completion_limit(route, ceiling))
+    cache_key = ai_cache_key(route, body, *versions)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Identical concurrent requests attach to the call already in flight.
+    # Interactive followers wait as long as the leader may take: its first
+    # call plus up to AI_SECTION_ROUNDS follow-up calls for missing sections.
+    return inflight.do(
+        cache_key,
+        lambda: complete_json(route, body, cache_key, ceiling, wait_for_quota),
+        timeout=None if wait_for_quota else azure_client.deadline * (1 + AI_SECTION_ROUNDS),
+        on_timeout=lambda: AzureOpenAITimeout('Timed out waiting for an identical request')
+    )
+
+
+def call_model(route, body, wait_for_quota=False, sections=None):
+    """Reserve quota and send body with the route's response_format (its
+    schema, or with sections just those top-level sections); returns
+    (content, finish_reason, usage)"""
+    reserve_quota(body, block=wait_for_quota)
+    while True:
+        request_body, mode = output_formats.apply(body, route, sections)
+        try:
+            result_data = azure_client.chat_completion(request_body)
+            break
+        except AzureOpenAIError as e:
+            if e.status_code == 429:
+                upstream_quota.penalize(10)
+            if not output_formats.downgrade(e, mode):
+                raise
+
+    if not result_data.get('choices'):
+        raise AIResponseError('Invalid API response')
+    choice = result_data['choices'][0]
+    content = choice.get('message', {}).get('content') or ''
+    return content, choice.get('finish_reason', 'unknown'), result_data.get('usage')
+
+
+def stream_model(route, body):
+    """stream_chat_completion with the route's response_format, stepping
+    down to a simpler format if the deployment rejects it"""
+    while True:
+        request_body, mode = output_formats.apply(body, route)
+        chunks = azure_client.stream_chat_completion(request_body)
+        try:
+            first = next(chunks, None)
+        except AzureOpenAIError as e:
+            if not output_formats.downgrade(e, mode):
+                raise
+            continue
+        if first is not None:
+            yield first
+            yield from chunks
+        return
+
+
+def complete_json(route, body, cache_key, ceiling, wait_for_quota=False):
+    """One upstream call: reserve quota, call the model, parse and cache
+
+    An answer cut off at the completion limit is not regenerated: its
+    complete sections are kept and only the rest is asked for (see
+    parse_completion).
+    """
+    prompt = body['messages'][-1]['content']
+    content, finish_reason, usage = call_model(route, body, wait_for_quota)
+    record_completion(route, prompt, usage, content, finish_reason)
+
+    if not content:
+        log.error('empty_completion', route=route, finish_reason=finish_reason)
+        raise AIResponseError('AI returned empty response')
+
+    if finish_reason == 'length':
+        log.warning('completion_truncated', route=route, limit=body['max_completion_tokens'])
+
+    result = parse_completion(route, prompt, content, ceiling, wait_for_quota)
+
+    llm_cache.set(cache_key, result)
+    return result
+
+
+def record_completion(route, prompt, usage, content, finish_reason):
+    """Token accounting for one completion: adaptive limits and metrics"""
+    prompt_budget.record(route, prompt, usage, content, finish_reason)
+    usage = usage or {}
+    ai_prompt_tokens.inc(usage.get('prompt_tokens') or prompt_budget.estimate(prompt), route=route)
+    ai_completion_tokens.inc(usage.get('completion_tokens') or prompt_budget.estimate(content), route=route)
+    ai_completions.inc(route=route, finish_reason=finish_reason or 'unknown')
+
+
+def parse_completion(route, prompt, content, ceiling, wait_for_quota=False):
+    """The route's answer from a completion, checked against its schema
+
+    Fences, trailing commas, unclosed containers and truncation are
+    repaired locally. Sections still missing or invalid after that are
+    requested on their own, in up to AI_SECTION_ROUNDS follow-up calls.
+    """
+    try:
+        value, repaired = parse_json(content, route)
+    except ValueError:
+        value, repaired = {}, True
+    if repaired:
+        ai_json_failures.inc(route=route)
+    sections, missing = validate_sections(route, value)
+    if not missing:
+        if repaired:
+            ai_output_repairs.inc(route=route, outcome='local')
+        return sections
+
+    log.warning('completion_incomplete', route=route, missing=missing, preview=content[:300])
+    for _ in range(AI_SECTION_ROUNDS):
+        try:
+            extra = request_sections(route, prompt, sections, missing, ceiling, wait_for_quota)
+        except Exception:
+            ai_output_repairs.inc(route=route, outcome='failed')
+            raise
+        # Each round keeps what is already complete and asks only for the rest
+        sections, missing = validate_sections(route, {**extra, **sections})
+        if not missing:
+            ai_output_repairs.inc(route=route, outcome='followup')
+            return sections
+    ai_output_repairs.inc(route=route, outcome='failed')
+    raise AIResponseError(f"AI answer incomplete (missing {', '.join(missing)}). Try again.")
+
+
+def request_sections(route, prompt, sections, missing, ceiling, wait_for_quota=False):
+    """Ask the model for just the missing sections of an answer"""
+    body = build_request_body(sections_prompt(prompt, sections, missing), ceiling)
+    content, finish_reason, usage = call_model(route, body, wait_for_quota, sections=missing)
+    record_completion(f'{route}:sections', body['messages'][-1]['content'], usage, content, finish_reason)
+    try:
+        return parse_json(content, route)[0]
+    except ValueError:
+        return {}
+
+
+def observe_upstream(status, seconds):
+    upstream_latency.observe(seconds, status=status)
+    if has_request_context():
+        g.upstream_seconds = g.get('upstream_seconds', 0.0) + seconds
+
+
+azure_client.observer = observe_upstream
+
+
+def ai_error_payload(e):
+    """Map upstream and parsing failures to the error JSON the frontend shows"""
+    if isinstance(e, AzureOpenAIConfigError):
+        return {'error': 'API configuration incomplete'}
+    if isinstance(e, AzureOpenAITimeout):
+        return {'error': 'Request timeout. Try again.'}
+    if isinstance(e, AzureOpenAIError):
+        return {'error': str(e), 'details': e.details}
+    if isinstance(e, json.JSONDecodeError):
+        return {'error': 'Invalid JSON from AI. Try again.'}
+    if not isinstance(e, AIResponseError):
+        log.exception('unexpected_ai_error', error=str(e))
+    return {'error': str(e)}
+
 
-# Load skills taxonomy
-with open('../data/skills_taxonomy.json', 'r', encoding='utf-8') as f:
-    skills_taxonomy = json.load(f)
+def ai_error_response(e):
+    return jsonify(ai_error_payload(e)), 500
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def filter_employees(filters):
+    """Employees matching every indexed field given in filters (all if none)"""
+    employees = None
+    for field in INDEX_FIELDS:
+        value = filters.get(field)
+        if value:
+            matches = employee_store.find(field, value)
+            if employees is not None:
+                ids = {e.employee_id for e in matches}
+                matches = [e for e in employees if e.employee_id in ids]
+            employees = matches
+    return employee_store.all() if employees is None else employees
+
+def find_mentors(emp, skills, k=5, office=None, department=None, min_years=None, min_level=None):
+    """Colleagues strong in skills; by default only those with at least the mentee's experience"""
+    mentor_index.sync(employee_store.all(), employee_store.version)
+    if min_years is None:
+        min_years = emp.years_experience
+    return mentor_index.search(skills, k, exclude=[emp.employee_id], office=office,
+                               department=department, min_years=min_years, min_level=min_level)
+
+def with_mentor_candidates(emp, result):
+    """Copy of a career plan with real colleagues matched to its skill gaps"""
+    gaps = [g['skill'] for g in result.get('skill_gaps', []) if isinstance(g, dict) and g.get('skill')]
+    return dict(result, mentor_candidates=find_mentors(emp, gaps))
+
+def encode_cursor(emp_id):
+    return base64.urlsafe_b64encode(emp_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    # validate=True: the lenient decoder skips stray characters, so "!!!"
+    # would decode to '' and quietly restart from the first page
+    cursor = cursor.rstrip('=')
+    try:
+        value = base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_',
+                                 validate=True).decode('utf-8')
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if not value:
+        raise ValueError('Invalid cursor')
+    return value
+
+EMPLOYEE_LIST_PARAMS = (*INDEX_FIELDS, 'fields', 'limit', 'cursor')
+
+def build_employee_list(args):
+    """/api/employees payload: filtered, ordered by employee_id, paged and trimmed to fields"""
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or DEFAULT_SUMMARY_FIELDS
+    unknown = [f for f in fields if f not in SUMMARY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(SUMMARY_FIELDS)})")
+
+    employees = sorted(filter_employees(args), key=lambda e: e.employee_id)
+    headers = {}
+    if args.get('limit') or args.get('cursor'):
+        try:
+            limit = min(int(args.get('limit', 100)), EMPLOYEES_MAX_PAGE)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        # The cursor is the last id of the previous page, so pages stay
+        # consistent even if profiles are added or removed in between
+        start = 0
+        if args.get('cursor'):
+            after = decode_cursor(args['cursor'])
+            start = bisect.bisect_right([e.employee_id for e in employees], after)
+        page = employees[start:start + limit]
+        if start + limit < len(employees):
+            cursor = encode_cursor(page[-1].employee_id)
+            query = urlencode({**args.to_dict(), 'cursor': cursor})
+            headers = {'X-Next-Cursor': cursor, 'Link': f'<{request.base_url}?{query}>; rel="next"'}
+        employees = page
+
+    return PreparedResponse([emp.summary(fields) for emp in employees], headers)
 
 @app.route('/api/test', methods=['GET'])
 def test():
     """Test endpoint"""
     return jsonify({
         "status": "Backend is running!", 
-        "total_employees": len(employees),
-        "total_skills": len(skills_taxonomy)
+        "total_employees": len(employee_store),
+        "total_skills": len(taxonomy_store.current().rows)
     })
 
 @app.route('/api/debug', methods=['GET'])
@@ -42,108 +491,504 @@ def debug():
         "api_version": os.getenv("AZURE_OPENAI_API_VERSION")
     })
 
+def cache_lookup_samples():
+    """(cache, result) counts from every cache and memo the hot paths use"""
+    llm = llm_cache.stats()
+    responses = response_cache.stats()
+    taxonomy = taxonomy_store.current()
+    return [
+        (('llm', 'memory_hit'), llm['memory_hits']),
+        (('llm', 'disk_hit'), llm['disk_hits']),
+        (('llm', 'miss'), llm['misses']),
+        (('responses', 'hit'), responses['hits']),
+        (('responses', 'miss'), responses['builds']),
+        (('responses', 'not_modified'), responses['not_modified']),
+        (('inflight', 'hit'), inflight.counters['coalesced']),
+        (('inflight', 'miss'), inflight.counters['leaders']),
+        (('taxonomy_employee_bits', 'hit'), taxonomy.index.cache_counters['hits']),
+        (('taxonomy_employee_bits', 'miss'), taxonomy.index.cache_counters['misses']),
+        (('profile_vectors', 'hit'), taxonomy.matcher.cache_counters['hits']),
+        (('profile_vectors', 'miss'), taxonomy.matcher.cache_counters['misses']),
+    ]
+
+metrics.add_collector('cache_lookups_total', 'counter',
+                      'Cache and memo lookups by result; hit ratio = hit / (hit + miss)',
+                      cache_lookup_samples, labels=('cache', 'result'))
+metrics.add_collector('employees', 'gauge', 'Employee profiles loaded',
+                      lambda: [((), len(employee_store))])
+metrics.add_collector('ai_calls_in_flight', 'gauge', 'Upstream AI calls currently running',
+                      lambda: [((), inflight.in_flight())])
+metrics.add_collector('job_queue_depth', 'gauge', 'Background AI jobs waiting',
+                      lambda: [((), job_queue.depth())])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.upstream_seconds = 0.0
+    if PROFILE_REQUESTS and request.headers.get('X-Profile') == '1':
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g.profiler = profiler
+        except ValueError:
+            # Only one profiler can be active per process (Python 3.12+)
+            pass
+
+@app.after_request
+def record_request(response):
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_latency.observe(elapsed, route=route, method=request.method, status=response.status_code)
+
+    timings = [f"app;dur={elapsed * 1000:.1f}"]
+    if g.get('upstream_seconds'):
+        timings.append(f"upstream;dur={g.upstream_seconds * 1000:.1f}")
+    response.headers['Server-Timing'] = ', '.join(timings)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        fields = {'route': route, 'method': request.method, 'duration_ms': round(elapsed * 1000, 1)}
+        if PROFILE_DIR:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(profiler):x}.prof"
+            profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+            response.headers['X-Profile-File'] = fields['file'] = name
+        log.info('request_profile', **fields, stats=report.getvalue())
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of latency, upstream, token, parse and cache metrics"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """AI response and read-endpoint cache counters"""
+    return jsonify({
+        **llm_cache.stats(),
+        'inflight': {**inflight.counters, 'current': inflight.in_flight()},
+        'responses': response_cache.stats()
+    })
+
+@app.route('/api/token-usage', methods=['GET'])
+def token_usage():
+    """Observed prompt/completion token usage and truncations per AI route"""
+    return jsonify({
+        **prompt_budget.stats(),
+        'completion_limits': {route: prompt_budget.completion_limit(route, ceiling)
+                              for route, ceiling in COMPLETION_CEILINGS.items()}
+    })
+
 @app.route('/api/employees', methods=['GET'])
 def get_employees():
-    """Return simplified employee list"""
-    simple_list = [{
-        'id': emp['employee_id'],
-        'name': emp['personal_info']['name'],
-        'title': emp['employment_info']['job_title'],
-        'department': emp['employment_info']['department']
-    } for emp in employees]
-    return jsonify(simple_list)
+    """Employee list: filter by indexed fields, page with ?limit=&cursor=, pick ?fields="""
+    # Only the parameters the list understands (first value each) reach the
+    # builder and the cache key, so ?x=1..N can't fill the cache with copies
+    args = MultiDict([(name, request.args[name]) for name in EMPLOYEE_LIST_PARAMS if request.args.get(name)])
+    key = ('employees', tuple(sorted(args.items())))
+    try:
+        prepared = response_cache.get(key, employee_store.version, lambda: build_employee_list(args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return response_cache.send(prepared, f'private, max-age={READ_CACHE_MAX_AGE}')
 
 @app.route('/api/employee/<emp_id>', methods=['GET'])
 def get_employee(emp_id):
     """Get full employee profile"""
-    emp = next((e for e in employees if e['employee_id'] == emp_id), None)
+    emp = employee_store.get(emp_id)
     if not emp:
         return jsonify({'error': 'Not found'}), 404
-    return jsonify(emp)
+    prepared = response_cache.get(('employee', emp_id), employee_store.version,
+                                  lambda: PreparedResponse(emp.to_dict()))
+    return response_cache.send(prepared, f'private, max-age={READ_CACHE_MAX_AGE}')
 
 @app.route('/api/skills-taxonomy', methods=['GET'])
 def get_skills_taxonomy():
     """Get all available skills in PSA"""
-    return jsonify(skills_taxonomy)
+    taxonomy = taxonomy_store.current()
+    prepared = response_cache.get(('skills-taxonomy',), taxonomy.version,
+                                  lambda: PreparedResponse(taxonomy.rows))
+    return response_cache.send(prepared, f'public, max-age={READ_CACHE_MAX_AGE}')
+
+@app.route('/api/skills-taxonomy/tree', methods=['GET'])
+def get_skills_taxonomy_tree():
+    """Function -> specialisation hierarchy with stable ids"""
+    taxonomy = taxonomy_store.current()
+    prepared = response_cache.get(('skills-taxonomy-tree',), taxonomy.version,
+                                  lambda: PreparedResponse(taxonomy.tree()))
+    return response_cache.send(prepared, f'public, max-age={READ_CACHE_MAX_AGE}')
+
+@app.route('/api/taxonomy/reload', methods=['POST'])
+def reload_taxonomy():
+    """Swap in the compiled taxonomy on disk now instead of at the next file check"""
+    if not taxonomy_store.maybe_reload(force=True):
+        error = taxonomy_store.last_error
+        if error is None:
+            return jsonify({'error': 'A taxonomy reload is already in progress'}), 409
+        return jsonify({'error': f'Taxonomy reload failed: {error}'}), 500
+    taxonomy = taxonomy_store.current()
+    return jsonify({'version': taxonomy.version, 'specialisations': len(taxonomy.rows)})
 
 @app.route('/api/match-skills/<emp_id>', methods=['GET'])
 def match_skills(emp_id):
     """Match employee skills against full PSA taxonomy"""
-    emp = next((e for e in employees if e['employee_id'] == emp_id), None)
+    emp = employee_store.get(emp_id)
     if not emp:
         return jsonify({'error': 'Not found'}), 404
     
-    # Get employee's current skills
-    current_skills = [s['skill_name'].lower() for s in emp['skills']]
-    current_functions = list(set([s['function_area'].lower() for s in emp['skills']]))
-    
-    # Build skills map
-    all_skills = {}
-    for skill in skills_taxonomy:
-        func = skill['Function / Unit / Skill']
-        spec = skill['Specialisation / Unit']
-        
-        if func not in all_skills:
-            all_skills[func] = []
-        all_skills[func].append(spec)
-    
-    # Recommend related skills in their domain
-    recommendations = []
-    for func in current_functions:
-        for skill_func in all_skills.keys():
-            # Check if this function area is related
-            if any(word in skill_func.lower() for word in func.lower().split()):
-                for spec in all_skills[skill_func]:
-                    # Only recommend if they don't have it
-                    if spec.lower() not in ' '.join(current_skills).lower():
-                        recommendations.append({
-                            'function': skill_func,
-                            'skill': spec,
-                            'relevance': 'high'
-                        })
+    version = employee_store.version
+    taxonomy = taxonomy_store.current()
+
+    return jsonify({
+        'current_skills_count': len(emp.skills),
+        'total_psa_skills': len(taxonomy.index),
+        'recommended_skills': taxonomy.matcher.recommend(emp, version),
+        'coverage_percentage': taxonomy.index.coverage(emp, version)
+    })
+
+@app.route('/api/analytics/skill-gaps', methods=['GET'])
+def skill_gap_analytics():
+    """Skill coverage, top missing skills and concentration risk per department, unit or office"""
+    args = request.args
+    field = args.get('by', 'department')
+    if field not in GROUP_FIELDS:
+        return jsonify({'error': f"by must be one of: {', '.join(GROUP_FIELDS)}"}), 400
+    try:
+        top = int(args.get('top', 10))
+        risk_max = int(args.get('risk_max', 2))
+    except ValueError:
+        return jsonify({'error': 'top and risk_max must be integers'}), 400
+
+    group = args.get('group')
+    skill_gaps.sync(employee_store.all(), taxonomy_store.current(), employee_store.version)
+    if group and not skill_gaps.has_group(field, group):
+        return jsonify({'error': 'Group not found'}), 404
+    # Reports only change with the data, so each one is built once per version
+    prepared = response_cache.get(('skill-gaps', field, group, top, risk_max), skill_gaps.version,
+                                  lambda: PreparedResponse(skill_gaps.report(field, group, top, risk_max)))
+    return response_cache.send(prepared, f'private, max-age={READ_CACHE_MAX_AGE}')
+
+@app.route('/api/opportunities', methods=['GET'])
+def list_opportunities():
+    """Internal opportunity catalog"""
+    return jsonify(opportunity_store.all())
+
+def valid_weight(weight):
+    return (isinstance(weight, (int, float)) and not isinstance(weight, bool) and
+            math.isfinite(weight) and weight > 0)
+
+@app.route('/api/opportunities', methods=['POST'])
+def upsert_opportunity():
+    """Add or update an opportunity; only its column of the match matrix is recomputed"""
+    opp = request.json or {}
+    if not isinstance(opp, dict) or not opp.get('id') or not opp.get('title') or not opp.get('skills'):
+        return jsonify({'error': 'id, title and skills are required'}), 400
+    if not isinstance(opp['id'], str) or not isinstance(opp['title'], str):
+        return jsonify({'error': 'id and title must be strings'}), 400
+    if not isinstance(opp['skills'], list) or not all(
+            isinstance(s, dict) and isinstance(s.get('name'), str) and s['name'].strip() for s in opp['skills']):
+        return jsonify({'error': 'Each skill needs a name (and optional weight)'}), 400
+    if not all(valid_weight(s.get('weight', 1)) for s in opp['skills']):
+        return jsonify({'error': 'Skill weights must be positive numbers'}), 400
+    return jsonify(opportunity_store.upsert(opp)), 201
+
+@app.route('/api/opportunities/<emp_id>', methods=['GET'])
+def match_opportunities(emp_id):
+    """Top-k opportunities for an employee with per-skill has/missing flags"""
+    try:
+        k = int(request.args.get('k', 10))
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+    k = max(1, min(k, OPPORTUNITIES_MAX_K))
+    matcher = opportunity_store.matcher
+    matcher.sync_employees(employee_store.all(), employee_store.version)
+    matches = matcher.top_matches(emp_id, k=k)
+    if matches is None:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({'employee_id': emp_id, 'matches': matches})
+
+@app.route('/api/mentors/<emp_id>', methods=['GET'])
+def match_mentors(emp_id):
+    """Top-k colleagues strong in the employee's gap skills"""
+    emp = employee_store.get(emp_id)
+    if not emp:
+        return jsonify({'error': 'Not found'}), 404
     
-    # Remove duplicates
-    seen = set()
-    unique_recs = []
-    for rec in recommendations:
-        key = rec['skill'].lower()
-        if key not in seen:
-            seen.add(key)
-            unique_recs.append(rec)
+    args = request.args
+    try:
+        k = max(1, min(int(args.get('k', 5)), MENTORS_MAX_K))
+        min_years = float(args['min_years']) if args.get('min_years') else None
+        min_level = int(args['min_level']) if args.get('min_level') else None
+    except ValueError:
+        return jsonify({'error': 'k and min_level must be integers and min_years a number'}), 400
+    if min_years is not None and not (math.isfinite(min_years) and min_years >= 0):
+        return jsonify({'error': 'min_years must be a non-negative number'}), 400
+
+    skills = [s.strip() for s in args.get('skills', '').split(',') if s.strip()]
+    if not skills:
+        # No explicit gaps: use the skills we'd recommend to them
+        matcher = taxonomy_store.current().matcher
+        skills = [r['skill'] for r in matcher.recommend(emp, employee_store.version, limit=5)]
     
+    mentors = find_mentors(
+        emp, skills, k=k,
+        office=args.get('office_location'), department=args.get('department'),
+        min_years=min_years, min_level=min_level
+    )
+    return jsonify({'employee_id': emp_id, 'skills': skills, 'mentors': mentors})
+
+def staffing_requirements(skills, index):
+    """(resolved requirements, ambiguous ones, names not in the taxonomy)
+    from a list of skill names or {name, weight, count} entries; count is
+    how many people the project needs with the skill. A name that is half
+    of several taxonomy skills is ambiguous and carries them as candidates"""
+    resolved, ambiguous, unmatched = {}, [], []
+    for entry in skills:
+        if isinstance(entry, str):
+            entry = {'name': entry}
+        if not isinstance(entry, dict) or not str(entry.get('name') or '').strip():
+            raise ValueError('Each skill needs a name (and optional weight and count)')
+        name = str(entry['name']).strip()
+        try:
+            weight = float(entry.get('weight', 1))
+            count = int(entry.get('count', 1))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f'weight and count of {name} must be numbers')
+        if not (math.isfinite(weight) and 0 < weight <= STAFFING_MAX_WEIGHT):
+            raise ValueError(f'weight of {name} must be a positive number up to {STAFFING_MAX_WEIGHT}')
+        if not 1 <= count <= STAFFING_MAX_TEAM:
+            raise ValueError(f'count of {name} must be 1-{STAFFING_MAX_TEAM}')
+        skill_ids = staffing_index.resolve(index, name)
+        requirement = {'name': name, 'weight': weight, 'count': count}
+        if not skill_ids:
+            unmatched.append(requirement)
+            continue
+        if len(skill_ids) > 1:
+            ambiguous.append({**requirement, 'candidates': [index.skill_names[i] for i in skill_ids]})
+            continue
+        skill_id = skill_ids[0]
+        if skill_id in resolved:
+            # Two names for one taxonomy skill count as one, with both weights
+            resolved[skill_id]['weight'] += weight
+            resolved[skill_id]['count'] = max(resolved[skill_id]['count'], count)
+        else:
+            resolved[skill_id] = {**requirement, 'skill': index.skill_names[skill_id], 'skill_id': skill_id}
+    return list(resolved.values()), ambiguous, unmatched
+
+def staffing_team(team, requirements, ambiguous, unmatched, title):
+    """API form of one planned team: members with the skills they cover,
+    residual skills and an /api/analyze-opportunity request per member
+    who should learn some of them"""
+    members = []
+    for member in team['members']:
+        emp = employee_store.get(member['employee_id'])
+        members.append({
+            **(emp.summary(STAFFING_MEMBER_FIELDS) if emp else {'id': member['employee_id']}),
+            'years_experience': member['years_experience'],
+            'covers': [requirements[i]['name'] for i in member['holds']]
+        })
+    residual = [
+        {'skill': req['name'], 'weight': req['weight'], 'missing': req['count'] - staffed}
+        for req, staffed in zip(requirements, team['staffed']) if staffed < req['count']
+    ] + [{'skill': req['name'], 'weight': req['weight'], 'missing': req['count'],
+          'candidates': req['candidates']}
+         for req in ambiguous
+    ] + [{'skill': req['name'], 'weight': req['weight'], 'missing': req['count'], 'in_taxonomy': False}
+         for req in unmatched]
+
+    # A residual skill is learnt by a member for whom it is a gap in their
+    # own function areas, else by whoever covers the most without holding it
+    learners = {}
+    for i, req in enumerate(requirements):
+        if team['staffed'][i] >= req['count']:
+            continue
+        others = [m for m in team['members'] if i not in m['holds']]
+        learner = next((m for m in others if i in m['gaps']), None) or \
+            max(others, key=lambda m: len(m['holds']), default=None)
+        if learner:
+            learners.setdefault(learner['employee_id'], []).append(req['name'])
+    if team['members'] and (ambiguous or unmatched):
+        lead = max(team['members'], key=lambda m: len(m['holds']))
+        learners.setdefault(lead['employee_id'], []).extend(req['name'] for req in ambiguous + unmatched)
+
+    total = sum(req['weight'] for req in requirements + ambiguous + unmatched)
+    covered = sum(req['weight'] * staffed / req['count'] for req, staffed in zip(requirements, team['staffed']))
+    return {
+        'members': members,
+        'coverage_percentage': round(covered / total * 100, 1) if total else 0.0,
+        'residual_skills': residual,
+        'learning_plans': [{'employee_id': emp_id, 'opportunity_title': title, 'missing_skills': names}
+                           for emp_id, names in learners.items()]
+    }
+
+@app.route('/api/staffing', methods=['POST'])
+def plan_staffing():
+    """Teams from across the company that best cover a project's weighted
+    skills, within office, department and per-unit limits"""
+    data = request.json or {}
+    title = data.get('title')
+    skills = data.get('skills')
+    if data.get('opportunity_id'):
+        opp = opportunity_store.get(data['opportunity_id'])
+        if not opp:
+            return jsonify({'error': 'Opportunity not found'}), 404
+        title = title or opp['title']
+        skills = skills or opp['skills']
+    title = str(title or 'New project').strip()
+    if not skills or not isinstance(skills, list):
+        return jsonify({'error': 'skills (or opportunity_id) is required'}), 400
+    if len(skills) > STAFFING_MAX_SKILLS:
+        return jsonify({'error': f'At most {STAFFING_MAX_SKILLS} skills per project'}), 400
+    try:
+        team_size = int(data.get('team_size', 5))
+        teams = int(data.get('teams', 1))
+        max_per_unit = int(data['max_per_unit']) if data.get('max_per_unit') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'team_size, teams and max_per_unit must be integers'}), 400
+    if not 1 <= team_size <= STAFFING_MAX_TEAM or not 1 <= teams <= STAFFING_MAX_TEAMS:
+        return jsonify({'error': f'team_size must be 1-{STAFFING_MAX_TEAM} and teams 1-{STAFFING_MAX_TEAMS}'}), 400
+    if max_per_unit is not None and max_per_unit < 1:
+        return jsonify({'error': 'max_per_unit must be positive'}), 400
+    exclude = data.get('exclude') or []
+    if not isinstance(exclude, list) or not all(isinstance(emp_id, str) for emp_id in exclude):
+        return jsonify({'error': 'exclude must be a list of employee ids'}), 400
+
+    taxonomy = taxonomy_store.current()
+    skill_gaps.sync(employee_store.all(), taxonomy, employee_store.version)
+    staffing_index.sync(skill_gaps, employee_store.all())
+    try:
+        requirements, ambiguous, unmatched = staffing_requirements(skills, taxonomy.index)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filters = {}
+    for field, key in (('office_location', 'office'), ('department', 'department')):
+        if data.get(field):
+            filters[key] = staffing_index.group_code(field, data[field])
+            if filters[key] is None:
+                return jsonify({'error': f"Unknown {field}: {data[field]}"}), 400
+
+    started = time.perf_counter()
+    plan = staffing_index.plan([(r['skill_id'], r['weight'], r['count']) for r in requirements],
+                               team_size, teams, max_per_unit=max_per_unit, exclude=exclude, **filters)
+    log.info('staffing_planned', skills=len(requirements), ambiguous=len(ambiguous),
+             unmatched=len(unmatched),
+             candidates=plan['candidates'], teams=len(plan['teams']),
+             duration_ms=round((time.perf_counter() - started) * 1000, 1))
     return jsonify({
-        'current_skills_count': len(current_skills),
-        'total_psa_skills': len(skills_taxonomy),
-        'recommended_skills': unique_recs[:15],
-        'coverage_percentage': round(len(current_skills) / len(skills_taxonomy) * 100, 1)
+        'title': title,
+        'skills': [{key: r[key] for key in ('name', 'skill', 'weight', 'count')} for r in requirements],
+        'ambiguous_skills': [{'name': r['name'], 'candidates': r['candidates']} for r in ambiguous],
+        'unmatched_skills': [r['name'] for r in unmatched],
+        'candidates': plan['candidates'],
+        'teams': [staffing_team(team, requirements, ambiguous, unmatched, title) for team in plan['teams']]
     })
 
+def refine_resume_skills(text, extracted, taxonomy, held):
+    """Ask the model to drop false positives and add skills the matcher missed"""
+    excerpt = '\n'.join(prompt_budget.fit_items(
+        [line for line in text.splitlines() if line.strip()], RESUME_TOKEN_BUDGET, separator='\n'))
+    prompt = f"""Review skills extracted from a resume for PSA International's skills framework.
+
+Resume excerpt:
+{excerpt}
+
+Skills found by keyword matching: {', '.join(s['skill'] for s in extracted) or 'none'}
+
+Return ONLY valid JSON:
+{{
+  "confirmed": ["Skills from the list above the resume really shows"],
+  "additional": ["Other PSA framework skills the resume clearly shows"]
+}}"""
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    result = generate_json('resume-refine', prompt, taxonomy.version, text_hash)
+
+    confirmed = {normalize(name) for name in result.get('confirmed', []) if isinstance(name, str)}
+    refined = [s for s in extracted if normalize(s['skill']) in confirmed]
+    known = {normalize(s['skill']) for s in refined}
+    for name in result.get('additional', []):
+        if isinstance(name, str) and name.strip() and normalize(name) not in known:
+            known.add(normalize(name))
+            refined.append({'skill': name.strip(), 'function_area': None, 'source': 'ai',
+                            'mentions': 0, 'is_new': normalize(name) not in held})
+    return refined
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    return jsonify({'error': f'Upload too large (limit {limit_mb:.0f} MB)'}), 413
+
 @app.route('/api/upload-resume', methods=['POST'])
 def upload_resume():
-    """Parse resume and extract skills using AI"""
-    if 'resume' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
-    
-    file = request.files['resume']
+    """Extract skills from one or more uploaded resumes (PDF, DOCX or TXT)
+
+    Text is extracted in worker processes and matched against the taxonomy
+    and known profile skills locally; refine=true adds an AI review pass.
+    """
+    files = [f for f in request.files.getlist('resume') if f and f.filename]
     emp_id = request.form.get('employee_id')
-    
-    if not file or not emp_id:
+    if not files or not emp_id:
         return jsonify({'error': 'Missing file or employee ID'}), 400
-    
-    # TODO: Implement actual resume parsing with AI
-    # For now, return mock data
-    mock_skills = ['Machine Learning', 'Docker', 'Kubernetes', 'Cloud Computing', 'Python']
-    
+    if len(files) > RESUME_MAX_FILES:
+        return jsonify({'error': f'At most {RESUME_MAX_FILES} files per upload'}), 400
+    emp = employee_store.get(emp_id)
+    if not emp:
+        return jsonify({'error': 'Employee not found'}), 404
+
+    for f in files:
+        f.stream.flush()
+    try:
+        texts = resume_parser.extract_many([(f.stream.name, f.filename) for f in files])
+    except UnsupportedResume as e:
+        return jsonify({'error': str(e)}), 415
+
+    taxonomy = taxonomy_store.current()
+    skill_extractor.sync(taxonomy, employee_store.all(), employee_store.version)
+    held = emp.skill_keys()
+    documents = []
+    merged = {}
+    for f, text in zip(files, texts):
+        if isinstance(text, UnsupportedResume):
+            documents.append({'filename': f.filename, 'error': str(text)})
+            continue
+        documents.append({'filename': f.filename, 'characters': len(text)})
+        for skill in skill_extractor.extract(text, held):
+            seen = merged.get(skill['skill'])
+            if seen:
+                seen['mentions'] += skill['mentions']
+            else:
+                merged[skill['skill']] = skill
+    if all('error' in d for d in documents):
+        return jsonify({'error': documents[0]['error'], 'files': documents}), 422
+
+    extracted = sorted(merged.values(), key=lambda s: (-s['mentions'], s['skill']))
+    refined = False
+    if request.form.get('refine', '').lower() in ('1', 'true', 'yes'):
+        full_text = '\n\n'.join(t for t in texts if isinstance(t, str))
+        try:
+            extracted = refine_resume_skills(full_text, extracted, taxonomy, held)
+            refined = True
+        except Exception as e:
+            # Refinement is optional; the local result stands on its own
+            log.warning('resume_refinement_skipped', employee_id=emp_id,
+                        error=ai_error_payload(e).get('error'))
+
+    new_skills = [s['skill'] for s in extracted if s['is_new']]
     return jsonify({
         'success': True,
-        'new_skills': mock_skills,
-        'experience_updated': True
+        'employee_id': emp_id,
+        'files': documents,
+        'extracted_skills': extracted,
+        'new_skills': new_skills,
+        'new_skills_added': len(new_skills),
+        'total_skills': len(emp.skills) + len(new_skills),
+        'refined': refined,
+        'experience_updated': False
     })
 
-@app.route('/api/learning-detail', methods=['POST'])
-def learning_detail():
+def run_learning_detail(data, background=False):
     """Generate detailed weekly breakdown for a specific learning step using AI"""
-    data = request.json
     skill = data.get('skill')
     timeline = data.get('timeline')
     action = data.get('action')
@@ -192,86 +1037,32 @@ Generate a JSON plan with:
 
 Make it specific to PSA's port operations context. Return ONLY valid JSON."""
 
-    # Get API configuration
-    api_key = TEST_API_KEY if TEST_API_KEY else os.getenv('AZURE_OPENAI_KEY')
-    base_url = os.getenv('AZURE_OPENAI_ENDPOINT')
-    api_version = os.getenv('AZURE_OPENAI_API_VERSION')
-
-    if not api_key or not base_url or not api_version:
-        return jsonify({'error': 'API configuration incomplete'}), 500
+    return generate_json('learning-detail', prompt, taxonomy_store.current().version,
+                         wait_for_quota=background)
 
-    api_url = f"{base_url}?api-version={api_version}"
-
-    headers = {
-        "Content-Type": "application/json",
-        "Ocp-Apim-Subscription-Key": api_key,
-        "api-key": api_key
-    }
-
-    body = {
-        "messages": [{"role": "user", "content": prompt}],
-        "max_completion_tokens": 2000
-    }
-
-    try:
-        response = requests.post(api_url, headers=headers, json=body, timeout=60)
-
-        if response.status_code != 200:
-            return jsonify({'error': f'API error {response.status_code}'}), 500
-
-        result_data = response.json()
-        content = result_data['choices'][0]['message']['content']
-
-        # Extract JSON
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-
-        result = json.loads(content)
-        return jsonify(result)
-
-    except Exception as e:
-        print(f"Learning detail error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+@app.route('/api/learning-detail', methods=['POST'])
+def learning_detail():
+    """Generate detailed weekly breakdown for a specific learning step using AI"""
+    return handle_ai_request('learning-detail', request.json)
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_career():
-    """AI-powered career analysis using PSA's Azure OpenAI API"""
-    data = request.json
-    emp_id = data.get('employee_id')
-    target_role = data.get('target_role', '')
-    
-    emp = next((e for e in employees if e['employee_id'] == emp_id), None)
-    if not emp:
-        return jsonify({'error': 'Employee not found'}), 404
-    
+def build_career_prompt(emp, target_role, taxonomy):
+    """Render the /api/analyze prompt for one employee and target role"""
     # Extract employee info
-    current_skills = [s['skill_name'] for s in emp['skills']]
-    competencies = [f"{c['name']} ({c['level']})" for c in emp['competencies']]
-    years_at_psa = 2025 - int(emp['employment_info']['hire_date'][:4])
-    
-    # Get skills taxonomy context - CONDENSED to reduce token usage
-    relevant_skills = []
-    current_dept = emp['employment_info']['department'].split(':')[0]
+    current_skills = prompt_budget.fit_items(emp.skill_names, SKILLS_TOKEN_BUDGET)
+    competencies = [f"{c.name} ({c.level})" for c in emp.competencies]
     
-    for skill in skills_taxonomy:
-        func = skill['Function / Unit / Skill']
-        spec = skill['Specialisation / Unit']
-        if (current_dept.lower() in func.lower() or 
-            (target_role and any(word in func.lower() for word in target_role.lower().split() if len(word) > 3))):
-            relevant_skills.append(spec)
-    
-    # Deduplicate and limit to 10 most relevant
-    skills_context = ", ".join(list(set(relevant_skills))[:10]) if relevant_skills else "General PSA competencies"
+    # Get skills taxonomy context - most relevant first, CONDENSED to reduce token usage
+    relevant_skills = taxonomy.matcher.relevant_skills(emp, target_role, k=20, version=employee_store.version)
+    relevant_skills = prompt_budget.fit_items(relevant_skills, CONTEXT_TOKEN_BUDGET)
+    skills_context = ", ".join(relevant_skills) if relevant_skills else "General PSA competencies"
     
     # SIMPLIFIED PROMPT to reduce token usage
     prompt = f"""You are a career advisor at PSA International (global port operator). Analyze this employee's career development.
 
-Employee: {emp['personal_info']['name']}
-Current: {emp['employment_info']['job_title']} in {emp['employment_info']['department'].split(':')[0]}
-Experience: {years_at_psa} years at PSA
-Skills: {', '.join(current_skills[:8])}
+Employee: {emp.name}
+Current: {emp.job_title} in {emp.department_prefix}
+Experience: {emp.years_at_psa} years at PSA
+Skills: {', '.join(current_skills)}
 Strengths: {', '.join(competencies[:3])}
 
 Target: {target_role if target_role else 'Career advancement'}
@@ -307,145 +1098,168 @@ Create a JSON career plan:
 }}
 
 Return ONLY valid JSON."""
+    return prompt
 
-    # Get API key - CRITICAL: Verify it's loaded
-    api_key = TEST_API_KEY if TEST_API_KEY else os.getenv('AZURE_OPENAI_KEY')
-    
-    if not api_key:
-        print("ERROR: No API key found!")
-        return jsonify({'error': 'API key not configured. Check .env file.'}), 500
-    
-    # Construct API URL
-    base_url = os.getenv('AZURE_OPENAI_ENDPOINT')
-    api_version = os.getenv('AZURE_OPENAI_API_VERSION')
-    
-    if not base_url or not api_version:
-        print("ERROR: Missing endpoint or API version!")
-        return jsonify({'error': 'API configuration incomplete'}), 500
-    
-    api_url = f"{base_url}?api-version={api_version}"
+def run_career_analysis(data, background=False):
+    """AI-powered career analysis using PSA's Azure OpenAI API"""
+    emp = employee_store.get(data.get('employee_id'))
+    if not emp:
+        raise LookupError('Employee not found')
+    target_role = data.get('target_role', '')
+    taxonomy = taxonomy_store.current()
     
-    # Headers - TRY MULTIPLE FORMATS
-    headers = {
-        "Content-Type": "application/json",
-        "Ocp-Apim-Subscription-Key": api_key,
-        "api-key": api_key,
-        "Subscription-Key": api_key
-    }
+    prompt = build_career_prompt(emp, target_role, taxonomy)
+
+    started = time.perf_counter()
+    result = generate_json('analyze', prompt,
+                           emp.last_updated, taxonomy.version,
+                           wait_for_quota=background)
+    log.info('career_analysis_completed', employee_id=emp.employee_id,
+             target_role=target_role or None, prompt_chars=len(prompt), background=background,
+             duration_ms=round((time.perf_counter() - started) * 1000))
+    return with_mentor_candidates(emp, result)
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_career():
+    """AI-powered career analysis using PSA's Azure OpenAI API"""
+    return handle_ai_request('analyze', request.json)
+
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_career_stream():
+    """Career analysis streamed over Server-Sent Events
+
+    Emits `token` events with raw completion text, a `section` event as soon
+    as each top-level field of the plan (summary, skill_gaps, ...) closes, and
+    finally `done` with the whole plan or `error`.
+    """
+    data = request.json
+    emp_id = data.get('employee_id')
+    target_role = data.get('target_role', '')
     
-    # Request body
-    body = {
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "max_completion_tokens": 3500
-    }
+    emp = employee_store.get(emp_id)
+    if not emp:
+        return jsonify({'error': 'Employee not found'}), 404
     
-    try:
-        print(f"\n{'='*60}")
-        print(f"API CALL DEBUG")
-        print(f"{'='*60}")
-        print(f"Employee: {emp['personal_info']['name']}")
-        print(f"Target: {target_role or 'Not specified'}")
-        print(f"Prompt length: {len(prompt)} chars")
-        print(f"API Key present: {bool(api_key)}")
-        print(f"API Key length: {len(api_key)}")
-        print(f"API Key starts: {api_key[:8]}...")
-        print(f"Endpoint: {base_url}")
-        print(f"Full URL: {api_url[:80]}...")
-        print(f"Headers sent: {list(headers.keys())}")
-        print(f"{'='*60}\n")
-        
-        # Make request
-        response = requests.post(api_url, headers=headers, json=body, timeout=60)
-        
-        print(f"Response Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            error_detail = response.text[:1000]
-            print(f"\n{'='*60}")
-            print(f"API ERROR DETAILS")
-            print(f"{'='*60}")
-            print(error_detail)
-            print(f"{'='*60}\n")
-            return jsonify({
-                'error': f'API error {response.status_code}',
-                'details': error_detail,
-                'suggestion': 'Check API key in .env file. It should be 32 characters with no quotes or spaces.'
-            }), 500
-        
-        # Parse response
-        result_data = response.json()
-        
-        if 'choices' not in result_data or len(result_data['choices']) == 0:
-            print(f"ERROR: Invalid response structure")
-            return jsonify({'error': 'Invalid API response'}), 500
-        
-        choice = result_data['choices'][0]
-        finish_reason = choice.get('finish_reason', 'unknown')
-        content = choice.get('message', {}).get('content', '')
-        
-        print(f"Finish reason: {finish_reason}")
-        print(f"Content length: {len(content)} chars")
-        
-        if not content:
-            print(f"ERROR: Empty content - finish_reason: {finish_reason}")
-            return jsonify({'error': 'AI returned empty response'}), 500
-        
-        if finish_reason == 'length':
-            print(f"WARNING: Response truncated due to token limit")
-        
-        # Extract JSON
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
-        
-        print(f"✓ Analysis completed successfully\n")
-        
-        return jsonify(result)
+    taxonomy = taxonomy_store.current()
+    prompt = build_career_prompt(emp, target_role, taxonomy)
+    ceiling = COMPLETION_CEILINGS['analyze']
+    body = build_request_body(prompt, prompt_budget.completion_limit('analyze', ceiling))
+    cache_key = ai_cache_key('analyze', body,
+                             emp.last_updated, taxonomy.version)
+
+    def generate():
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            for key, value in cached.items():
+                yield sse_event('section', {'key': key, 'value': value})
+            yield sse_event('done', with_mentor_candidates(emp, cached))
+            return
+
+        parser = SectionParser()
+        finish_reason = None
+        try:
+            reserve_quota(body)
+            for delta, finish in stream_model('analyze', body):
+                if delta:
+                    yield sse_event('token', {'text': delta})
+                    for key, value in parser.feed(delta):
+                        yield sse_event('section', {'key': key, 'value': value})
+                finish_reason = finish or finish_reason
+
+            record_completion('analyze', prompt, None, parser.text, finish_reason)
+            if not parser.text:
+                raise AIResponseError('AI returned empty response')
+            if finish_reason == 'length':
+                log.warning('completion_truncated', route='analyze', stream=True,
+                            limit=body['max_completion_tokens'])
+
+            result = parse_completion('analyze', prompt, parser.text, ceiling)
+            for key, value in result.items():
+                # Sections that were repaired or completed by a follow-up call
+                if parser.sections.get(key) != value:
+                    yield sse_event('section', {'key': key, 'value': value})
+            llm_cache.set(cache_key, result)
+            log.info('career_analysis_streamed', employee_id=emp.employee_id,
+                     target_role=target_role or None, chars=len(parser.text))
+            yield sse_event('done', with_mentor_candidates(emp, result))
+
+        except Exception as e:
+            log.warning('career_analysis_stream_failed', employee_id=emp.employee_id, error=str(e))
+            yield sse_event('error', ai_error_payload(e))
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def run_batch_analysis(emp_id, target_role):
+    """One batch item: career analysis that waits for upstream quota"""
+    return run_career_analysis({'employee_id': emp_id, 'target_role': target_role}, background=True)
+
+batch_runner = BatchRunner(
+    run_batch_analysis,
+    os.getenv('BATCH_RESULTS_DIR', os.path.join(BASE_DIR, 'batch_results')),
+    workers=int(os.getenv('BATCH_WORKERS', 4))
+)
+
+@app.route('/api/batch/analyze', methods=['POST'])
+def batch_analyze():
+    """Queue career analysis for a department, unit, office or list of employees"""
+    data = request.json or {}
+    target_roles = data.get('target_roles') or [data.get('target_role', '')]
     
-    except requests.exceptions.Timeout:
-        print("ERROR: Request timeout")
-        return jsonify({'error': 'Request timeout. Try again.'}), 500
+    if data.get('employee_ids'):
+        employees = [employee_store.get(i) for i in data['employee_ids']]
+        employees = [e for e in employees if e]
+    elif any(data.get(field) for field in INDEX_FIELDS):
+        employees = filter_employees(data)
+    else:
+        return jsonify({'error': 'Provide employee_ids or a filter such as department or unit'}), 400
     
-    except json.JSONDecodeError as e:
-        print(f"JSON Error: {str(e)}")
-        print(f"Content preview: {content[:300]}")
-        return jsonify({'error': 'Invalid JSON from AI. Try again.'}), 500
+    if not employees:
+        return jsonify({'error': 'No employees match the filter'}), 404
     
-    except Exception as e:
-        print(f"Unexpected Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    items = [(e.employee_id, role) for e in employees for role in target_roles]
+    description = {k: data[k] for k in ('employee_ids', 'target_roles', *INDEX_FIELDS) if data.get(k)}
+    job = batch_runner.submit(items, description)
+    log.info('batch_queued', batch_id=job.id, items=len(items))
+    return jsonify(job.to_dict()), 202
 
-@app.route('/api/analyze-opportunity', methods=['POST'])
-def analyze_opportunity():
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+def batch_status(batch_id):
+    """Progress of a batch plus the current upstream quota"""
+    job = batch_runner.get(batch_id)
+    if not job:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({**job.to_dict(), 'quota': upstream_quota.snapshot()})
+
+@app.route('/api/batch/<batch_id>/results', methods=['GET'])
+def batch_results(batch_id):
+    """Results written so far for a batch"""
+    job = batch_runner.get(batch_id)
+    if not job:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({**job.to_dict(), 'results': batch_runner.results(job)})
+
+def run_opportunity_analysis(data, background=False):
     """Generate focused learning path for a specific opportunity"""
-    data = request.json
     emp_id = data.get('employee_id')
     opportunity_title = data.get('opportunity_title')
     missing_skills = data.get('missing_skills', [])
     
-    emp = next((e for e in employees if e['employee_id'] == emp_id), None)
+    emp = employee_store.get(emp_id)
     if not emp:
-        return jsonify({'error': 'Employee not found'}), 404
+        raise LookupError('Employee not found')
     
     # Extract employee info
-    current_skills = [s['skill_name'] for s in emp['skills']]
-    competencies = [f"{c['name']} ({c['level']})" for c in emp['competencies']]
-    years_at_psa = 2025 - int(emp['employment_info']['hire_date'][:4])
+    current_skills = prompt_budget.fit_items(emp.skill_names, SKILLS_TOKEN_BUDGET)
+    competencies = [f"{c.name} ({c.level})" for c in emp.competencies]
     
     # Build focused prompt for this specific opportunity
     prompt = f"""You are a career advisor at PSA International. Create a FOCUSED learning plan for a specific opportunity.
 
-Employee: {emp['personal_info']['name']}
-Current Role: {emp['employment_info']['job_title']}
-Experience: {years_at_psa} years at PSA
-Current Skills: {', '.join(current_skills[:8])}
+Employee: {emp.name}
+Current Role: {emp.job_title}
+Experience: {emp.years_at_psa} years at PSA
+Current Skills: {', '.join(current_skills)}
 
 TARGET OPPORTUNITY: {opportunity_title}
 
@@ -494,84 +1308,252 @@ Respond with JSON:
 
 Keep it SHORT and FOCUSED - only what's needed for THIS opportunity."""
 
-    # Get API configuration
-    api_key = TEST_API_KEY if TEST_API_KEY else os.getenv('AZURE_OPENAI_KEY')
-    base_url = os.getenv('AZURE_OPENAI_ENDPOINT')
-    api_version = os.getenv('AZURE_OPENAI_API_VERSION')
-    
-    if not api_key or not base_url or not api_version:
-        return jsonify({'error': 'API configuration incomplete'}), 500
-    
-    api_url = f"{base_url}?api-version={api_version}"
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Ocp-Apim-Subscription-Key": api_key,
-        "api-key": api_key
-    }
-    
-    body = {
-        "messages": [{"role": "user", "content": prompt}],
-        "max_completion_tokens": 2500
-    }
-    
+    started = time.perf_counter()
+    result = generate_json('analyze-opportunity', prompt,
+                           emp.last_updated, taxonomy_store.current().version,
+                           wait_for_quota=background)
+    log.info('opportunity_analysis_completed', employee_id=emp_id,
+             opportunity=opportunity_title, missing_skills=len(missing_skills),
+             background=background, duration_ms=round((time.perf_counter() - started) * 1000))
+    return result
+
+@app.route('/api/analyze-opportunity', methods=['POST'])
+def analyze_opportunity():
+    """Generate focused learning path for a specific opportunity"""
+    return handle_ai_request('analyze-opportunity', request.json)
+
+# AI tasks that can run inline or through the background job queue
+AI_TASKS = {
+    'analyze': run_career_analysis,
+    'learning-detail': run_learning_detail,
+    'analyze-opportunity': run_opportunity_analysis
+}
+
+job_queue = JobQueue(
+    os.getenv('JOB_QUEUE_PATH', os.path.join(BASE_DIR, 'jobs.sqlite3')),
+    {kind: (lambda data, task=task: task(data, background=True)) for kind, task in AI_TASKS.items()},
+    workers=int(os.getenv('JOB_WORKERS', 4)),
+    max_depth=int(os.getenv('JOB_QUEUE_MAX_DEPTH', 500)),
+    error_payload=ai_error_payload,
+    lease=float(os.getenv('JOB_LEASE_SECONDS', 60))
+)
+
+def start_worker():
+    """Per-process setup for serving: log writer thread, fresh SQLite handles
+    and the job workers.
+
+    A pre-fork master (gunicorn.conf.py, which sets BACKEND_PREFORK=1) only
+    loads the data; each forked worker calls this for itself.
+    """
+    start_listener()
+    llm_cache.reopen()
+    forum_store.reopen()
+    job_queue.reopen()
+    job_queue.start()
+
+def stop_worker(timeout=10):
+    """Graceful shutdown: let job workers finish their current job (or be
+    requeued at the next start), commit queued forum posts and stop the
+    resume parser processes"""
+    job_queue.stop(timeout)
+    forum_store.stop(timeout)
+    batch_runner.executor.shutdown(wait=False, cancel_futures=True)
+    resume_parser.shutdown()
+    stop_listener()
+
+if os.getenv('BACKEND_PREFORK') != '1':
+    job_queue.start()
+
+def wants_async():
+    """Clients opt into job mode with ?mode=async or a Prefer: respond-async header"""
+    return (request.args.get('mode') == 'async' or
+            'respond-async' in request.headers.get('Prefer', ''))
+
+def check_ai_request(kind, data):
+    """Raise ValueError (bad input) or LookupError (unknown employee) for a
+    request its task could never complete"""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+
+    def text(key, required=True, blank=True):
+        value = data.get(key)
+        if value is None and not required:
+            return
+        if not isinstance(value, str) or not (blank or value.strip()):
+            raise ValueError(f"{key} must be a {'' if blank else 'non-empty '}string")
+
+    def strings(key):
+        value = data.get(key, [])
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f'{key} must be a list of strings')
+
+    if kind == 'learning-detail':
+        text('skill', blank=False)
+        text('timeline')
+        text('action', required=False)
+        strings('resources')
+        return
+    text('employee_id', blank=False)
+    if not employee_store.get(data['employee_id']):
+        raise LookupError('Employee not found')
+    if kind == 'analyze':
+        text('target_role', required=False)
+    else:
+        text('opportunity_title', blank=False)
+        strings('missing_skills')
+
+def handle_ai_request(kind, data):
+    """Run an AI task inline, or queue it and return a job id straight away"""
+    data = {} if data is None else data
+    # Reject bad requests now rather than after they sit in the queue
     try:
-        print(f"\n{'='*60}")
-        print(f"OPPORTUNITY-FOCUSED ANALYSIS")
-        print(f"{'='*60}")
-        print(f"Employee: {emp['personal_info']['name']}")
-        print(f"Opportunity: {opportunity_title}")
-        print(f"Missing Skills: {', '.join(missing_skills)}")
-        print(f"{'='*60}\n")
-        
-        response = requests.post(api_url, headers=headers, json=body, timeout=60)
-        
-        print(f"Response Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            error_detail = response.text[:500]
-            return jsonify({'error': f'API error {response.status_code}', 'details': error_detail}), 500
-        
-        result_data = response.json()
-        
-        if 'choices' not in result_data or len(result_data['choices']) == 0:
-            return jsonify({'error': 'Invalid API response'}), 500
-        
-        choice = result_data['choices'][0]
-        content = choice.get('message', {}).get('content', '')
-        
-        if not content:
-            return jsonify({'error': 'AI returned empty response'}), 500
-        
-        # Extract JSON
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
-        
-        print(f"✓ Opportunity analysis completed\n")
-        
-        return jsonify(result)
-    
-    except requests.exceptions.Timeout:
-        return jsonify({'error': 'Request timeout'}), 500
-    
-    except json.JSONDecodeError as e:
-        print(f"JSON Error: {str(e)}")
-        return jsonify({'error': 'Invalid JSON from AI'}), 500
-    
+        check_ai_request(kind, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+
+    if not wants_async():
+        try:
+            return jsonify(AI_TASKS[kind](data))
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            log.warning('ai_request_failed', kind=kind, error=str(e))
+            return ai_error_response(e)
+
+    try:
+        job_id = job_queue.submit(kind, data)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/jobs/{job_id}'
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and result of a queued AI job; ?wait=N long-polls up to N seconds"""
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    if not math.isfinite(wait) or wait < 0:
+        return jsonify({'error': 'wait must be a non-negative number of seconds'}), 400
+    wait = min(wait, 60)
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(job)
+
+def forum_filter_tags(args, taxonomy):
+    """Tag keys for ?skill= (one taxonomy skill) or ?function_area= (all its skills)"""
+    index = taxonomy.index
+    if args.get('skill'):
+        skill_id = index.skill_id(args['skill'])
+        if skill_id is None:
+            raise LookupError('Skill not found')
+        return [normalize(index.skill_names[skill_id])]
+    if args.get('function_area'):
+        func_id = index.function_ids.get(normalize(args['function_area']))
+        if func_id is None:
+            raise LookupError('Function area not found')
+        return [normalize(index.skill_names[s]) for s in iter_bits(index.function_masks[func_id])]
+    return None
+
+def forum_post_tags(title, content, names, taxonomy):
+    """(key, name) tags for a new post: the taxonomy skills it names in tags,
+    then those mentioned in its title and content"""
+    index = taxonomy.index
+    unknown = [name for name in names if index.skill_id(name) is None]
+    if unknown:
+        raise ValueError(f"Unknown skills: {', '.join(unknown)}")
+    skill_extractor.sync(taxonomy, employee_store.all(), employee_store.version)
+    found = [s['skill'] for s in skill_extractor.extract(f'{title}\n{content}')]
+    tags = {}
+    for name in [*names, *found]:
+        skill_id = index.skill_id(name)
+        if skill_id is not None:
+            tags.setdefault(normalize(index.skill_names[skill_id]), index.skill_names[skill_id])
+    return list(tags.items())
+
+@app.route('/api/forum/posts', methods=['GET'])
+def list_forum_posts():
+    """Forum posts, newest first: ?q= searches title, content and tags;
+    ?category=, ?skill= or ?function_area= filter; ?limit=&cursor= page"""
+    args = request.args
+    try:
+        limit = min(int(args.get('limit', 20)), FORUM_MAX_PAGE)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    try:
+        before = int(decode_cursor(args['cursor'])) if args.get('cursor') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    category = args.get('category')
+    if category and category not in FORUM_CATEGORIES:
+        return jsonify({'error': f"category must be one of: {', '.join(FORUM_CATEGORIES)}"}), 400
+    try:
+        tags = forum_filter_tags(args, taxonomy_store.current())
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+
+    posts, more = forum_store.page(limit, before, category=category, query=args.get('q'), tags=tags)
+    headers = {}
+    if more:
+        # The cursor is the last post id of this page, so new posts don't shift later pages
+        cursor = encode_cursor(str(posts[-1]['id']))
+        query = urlencode({**args.to_dict(), 'cursor': cursor})
+        headers = {'X-Next-Cursor': cursor, 'Link': f'<{request.base_url}?{query}>; rel="next"'}
+    return jsonify(posts), 200, headers
+
+@app.route('/api/forum/posts', methods=['POST'])
+def create_forum_post():
+    """Create a post; it is tagged with the taxonomy skills in tags and those it mentions"""
+    data = request.json or {}
+    title = str(data.get('title') or '').strip()
+    content = str(data.get('content') or '').strip()
+    category = data.get('category') or 'general'
+    names = data.get('tags') or []
+    if not title or not content:
+        return jsonify({'error': 'title and content are required'}), 400
+    if len(title) > FORUM_TITLE_MAX or len(content) > FORUM_CONTENT_MAX:
+        return jsonify({'error': f'title is limited to {FORUM_TITLE_MAX} and content to '
+                                 f'{FORUM_CONTENT_MAX} characters'}), 400
+    if category not in FORUM_CATEGORIES:
+        return jsonify({'error': f"category must be one of: {', '.join(FORUM_CATEGORIES)}"}), 400
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return jsonify({'error': 'tags must be a list of skill names'}), 400
+
+    try:
+        tags = forum_post_tags(title, content, names, taxonomy_store.current())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    author = str(data.get('author') or 'Anonymous').strip()[:80]
+    try:
+        post = forum_store.add(category, title, content, author, tags)
     except Exception as e:
-        print(f"Error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        log.warning('forum_post_failed', error=str(e))
+        return jsonify({'error': 'Could not save the post, try again shortly'}), 503
+    return jsonify(post), 201
+
+@app.route('/api/forum/posts/<int:post_id>', methods=['GET'])
+def get_forum_post(post_id):
+    """Get one forum post"""
+    post = forum_store.get(post_id)
+    if not post:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(post)
 
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("🚢 PSA TalentFlow AI Backend Starting...")
     print("="*60)
-    print(f"✓ Loaded {len(employees)} employee profiles")
-    print(f"✓ Loaded {len(skills_taxonomy)} PSA skills")
+    print(f"✓ Loaded {len(employee_store)} employee profiles")
+    print(f"✓ Loaded {len(taxonomy_store.current().rows)} PSA skills")
     
     # Check API key on startup
     if TEST_API_KEY:
@@ -0,0 +1,198 @@
+"""Shared Azure OpenAI chat-completions client.
+
+One pooled requests.Session is reused by every route so connections stay
+alive between calls. Throttling (429) and transient 5xx/connection errors are
+retried with jittered exponential backoff, honouring Retry-After, and each
+call is bounded by an overall deadline rather than a fixed 60 s per attempt.
+"""
+import email.utils
+import json
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from structured_log import get_logger
+
+log = get_logger('azure_client')
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class AzureOpenAIError(Exception):
+    """Upstream returned a non-200 response that we did not (or could not) retry"""
+
+    def __init__(self, status_code, details=''):
+        super().__init__(f'API error {status_code}')
+        self.status_code = status_code
+        self.details = details
+
+
+class AzureOpenAITimeout(AzureOpenAIError):
+    """The call did not complete within its deadline"""
+
+    def __init__(self, details=''):
+        super().__init__(504, details)
+
+
+class AzureOpenAIConfigError(Exception):
+    """Key, endpoint or API version is missing"""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class AzureOpenAIClient:
+    """Pooled, retrying client for the configured chat-completions deployment"""
+
+    def __init__(self, api_key=None, pool_size=20, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, deadline=45.0, connect_timeout=5.0):
+        self.api_key_override = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+
+        # Called with (status, seconds) after every upstream attempt
+        self.observer = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @classmethod
+    def from_env(cls, api_key=None):
+        return cls(
+            api_key=api_key,
+            pool_size=int(os.getenv('AZURE_OPENAI_POOL_SIZE', 20)),
+            max_retries=int(os.getenv('AZURE_OPENAI_MAX_RETRIES', 3)),
+            deadline=float(os.getenv('AZURE_OPENAI_DEADLINE', 45))
+        )
+
+    @property
+    def api_key(self):
+        return self.api_key_override or os.getenv('AZURE_OPENAI_KEY')
+
+    @property
+    def endpoint(self):
+        return os.getenv('AZURE_OPENAI_ENDPOINT')
+
+    @property
+    def api_version(self):
+        return os.getenv('AZURE_OPENAI_API_VERSION')
+
+    def is_configured(self):
+        return bool(self.api_key and self.endpoint and self.api_version)
+
+    def _headers(self):
+        api_key = self.api_key
+        return {
+            "Content-Type": "application/json",
+            "Ocp-Apim-Subscription-Key": api_key,
+            "api-key": api_key,
+            "Subscription-Key": api_key
+        }
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _observe(self, status, started):
+        if self.observer is not None:
+            self.observer(status, time.monotonic() - started)
+
+    def post(self, body, deadline=None, stream=False):
+        """POST body to the deployment, retrying transient failures.
+
+        Returns the successful requests.Response. Raises AzureOpenAIError for
+        non-retryable or exhausted failures and AzureOpenAITimeout when the
+        deadline runs out.
+        """
+        if not self.is_configured():
+            raise AzureOpenAIConfigError('API configuration incomplete')
+
+        url = f"{self.endpoint}?api-version={self.api_version}"
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+
+        while True:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise AzureOpenAITimeout('Deadline exceeded before a response arrived')
+
+            started = time.monotonic()
+            try:
+                response = self.session.post(
+                    url, headers=self._headers(), json=body, stream=stream,
+                    timeout=(min(self.connect_timeout, remaining), remaining)
+                )
+            except requests.exceptions.Timeout:
+                self._observe('timeout', started)
+                raise AzureOpenAITimeout('Upstream did not respond in time')
+            except requests.exceptions.ConnectionError as e:
+                self._observe('connection_error', started)
+                if attempt >= self.max_retries:
+                    raise AzureOpenAIError(503, f'Connection failed: {e}')
+                wait = self._backoff(attempt)
+            else:
+                # With stream=True this is the time to the response headers
+                self._observe(response.status_code, started)
+                if response.status_code == 200:
+                    return response
+                details = response.text[:1000]
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise AzureOpenAIError(response.status_code, details)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                wait = retry_after if retry_after is not None else self._backoff(attempt)
+                response.close()
+
+            if time.monotonic() + wait >= give_up_at:
+                raise AzureOpenAITimeout('Retry would exceed the deadline')
+            log.warning('upstream_retry', attempt=attempt + 1, max_retries=self.max_retries,
+                        wait_seconds=round(wait, 2))
+            time.sleep(wait)
+            attempt += 1
+
+    def chat_completion(self, body, deadline=None):
+        """Non-streaming completion; returns the decoded response JSON"""
+        return self.post(body, deadline=deadline).json()
+
+    def stream_chat_completion(self, body, deadline=None):
+        """Streaming completion; yields (content_delta, finish_reason) per chunk"""
+        response = self.post({**body, 'stream': True}, deadline=deadline, stream=True)
+        response.encoding = 'utf-8'
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                for choice in chunk.get('choices', []):
+                    delta = (choice.get('delta') or {}).get('content') or ''
+                    finish_reason = choice.get('finish_reason')
+                    if delta or finish_reason:
+                        yield delta, finish_reason
+        except requests.exceptions.Timeout:
+            raise AzureOpenAITimeout('Upstream stream stalled')
+        except requests.exceptions.ConnectionError as e:
+            raise AzureOpenAIError(503, f'Stream interrupted: {e}')
+        finally:
+            response.close()
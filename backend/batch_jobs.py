@@ -0,0 +1,140 @@
+"""Batch career analysis over a bounded worker pool.
+
+A batch is a list of (employee_id, target_role) items. Items from every batch
+share one thread pool, and each worker waits on the upstream quota before
+calling the model, so throughput tracks the deployment's RPM/TPM limits.
+Every finished item is appended to the batch's JSONL results file straight
+away, so a crash or a failing item never loses work that already completed.
+The batch's items are saved next to it, so any worker process can report
+progress on a batch another one accepted.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from azure_client import AzureOpenAIError
+from structured_log import get_logger
+
+log = get_logger('batch_jobs')
+
+
+class BatchJob:
+    """Progress of one submitted batch"""
+
+    def __init__(self, batch_id, items, description, results_path):
+        self.id = batch_id
+        self.items = items
+        self.description = description
+        self.results_path = results_path
+        self.status = 'running'
+        self.completed = 0
+        self.failed = 0
+        self.created_at = time.time()
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        total = len(self.items)
+        processed = self.completed + self.failed
+        return {
+            'batch_id': self.id,
+            'status': self.status,
+            'description': self.description,
+            'total': total,
+            'completed': self.completed,
+            'failed': self.failed,
+            'progress': round(processed / total * 100, 1) if total else 100.0,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+    def count(self, record):
+        if record['status'] == 'ok':
+            self.completed += 1
+        else:
+            self.failed += 1
+        if self.completed + self.failed == len(self.items):
+            self.status = 'completed' if not self.failed else 'completed_with_errors'
+            self.finished_at = record['finished_at']
+
+
+class BatchRunner:
+    """Runs batch items through run_item(employee_id, target_role)"""
+
+    def __init__(self, run_item, results_dir, workers=4, max_attempts=3):
+        self.run_item = run_item
+        self.results_dir = results_dir
+        self.max_attempts = max_attempts
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+        self.jobs = {}
+
+    def submit(self, items, description=None):
+        os.makedirs(self.results_dir, exist_ok=True)
+        batch_id = uuid.uuid4().hex[:12]
+        results_path = os.path.join(self.results_dir, f'{batch_id}.jsonl')
+        job = BatchJob(batch_id, items, description or {}, results_path)
+        with open(self._meta_path(batch_id), 'w', encoding='utf-8') as f:
+            json.dump({'items': items, 'description': job.description, 'created_at': job.created_at}, f)
+        self.jobs[batch_id] = job
+        if not items:
+            job.status = 'completed'
+            job.finished_at = time.time()
+        for emp_id, target_role in items:
+            self.executor.submit(self._run, job, emp_id, target_role)
+        return job
+
+    def _meta_path(self, batch_id):
+        return os.path.join(self.results_dir, f'{batch_id}.json')
+
+    def get(self, batch_id):
+        """The batch, read back from disk if another process accepted it"""
+        job = self.jobs.get(batch_id)
+        if job is None and batch_id.isalnum() and os.path.exists(self._meta_path(batch_id)):
+            with open(self._meta_path(batch_id), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            job = BatchJob(batch_id, [tuple(item) for item in meta['items']], meta['description'],
+                           os.path.join(self.results_dir, f'{batch_id}.jsonl'))
+            job.created_at = meta['created_at']
+            for record in self.results(job):
+                job.count(record)
+            if not job.items:
+                job.status, job.finished_at = 'completed', job.created_at
+        return job
+
+    def _run(self, job, emp_id, target_role):
+        record = {'employee_id': emp_id, 'target_role': target_role}
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                record['result'] = self.run_item(emp_id, target_role)
+                record['status'] = 'ok'
+                record.pop('error', None)
+                break
+            except AzureOpenAIError as e:
+                record.update(status='error', error=str(e))
+                # A 429 has already drained the shared quota, so the retry
+                # waits for capacity before going out again
+                if e.status_code != 429 or attempt == self.max_attempts:
+                    break
+            except Exception as e:
+                record.update(status='error', error=str(e))
+                break
+        record['finished_at'] = time.time()
+        self._record(job, record)
+
+    def _record(self, job, record):
+        with job.lock:
+            with open(job.results_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+            job.count(record)
+            if job.finished_at is not None:
+                log.info('batch_finished', batch_id=job.id, completed=job.completed, failed=job.failed)
+
+    def results(self, job):
+        """All records written so far for a batch"""
+        if not os.path.exists(job.results_path):
+            return []
+        with job.lock, open(job.results_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,135 @@
+"""In-memory employee store with O(1) lookups and hot reload.
+
+Profiles are loaded from Employee_Profiles.json as compact Profile records
+(see profiles.py) into an immutable snapshot holding a dict keyed by
+employee_id plus secondary indexes. When the file's
+mtime changes the snapshot is rebuilt off to the side and swapped in with a
+single reference assignment, so readers never see a half-built index.
+"""
+import json
+import os
+import threading
+import time
+
+from profiles import Profile, Vocabulary
+from structured_log import get_logger
+
+log = get_logger('employee_store')
+
+# Secondary indexes: name -> function returning the raw keys for one profile
+INDEX_FIELDS = {
+    'department': lambda e: [e.department],
+    'unit': lambda e: [e.unit],
+    'line_manager': lambda e: [e.line_manager],
+    'office_location': lambda e: [e.office_location],
+    'skill': lambda e: e.skill_names,
+}
+
+
+def normalize_key(value):
+    """Case/whitespace-insensitive index key"""
+    return ' '.join(str(value).split()).lower()
+
+
+class _Snapshot:
+    """One immutable, fully indexed generation of the employee data"""
+
+    __slots__ = ('employees', 'by_id', 'indexes', 'mtime', 'version')
+
+    def __init__(self, employees, mtime, version):
+        self.employees = employees
+        self.mtime = mtime
+        self.version = version
+        self.by_id = {e.employee_id: e for e in employees}
+        self.indexes = {field: {} for field in INDEX_FIELDS}
+        for emp in employees:
+            for field, keys_for in INDEX_FIELDS.items():
+                index = self.indexes[field]
+                for key in set(keys_for(emp)):
+                    if key:
+                        index.setdefault(normalize_key(key), []).append(emp.employee_id)
+
+
+class EmployeeStore:
+    """Employee profiles indexed by id, department, unit, manager, office and skill"""
+
+    def __init__(self, path, check_interval=2.0, state=None):
+        """state, if given, is an indexed generation from state() built from
+        the current contents of path (see snapshot.py); it skips the parse"""
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        if state is None:
+            self._snapshot = self._load(version=1)
+        else:
+            # The caller checked the content, so adopt the file's current mtime
+            state.mtime = os.stat(path).st_mtime_ns
+            self._snapshot = state
+
+    def _load(self, version):
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'r', encoding='utf-8') as f:
+            documents = json.load(f)
+        # A fresh vocabulary per snapshot, so removed skills don't linger
+        vocabulary = Vocabulary()
+        employees = [Profile.from_dict(doc, vocabulary) for doc in documents]
+        return _Snapshot(employees, mtime, version)
+
+    def _current(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.maybe_reload()
+        return self._snapshot
+
+    def maybe_reload(self):
+        """Rebuild and swap in a new snapshot if the source file changed"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._snapshot.mtime:
+            return False
+
+        # Only one thread rebuilds; others keep serving the old snapshot
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if mtime == self._snapshot.mtime:
+                return False
+            try:
+                snapshot = self._load(self._snapshot.version + 1)
+            except (OSError, ValueError, KeyError) as e:
+                # File is probably mid-write; retry on the next check
+                log.warning('employee_reload_skipped', error=str(e))
+                return False
+            self._snapshot = snapshot
+            log.info('employees_reloaded', count=len(snapshot.employees), version=snapshot.version)
+            return True
+        finally:
+            self._lock.release()
+
+    def state(self):
+        """The current indexed generation (picklable)"""
+        return self._current()
+
+    @property
+    def version(self):
+        """Increments every time a new snapshot is swapped in"""
+        return self._current().version
+
+    def __len__(self):
+        return len(self._current().employees)
+
+    def all(self):
+        return self._current().employees
+
+    def get(self, emp_id):
+        return self._current().by_id.get(emp_id)
+
+    def find(self, field, value):
+        """Return employees whose indexed field matches value"""
+        snapshot = self._current()
+        ids = snapshot.indexes[field].get(normalize_key(value), [])
+        return [snapshot.by_id[i] for i in ids]
@@ -0,0 +1,252 @@
+"""SQLite-backed community forum posts.
+
+Posts live in one WAL-mode table, so reads never wait for a writer. An
+FTS5 index over title, content and tags (kept in step by triggers) serves
+search, and a (tag, post_id) table serves skill filters. Every listing is
+newest first and paged by keyset: the cursor is the last post id seen and
+each page is an index range scan below it, so a deep page costs the same
+as the first however large the board grows.
+
+New posts go through a single writer thread that commits whatever has
+queued up in one transaction, so a burst of posts costs one commit rather
+than one each; a request only waits for the batch holding its post.
+"""
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+CATEGORIES = ('career', 'skills', 'mentorship', 'projects', 'general')
+
+_WORD_RE = re.compile(r'\w+')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    author TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    replies INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS posts_category ON posts (category, id);
+CREATE TABLE IF NOT EXISTS post_tags (
+    tag TEXT NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, post_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5 (
+    title, content, tags,
+    content='posts', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, title, content, tags)
+    VALUES (new.id, new.title, new.content, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content, tags)
+    VALUES ('delete', old.id, old.title, old.content, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content, tags ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content, tags)
+    VALUES ('delete', old.id, old.title, old.content, old.tags);
+    INSERT INTO posts_fts (rowid, title, content, tags)
+    VALUES (new.id, new.title, new.content, new.tags);
+END;
+'''
+
+
+def match_expression(text):
+    """FTS5 query for free text: every word must appear, the last one as a
+    prefix so results follow as-you-type input. None if text has no words"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    # Prefixes of 2 and 3 characters have their own index; a single
+    # character would expand to most of the vocabulary
+    if len(words[-1]) > 1:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _post(row):
+    post = dict(row)
+    post['tags'] = json.loads(post['tags'])
+    return post
+
+
+class ForumStore:
+    """Forum posts with full-text search and keyset pagination"""
+
+    def __init__(self, path, batch_size=100, max_idle_readers=8):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_idle_readers = max_idle_readers
+
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._readers = queue.LifoQueue()
+        self._writer = None
+
+        db = self._connect()
+        db.executescript(_SCHEMA)
+        db.close()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.row_factory = sqlite3.Row
+        return db
+
+    def reopen(self):
+        """Drop connections and the writer inherited over a fork; SQLite
+        handles must not cross one"""
+        self._readers = queue.LifoQueue()
+        self._pending = queue.Queue()
+        self._writer = None
+
+    @contextmanager
+    def _reader(self):
+        try:
+            db = self._readers.get_nowait()
+        except queue.Empty:
+            db = self._connect()
+        try:
+            yield db
+        finally:
+            if self._readers.qsize() < self.max_idle_readers:
+                self._readers.put(db)
+            else:
+                db.close()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write, name='forum-writer', daemon=True)
+                self._writer.start()
+
+    def stop(self, timeout=None):
+        """Commit what is queued, then stop the writer"""
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._pending.put(None)
+            writer.join(timeout)
+
+    def add(self, category, title, content, author, tags=(), timeout=30):
+        """Queue a post for the next batch and wait for it to be committed;
+        returns the stored post. tags are (key, display name) pairs"""
+        tags = list(dict(tags).items())
+        post = {
+            'category': category,
+            'title': title,
+            'content': content,
+            'author': author,
+            'tags': [name for _, name in tags],
+            'created_at': time.time(),
+            'replies': 0,
+            'likes': 0
+        }
+        done = Future()
+        self._start_writer()
+        self._pending.put((post, [key for key, _ in tags], done))
+        return done.result(timeout)
+
+    def _write(self):
+        db = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._pending.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                self._commit(db, batch)
+        db.close()
+
+    def _commit(self, db, batch):
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            for post, tag_keys, _ in batch:
+                post['id'] = db.execute(
+                    '''INSERT INTO posts (category, title, content, author, tags, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?)''',
+                    (post['category'], post['title'], post['content'], post['author'],
+                     json.dumps(post['tags']), post['created_at'])
+                ).lastrowid
+                db.executemany('INSERT INTO post_tags (tag, post_id) VALUES (?, ?)',
+                               [(key, post['id']) for key in tag_keys])
+            db.execute('COMMIT')
+        except Exception as e:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            for _, _, done in batch:
+                done.set_exception(e)
+            return
+        for post, _, done in batch:
+            done.set_result(dict(post))
+
+    def get(self, post_id):
+        with self._reader() as db:
+            row = db.execute('SELECT * FROM posts WHERE id = ?', (post_id,)).fetchone()
+        return _post(row) if row is not None else None
+
+    def page(self, limit, before=None, category=None, query=None, tags=None):
+        """(posts, more) for one page, newest first.
+
+        before is the id of the last post on the previous page. query is
+        free text matched against title, content and tags; tags is a list of
+        tag keys of which a post must carry at least one.
+        """
+        match = match_expression(query) if query else None
+        if query and match is None:
+            return [], False
+        # Keys and order go on the driving table's id, so it is walked in order
+        key = 'f.rowid' if match else 't.post_id' if tags else 'p.id'
+        where, params = [], []
+        if category:
+            where.append('p.category = ?')
+            params.append(category)
+        if before is not None:
+            where.append(f'{key} < ?')
+            params.append(before)
+
+        if match:
+            sql = 'SELECT p.* FROM posts_fts f JOIN posts p ON p.id = f.rowid WHERE posts_fts MATCH ?'
+            params.insert(0, match)
+            if tags:
+                where.append(f"EXISTS (SELECT 1 FROM post_tags t WHERE t.post_id = p.id "
+                             f"AND t.tag IN ({','.join('?' * len(tags))}))")
+                params += tags
+        elif tags:
+            # The newest limit + 1 posts of each tag, from the (tag, post_id)
+            # index, merged; never more than limit + 1 rows per tag are read
+            newest = ('SELECT * FROM (SELECT t.post_id FROM post_tags t JOIN posts p ON p.id = t.post_id '
+                      f"WHERE {' AND '.join(['t.tag = ?'] + where)} ORDER BY t.post_id DESC LIMIT ?)")
+            sql = f"SELECT p.* FROM posts p WHERE p.id IN ({' UNION '.join([newest] * len(tags))})"
+            params = [value for tag in tags for value in (tag, *params, limit + 1)]
+            key, where = 'p.id', []
+        else:
+            sql = 'SELECT p.* FROM posts p WHERE 1'
+        sql += ''.join(f' AND {clause}' for clause in where)
+        sql += f' ORDER BY {key} DESC LIMIT ?'
+        params.append(limit + 1)
+
+        with self._reader() as db:
+            rows = db.execute(sql, params).fetchall()
+        return [_post(row) for row in rows[:limit]], len(rows) > limit
@@ -0,0 +1,65 @@
+"""Production server settings for gunicorn.
+
+    cd backend && gunicorn wsgi:app
+
+(gunicorn picks this file up from the working directory.) The master
+loads profiles, taxonomy and indexes once (preload_app) and forks the
+workers, which share those pages copy-on-write. Workers are gevent by
+default: the standard library is monkey-patched before the app is
+imported, so the blocking requests calls to Azure OpenAI, retry sleeps
+and lock waits just switch greenlets, and one worker holds hundreds of
+in-flight model calls. Everything is set through environment variables:
+
+    BIND                 address (default 0.0.0.0:5001)
+    WEB_CONCURRENCY      worker processes (default: CPU count)
+    WORKER_CLASS         gevent (default) or gthread
+    WORKER_CONNECTIONS   concurrent requests per gevent worker (default 500)
+    WORKER_THREADS       threads per gthread worker (default 32)
+    GRACEFUL_TIMEOUT     seconds in-flight requests get after SIGTERM (default 30)
+    WORKER_TIMEOUT       seconds before a silent worker is restarted (default 120)
+    MAX_REQUESTS         recycle a worker after this many requests (default 0: never)
+"""
+import multiprocessing
+import os
+
+worker_class = os.getenv('WORKER_CLASS', 'gevent')
+if worker_class == 'gevent':
+    # Before anything imports the app, so its sockets, locks and sleeps cooperate
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = os.getenv('BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 500))
+threads = int(os.getenv('WORKER_THREADS', 32))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+timeout = int(os.getenv('WORKER_TIMEOUT', 120))
+keepalive = 5
+max_requests = int(os.getenv('MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+# The app splits the upstream quota between workers and leaves background
+# threads to the workers; the upstream connection pool should cover a
+# worker's concurrency, or calls past it pay for a fresh TLS handshake
+os.environ['BACKEND_PREFORK'] = '1'
+os.environ['BACKEND_WORKERS'] = str(workers)
+os.environ.setdefault('AZURE_OPENAI_POOL_SIZE',
+                      str(worker_connections if worker_class == 'gevent' else threads))
+
+
+def pre_fork(server, worker):
+    # The master writes its own records synchronously from here on
+    import structured_log
+    structured_log.stop_listener()
+
+
+def post_worker_init(worker):
+    import app
+    app.start_worker()
+    app.log.info('worker_started', pid=os.getpid(), worker_class=worker_class)
+
+
+def worker_exit(server, worker):
+    import app
+    app.stop_worker(timeout=max(1, graceful_timeout // 3))
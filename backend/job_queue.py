@@ -0,0 +1,284 @@
+"""SQLite-backed background job queue for slow AI calls.
+
+Request threads only insert a row and return its id; a fixed pool of worker
+threads claims queued rows, runs the registered handler and stores the result
+(or error) back in the same table. Because the queue lives in a file, queued
+work survives a restart. A claimed job holds a lease that a heartbeat
+thread keeps renewing while it runs; when the process running it dies the
+lease runs out, and the next claim from any process puts the job back in
+the queue (up to max_attempts claims, then it fails). Database errors
+(another process holding the write lock past the busy timeout) are logged
+and retried with backoff; they never end a worker thread.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from structured_log import get_logger
+
+log = get_logger('job_queue')
+
+# Longest pause between retries after a database error, in seconds
+MAX_BACKOFF = 30
+# Tries at storing a finished job's outcome before leaving it to the lease
+FINISH_ATTEMPTS = 5
+
+
+class QueueFullError(Exception):
+    """Too many jobs are already waiting"""
+
+
+class JobQueue:
+    """Durable FIFO of (kind, payload) jobs processed by worker threads"""
+
+    def __init__(self, path, handlers, workers=4, max_depth=500, retention=24 * 3600,
+                 error_payload=None, lease=60, max_attempts=3):
+        self.path = path
+        self.handlers = handlers
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = retention
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.error_payload = error_payload or (lambda e: {'error': str(e)})
+
+        self._local = threading.local()
+        self._changed = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._running = set()   # ids of the jobs this process is running
+
+        db = self._db()
+        db.execute('''CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            lease_until REAL,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )''')
+        columns = {row['name'] for row in db.execute('PRAGMA table_info(jobs)')}
+        if 'lease_until' not in columns:
+            # Queue files from before leases: their running rows count as expired
+            db.execute('ALTER TABLE jobs ADD COLUMN lease_until REAL')
+            db.execute('ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+        db.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+
+    def _db(self):
+        # One connection per thread; WAL lets readers poll while workers write
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def reopen(self):
+        """Drop connections inherited over a fork; SQLite handles must not cross one"""
+        self._local = threading.local()
+
+    def start(self):
+        self._stopping = False
+        self._running = set()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Let workers finish their current job, then exit"""
+        self._stopping = True
+        with self._changed:
+            self._changed.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def depth(self):
+        return self._db().execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def submit(self, kind, payload):
+        if kind not in self.handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        if self.depth() >= self.max_depth:
+            raise QueueFullError('Job queue is full, try again shortly')
+        job_id = uuid.uuid4().hex
+        self._db().execute(
+            "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, kind, json.dumps(payload), time.time())
+        )
+        with self._changed:
+            self._changed.notify_all()
+        return job_id
+
+    def get(self, job_id):
+        row = self._db().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+        if row['status'] == 'queued':
+            job['position'] = self._db().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?",
+                (row['created_at'],)
+            ).fetchone()[0]
+        if row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+        if row['error'] is not None:
+            job['error'] = json.loads(row['error'])
+        return job
+
+    def wait(self, job_id, timeout):
+        """Long-poll: block until the job finishes or timeout elapses"""
+        give_up_at = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = give_up_at - time.monotonic()
+            if job is None or job['status'] in ('done', 'failed') or remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(remaining, 1.0))
+
+    def _expire(self, db, now):
+        """Requeue running jobs whose lease ran out (their process died), or
+        fail them once they have used up their attempts"""
+        stale = db.execute(
+            "SELECT id, attempts FROM jobs WHERE status = 'running' "
+            "AND (lease_until IS NULL OR lease_until < ?)", (now,)
+        ).fetchall()
+        for row in stale:
+            if row['attempts'] >= self.max_attempts:
+                error = json.dumps({'error': 'Job was interrupted too many times'})
+                db.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                           (error, now, row['id']))
+            else:
+                db.execute("UPDATE jobs SET status = 'queued', started_at = NULL, lease_until = NULL "
+                           "WHERE id = ?", (row['id'],))
+        if stale:
+            log.warning('jobs_lease_expired', count=len(stale))
+
+    def _claim(self):
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            self._expire(db, now)
+            row = db.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status = 'running', started_at = ?, lease_until = ?, "
+                           "attempts = attempts + 1 WHERE id = ?", (now, now + self.lease, row['id']))
+            db.execute('COMMIT')
+        except Exception:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        if row is not None:
+            self._running.add(row['id'])
+        return row
+
+    def _heartbeat(self):
+        """Renew the leases of this process's running jobs every third of a lease"""
+        beat = time.monotonic()
+        while not self._stopping:
+            beat += self.lease / 3
+            while not self._stopping and time.monotonic() < beat:
+                # Woken early by every job change; only stop cuts the wait short
+                with self._changed:
+                    self._changed.wait(beat - time.monotonic())
+            running = list(self._running)
+            if running:
+                try:
+                    self._db().execute(
+                        f"UPDATE jobs SET lease_until = ? WHERE status = 'running' "
+                        f"AND id IN ({','.join('?' * len(running))})",
+                        [time.time() + self.lease, *running]
+                    )
+                except sqlite3.Error as e:
+                    log.warning('job_heartbeat_failed', error=str(e))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._db().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL '
+            'WHERE id = ?',
+            (status,
+             None if result is None else json.dumps(result),
+             None if error is None else json.dumps(error),
+             time.time(), job_id)
+        )
+        self._running.discard(job_id)
+        with self._changed:
+            self._changed.notify_all()
+
+    def _prune(self):
+        self._db().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - self.retention,)
+        )
+
+    def _pause(self, seconds):
+        """Sleep up to seconds, or until stop()"""
+        with self._changed:
+            if not self._stopping:
+                self._changed.wait(seconds)
+
+    def _store(self, job_id, status, result=None, error=None):
+        """_finish, retried on database errors. If it never succeeds the job
+        is dropped from the heartbeat, so its lease runs out and it is run
+        again"""
+        for attempt in range(FINISH_ATTEMPTS):
+            try:
+                self._finish(job_id, status, result=result, error=error)
+                return
+            except sqlite3.Error as e:
+                log.warning('job_finish_failed', job_id=job_id, attempt=attempt + 1, error=str(e))
+                time.sleep(min(0.5 * 2 ** attempt, MAX_BACKOFF))
+        self._running.discard(job_id)
+
+    def _work(self):
+        processed = 0
+        backoff = 0
+        while not self._stopping:
+            try:
+                row = self._claim()
+            except sqlite3.Error as e:
+                backoff = min(backoff * 2 or 0.5, MAX_BACKOFF)
+                log.warning('job_claim_failed', error=str(e), retry_in=backoff)
+                self._pause(backoff)
+                continue
+            backoff = 0
+            if row is None:
+                self._pause(1.0)
+                continue
+
+            try:
+                result = self.handlers[row['kind']](json.loads(row['payload']))
+            except Exception as e:
+                log.warning('job_failed', job_id=row['id'], kind=row['kind'], error=str(e))
+                self._store(row['id'], 'failed', error=self.error_payload(e))
+            else:
+                self._store(row['id'], 'done', result=result)
+
+            processed += 1
+            if processed % 100 == 0:
+                try:
+                    self._prune()
+                except sqlite3.Error as e:
+                    log.warning('job_prune_failed', error=str(e))
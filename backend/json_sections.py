@@ -0,0 +1,69 @@
+"""Incremental parser for a streamed top-level JSON object.
+
+Completions arrive a few characters at a time. SectionParser scans the text
+as it is fed and, each time a top-level member such as "summary" or
+"skill_gaps" closes, decodes just that member and hands it back. Text before
+the opening brace (e.g. a ```json fence) is ignored.
+"""
+import json
+
+
+class SectionParser:
+    """Emit (key, value) pairs of a JSON object as soon as each one closes"""
+
+    def __init__(self):
+        self.text = ''
+        self.sections = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._segment_start = None
+
+    def feed(self, chunk):
+        """Consume more completion text; return newly completed (key, value) pairs"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._segment_start is None:
+                # Still before the opening brace
+                if ch == '{':
+                    self._depth = 1
+                    self._segment_start = i + 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._close_segment(i))
+                    self.done = True
+            elif ch == ',' and self._depth == 1:
+                completed.extend(self._close_segment(i))
+                self._segment_start = i + 1
+            i += 1
+        self._pos = i
+        return completed
+
+    def _close_segment(self, end):
+        segment = self.text[self._segment_start:end].strip()
+        if not segment:
+            return []
+        try:
+            member = json.loads('{' + segment + '}')
+        except json.JSONDecodeError:
+            return []
+        self.sections.update(member)
+        return list(member.items())
@@ -0,0 +1,142 @@
+"""Two-tier cache for parsed Azure OpenAI responses.
+
+Entries are keyed on a hash of the request body (rendered prompt plus model
+parameters) together with whatever version stamps the caller passes in, such
+as the employee's last_updated date or the taxonomy version. Changing any of
+those produces a new key, so stale plans are simply never looked up again and
+age out through TTL and size eviction.
+
+The first tier is an in-process LRU; the second is a SQLite file shared by
+every worker on the host and surviving restarts.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(*parts):
+    """Stable hash of arbitrary JSON-serializable key parts"""
+    raw = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """In-memory LRU in front of an on-disk SQLite tier, both with TTL"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_memory_entries=256,
+                 max_disk_entries=10000, prune_every=50):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        self._connect()
+        self._db.execute('''CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS llm_cache_access ON llm_cache (last_access)')
+
+    def _connect(self):
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+
+    def reopen(self):
+        """Fresh connection for a forked process; SQLite handles must not cross a fork"""
+        with self._lock:
+            self._connect()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+
+            self._db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.counters['disk_hits'] += 1
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._db.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), expires_at, now)
+            )
+            self.counters['writes'] += 1
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune(now)
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _prune(self, now):
+        """Drop expired rows, then the least recently used beyond the size cap"""
+        self._db.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,))
+        self._db.execute(
+            '''DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )''',
+            (self.max_disk_entries,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute('DELETE FROM llm_cache')
+
+    def stats(self):
+        with self._lock:
+            hits = self.counters['memory_hits'] + self.counters['disk_hits']
+            lookups = hits + self.counters['misses']
+            disk_entries = self._db.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+            return {
+                **self.counters,
+                'hit_ratio': round(hits / lookups, 3) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_entries,
+                'ttl_seconds': self.ttl
+            }
@@ -0,0 +1,275 @@
+"""Nearest-neighbour search for mentors across the employee base.
+
+Each employee is embedded as one hashed TF-IDF vector (see skill_matcher)
+built from their skills, competencies weighted by level, and the roles,
+focus areas and programmes in their history. A mentee's gap skills are
+embedded the same way and colleagues are ranked by cosine similarity.
+
+Office, department and seniority filters are precomputed NumPy arrays, so a
+filter is a boolean mask. Small candidate sets are scanned exactly with one
+matrix-vector product. Large ones go through random-hyperplane LSH: several
+tables of sign bits, probed at the query's bucket and every bucket one bit
+away. The LSH candidates are then re-ranked exactly.
+"""
+import hashlib
+import threading
+
+import numpy as np
+
+from skill_matcher import HashingTfidf
+from taxonomy_index import normalize, skill_aliases
+
+COMPETENCY_WEIGHTS = {'beginner': 0.5, 'intermediate': 1.0, 'advanced': 1.5, 'expert': 2.0}
+
+# Checked in order; the first keyword found in the job title sets the level
+TITLE_LEVELS = [
+    ('chief', 6), ('vice president', 5), ('vp', 5), ('director', 5), ('head', 5),
+    ('principal', 4), ('lead', 3), ('manager', 3), ('senior', 2)
+]
+
+
+def title_level(title):
+    """Rough seniority level (1-6) from a job title"""
+    words = f" {normalize(title)} "
+    for keyword, level in TITLE_LEVELS:
+        if f" {keyword} " in words:
+            return level
+    return 1
+
+
+def profile_texts(emp):
+    """(texts, weights) describing what an employee could mentor in"""
+    used = {normalize(name) for _, _, key_skills in emp.roles for name in key_skills}
+
+    texts, weights = [], []
+    for skill in emp.skills:
+        texts.append(skill.name)
+        # Skills actually applied in a role count for more than listed ones
+        weights.append(3.0 if normalize(skill.name) in used else 2.0)
+    for competency in emp.competencies:
+        texts.append(competency.name)
+        weights.append(COMPETENCY_WEIGHTS.get(normalize(competency.level), 1.0))
+    for role_title, focus_areas, _ in emp.roles:
+        texts.append(role_title)
+        texts.extend(focus_areas)
+        weights.extend([0.5] * (1 + len(focus_areas)))
+    for program, focus in emp.programs:
+        texts += [program, focus]
+        weights += [0.5, 0.25]
+    return tuple(texts), tuple(weights)
+
+
+def profile_signature(texts, weights):
+    """Stable 64-bit digest of profile_texts(), used to spot changed profiles"""
+    digest = hashlib.blake2b(repr((texts, weights)).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little', signed=True)
+
+
+class _Codes:
+    """Interned integer codes for the values of one filter field"""
+
+    def __init__(self):
+        self.ids = {}
+
+    def code(self, value):
+        key = normalize(value)
+        code = self.ids.get(key)
+        if code is None:
+            code = self.ids[key] = len(self.ids)
+        return code
+
+
+class MentorIndex:
+    """Embeddings, filter columns and LSH tables for every employee"""
+
+    def __init__(self, dim=512, exact_limit=20000, tables=8, bits=12, seed=7):
+        self.vectorizer = HashingTfidf(dim)
+        self.exact_limit = exact_limit
+        self.bits = bits
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables * bits, dim)).astype(np.float32)
+        self.bit_values = (1 << np.arange(bits, dtype=np.int64))
+        self.version = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _reset(self):
+        self.ids = []
+        self.rows = {}
+        self.signatures = np.zeros(0, dtype=np.int64)
+        self.profiles = []
+        self.offices = _Codes()
+        self.departments = _Codes()
+        self.matrix = np.zeros((0, self.vectorizer.dim), dtype=np.float32)
+        self.office = np.zeros(0, dtype=np.int32)
+        self.department = np.zeros(0, dtype=np.int32)
+        self.years = np.zeros(0, dtype=np.float32)
+        self.level = np.zeros(0, dtype=np.int8)
+        self.codes = np.zeros((0, len(self.planes) // self.bits), dtype=np.int64)
+        self.sorted_rows = []
+        self.sorted_codes = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sync(self, employees, version):
+        """Rebuild when employees were added or removed, else re-embed changed rows"""
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            employees = list(employees)
+            if [emp.employee_id for emp in employees] != self.ids:
+                self._rebuild(employees)
+            else:
+                changed = []
+                for row, emp in enumerate(employees):
+                    texts, weights = profile_texts(emp)
+                    if profile_signature(texts, weights) != self.signatures[row]:
+                        changed.append(row)
+                        self._set_row(row, emp, texts, weights)
+                if changed:
+                    self._index_lsh(changed)
+            self.version = version
+
+    def _rebuild(self, employees):
+        self._reset()
+        self.ids = [emp.employee_id for emp in employees]
+        self.rows = {emp_id: row for row, emp_id in enumerate(self.ids)}
+        counts = np.zeros((len(employees), self.vectorizer.dim), dtype=np.float32)
+        self.signatures = np.zeros(len(employees), dtype=np.int64)
+        memo = {}
+        for row, emp in enumerate(employees):
+            texts, weights = profile_texts(emp)
+            self.signatures[row] = profile_signature(texts, weights)
+            counts[row] = self.vectorizer.counts(texts, weights, memo)
+        self.matrix = self.vectorizer.fit_counts(counts).astype(np.float32)
+        self.profiles = employees
+        self.office = np.array([self.offices.code(emp.office_location) for emp in employees], dtype=np.int32)
+        self.department = np.array([self.departments.code(emp.department) for emp in employees], dtype=np.int32)
+        self.years = np.array([emp.years_experience for emp in employees], dtype=np.float32)
+        self.level = np.array([title_level(emp.job_title) for emp in employees], dtype=np.int8)
+        self._index_lsh()
+
+    def _set_row(self, row, emp, texts, weights):
+        # idf stays as fitted at the last rebuild
+        self.signatures[row] = profile_signature(texts, weights)
+        self.matrix[row] = self.vectorizer.weight(self.vectorizer.counts(texts, weights)[None, :])[0]
+        self.profiles[row] = emp
+        self.office[row] = self.offices.code(emp.office_location)
+        self.department[row] = self.departments.code(emp.department)
+        self.years[row] = emp.years_experience
+        self.level[row] = title_level(emp.job_title)
+
+    def _hash(self, vectors):
+        """(n, dim) vectors -> (n, tables) bucket codes"""
+        signs = (vectors @ self.planes.T) > 0
+        return signs.reshape(len(vectors), -1, self.bits).astype(np.int64) @ self.bit_values
+
+    def _index_lsh(self, changed=None):
+        if len(self.ids) <= self.exact_limit:
+            self.sorted_rows, self.sorted_codes = [], []
+            return
+        if changed is None or not len(self.sorted_rows):
+            self.codes = self._hash(self.matrix)
+        else:
+            self.codes[changed] = self._hash(self.matrix[changed])
+        self.sorted_rows = [np.argsort(self.codes[:, t], kind='stable') for t in range(self.codes.shape[1])]
+        self.sorted_codes = [self.codes[rows, t] for t, rows in enumerate(self.sorted_rows)]
+
+    def _lsh_candidates(self, query):
+        code = self._hash(query[None, :])[0]
+        probes = np.concatenate([[0], self.bit_values])
+        found = []
+        for t, (rows, codes) in enumerate(zip(self.sorted_rows, self.sorted_codes)):
+            # The query's own bucket plus every bucket one bit flip away
+            targets = code[t] ^ probes
+            lo = np.searchsorted(codes, targets, side='left')
+            hi = np.searchsorted(codes, targets, side='right')
+            found.extend(rows[a:b] for a, b in zip(lo, hi) if b > a)
+        if not found:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def search(self, skills, k=5, exclude=(), office=None, department=None,
+               min_years=None, min_level=None):
+        """Top-k colleagues strongest in the given skills.
+
+        skills is a list of skill/competency names. Returns dicts with the
+        colleague's details, similarity score and which of the skills they
+        hold, best first; colleagues holding none of them are left out. A
+        skill is held when it or either half of a "Group: Specialisation"
+        name is one of the colleague's skill names or competencies.
+        """
+        with self._lock:
+            if not len(self.ids) or not skills:
+                return []
+            query = self.vectorizer.transform(skills)
+            mask = np.ones(len(self.ids), dtype=bool)
+            for emp_id in exclude:
+                if emp_id in self.rows:
+                    mask[self.rows[emp_id]] = False
+            if office:
+                mask &= self.office == self.offices.ids.get(normalize(office), -1)
+            if department:
+                mask &= self.department == self.departments.ids.get(normalize(department), -1)
+            if min_years is not None:
+                mask &= self.years >= min_years
+            if min_level is not None:
+                mask &= self.level >= min_level
+
+            allowed = int(mask.sum())
+            if allowed > self.exact_limit and self.sorted_rows:
+                candidates = self._lsh_candidates(query)
+                candidates = candidates[mask[candidates]]
+                if len(candidates) < k:
+                    candidates = np.flatnonzero(mask)
+            else:
+                candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return []
+
+            scores = self.matrix[candidates] @ query
+            wanted = [(skill, skill_aliases(skill)) for skill in skills]
+            results = []
+            # Best scores first, in growing windows, skipping colleagues who
+            # hold none of the skills (similar wording alone isn't expertise)
+            window, seen = max(k * 20, 200), 0
+            while len(results) < k and seen < len(candidates):
+                window = min(window, len(candidates))
+                top = np.argpartition(-scores, window - 1)[:window]
+                top = top[np.argsort(-scores[top], kind='stable')][seen:]
+                seen = window
+                window *= 4
+                for i in top:
+                    if scores[i] <= 0 or len(results) >= k:
+                        seen = len(candidates)
+                        break
+                    row = candidates[i]
+                    emp = self.profiles[row]
+                    held = emp.skill_keys()
+                    matching = [skill for skill, keys in wanted if keys & held]
+                    if not matching:
+                        continue
+                    results.append({
+                        'employee_id': emp.employee_id,
+                        'name': emp.name,
+                        'job_title': emp.job_title,
+                        'department': emp.department,
+                        'office_location': emp.office_location,
+                        'years_experience': round(float(self.years[row]), 1),
+                        'seniority_level': int(self.level[row]),
+                        'score': round(float(scores[i]), 3),
+                        'matching_skills': matching
+                    })
+            return results
@@ -0,0 +1,140 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are recorded on the hot path with one lock and a
+dict update each. Values that components already count themselves (cache
+hits, single-flight coalescing...) are not duplicated: collectors
+registered with add_collector() are called only when /api/metrics is
+scraped and return their current samples.
+
+Everything is per process; with several workers, Prometheus scrapes each
+one and sums.
+"""
+import math
+import threading
+
+# Seconds; covers cached responses (sub-ms) through long AI completions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, value=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+                for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.label_names, key, [('le', _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Metrics:
+    """Registry of metrics plus scrape-time collectors"""
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(self.prefix + name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(self.prefix + name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name, kind, help_text, collect, labels=()):
+        """collect() -> [(label values tuple, value)], called on every scrape"""
+        self._collectors.append((self.prefix + name, kind, help_text, collect, tuple(labels)))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.header()
+            lines += metric.render()
+        for name, kind, help_text, collect, label_names in self._collectors:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            try:
+                samples = collect()
+            except Exception as e:
+                # One broken collector must not take the whole scrape down
+                lines.append(f"# collector failed: {_escape(e)}")
+                continue
+            lines += [f"{name}{_labels(label_names, key)} {_number(value)}" for key, value in samples]
+        return '\n'.join(lines) + '\n'
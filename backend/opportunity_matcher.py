@@ -0,0 +1,154 @@
+"""Employee x opportunity compatibility, precomputed as a matrix.
+
+Every skill named by any opportunity gets a column id. Employees become rows
+of a uint8 "holds skill" matrix E, opportunities become rows of a weight
+matrix W normalised to sum to 1, and compatibility for everyone is the single
+product C = E @ W.T. A changed profile only recomputes its row of E and C;
+a changed or new opportunity only recomputes its column of C.
+"""
+import threading
+
+import numpy as np
+
+from taxonomy_index import normalize
+
+
+def employee_skill_names(emp):
+    return frozenset().union(*(skill.aliases for skill in emp.skills))
+
+
+class OpportunityMatcher:
+    """Scores every employee against every opportunity"""
+
+    def __init__(self, opportunities=(), employees_from=None):
+        self._lock = threading.RLock()
+        self.skill_ids = {}          # normalized skill name -> column
+        self.opportunities = []      # catalog entries, in row order of W
+        self.opportunity_rows = {}   # opportunity id -> row of W
+        self.weights = np.zeros((0, 0), dtype=np.float32)
+        self.employee_rows = {}      # employee id -> row of E / C
+        self.employee_names = {}     # employee id -> frozenset of skill names
+        self.held = np.zeros((0, 0), dtype=np.uint8)
+        self.compatibility = np.zeros((0, 0), dtype=np.float32)
+        self.version = None
+        if employees_from is not None:
+            self._adopt_employees(employees_from)
+        for opp in opportunities:
+            self.upsert_opportunity(opp)
+
+    def _adopt_employees(self, other):
+        """Start from another matcher's rows of E and its employee version,
+        so a reloaded catalog only computes its own columns of C"""
+        with other._lock:
+            self.skill_ids = dict(other.skill_ids)
+            self.employee_rows = dict(other.employee_rows)
+            self.employee_names = dict(other.employee_names)
+            self.held = other.held.copy()
+            self.version = other.version
+        self.weights = np.zeros((0, len(self.skill_ids)), dtype=np.float32)
+        self.compatibility = np.zeros((len(self.employee_rows), 0), dtype=np.float32)
+
+    def _skill_column(self, name):
+        key = normalize(name)
+        column = self.skill_ids.get(key)
+        if column is None:
+            column = self.skill_ids[key] = len(self.skill_ids)
+            # New column: fill it in for every known employee
+            new_col = np.array(
+                [[key in self.employee_names[emp_id]] for emp_id in self._employee_order()],
+                dtype=np.uint8
+            ).reshape(len(self.employee_rows), 1)
+            self.held = np.hstack([self.held, new_col])
+            self.weights = np.hstack([self.weights, np.zeros((len(self.opportunities), 1), np.float32)])
+        return column
+
+    def _employee_order(self):
+        order = [None] * len(self.employee_rows)
+        for emp_id, row in self.employee_rows.items():
+            order[row] = emp_id
+        return order
+
+    def _employee_vector(self, names):
+        row = np.zeros(len(self.skill_ids), dtype=np.uint8)
+        for name in names:
+            column = self.skill_ids.get(name)
+            if column is not None:
+                row[column] = 1
+        return row
+
+    def upsert_opportunity(self, opp):
+        """Add or replace one catalog entry and recompute its column of C"""
+        with self._lock:
+            columns = [(self._skill_column(s['name']), float(s.get('weight', 1))) for s in opp['skills']]
+            weight_row = np.zeros(len(self.skill_ids), dtype=np.float32)
+            for column, weight in columns:
+                weight_row[column] = weight
+            total = weight_row.sum()
+            if total:
+                weight_row /= total
+
+            row = self.opportunity_rows.get(opp['id'])
+            if row is None:
+                row = self.opportunity_rows[opp['id']] = len(self.opportunities)
+                self.opportunities.append(opp)
+                self.weights = np.vstack([self.weights, weight_row[None, :]])
+                self.compatibility = np.hstack([
+                    self.compatibility, np.zeros((len(self.employee_rows), 1), np.float32)
+                ])
+            else:
+                self.opportunities[row] = opp
+                self.weights[row] = weight_row
+            self.compatibility[:, row] = self.held @ weight_row
+
+    def sync_employees(self, employees, version):
+        """Bring E and C up to date, recomputing only rows whose skills changed"""
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            current = {emp.employee_id: emp for emp in employees}
+            if set(current) != set(self.employee_rows):
+                self._rebuild(current)
+            else:
+                for emp_id, emp in current.items():
+                    names = employee_skill_names(emp)
+                    if names != self.employee_names[emp_id]:
+                        self._update_row(emp_id, names)
+            self.version = version
+
+    def _update_row(self, emp_id, names):
+        row = self.employee_rows[emp_id]
+        self.employee_names[emp_id] = names
+        self.held[row] = self._employee_vector(names)
+        self.compatibility[row] = self.weights @ self.held[row]
+
+    def _rebuild(self, employees):
+        self.employee_rows = {emp_id: i for i, emp_id in enumerate(employees)}
+        self.employee_names = {emp_id: employee_skill_names(emp) for emp_id, emp in employees.items()}
+        self.held = np.zeros((len(employees), len(self.skill_ids)), dtype=np.uint8)
+        for emp_id, row in self.employee_rows.items():
+            self.held[row] = self._employee_vector(self.employee_names[emp_id])
+        self.compatibility = (self.held @ self.weights.T).astype(np.float32)
+
+    def top_matches(self, emp_id, k=10):
+        """Best-matching opportunities for one employee, with has/missing flags"""
+        with self._lock:
+            row = self.employee_rows.get(emp_id)
+            if row is None:
+                return None
+            scores = self.compatibility[row]
+            k = min(k, len(scores))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            held = self.held[row]
+            return [{
+                **{key: value for key, value in self.opportunities[i].items() if key != 'skills'},
+                'compatibility': int(round(float(scores[i]) * 100)),
+                'skills': [
+                    {'name': s['name'], 'has': bool(held[self.skill_ids[normalize(s['name'])]])}
+                    for s in self.opportunities[i]['skills']
+                ]
+            } for i in top]
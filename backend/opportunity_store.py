@@ -0,0 +1,135 @@
+"""Internal opportunity catalog with hot reload.
+
+The catalog lives in opportunities.json and is scored against every
+employee by an OpportunityMatcher. Under gunicorn each worker holds its own
+copy, so an upsert in one worker reaches the others through the file:
+every store watches its mtime and swaps in a freshly loaded catalog and
+matcher with a single reference assignment, the same way EmployeeStore and
+TaxonomyStore do. Writes go to a unique temp file renamed over the catalog,
+serialized by a lock (and an flock on a side file across processes) and
+preceded by a reload, so concurrent upserts never lose each other's entries.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from opportunity_matcher import OpportunityMatcher
+from structured_log import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads in one process are still serialized
+    fcntl = None
+
+log = get_logger('opportunity_store')
+
+
+class _Catalog:
+    """One loaded generation of the catalog and its matcher (upserts from
+    this process update it in place)"""
+
+    __slots__ = ('opportunities', 'matcher', 'mtime')
+
+    def __init__(self, opportunities, mtime, previous=None):
+        self.opportunities = opportunities
+        # Employee rows (and their version) carry over from the previous
+        # generation, so the next sync_employees has nothing to rebuild
+        self.matcher = OpportunityMatcher(opportunities.values(),
+                                          employees_from=previous.matcher if previous else None)
+        self.mtime = mtime
+
+
+def _read(path):
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, 'r', encoding='utf-8') as f:
+        return {opp['id']: opp for opp in json.load(f)}, mtime
+
+
+class OpportunityStore:
+    """Opportunity catalog and matcher, reloaded when opportunities.json changes"""
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_check = 0.0
+        self._catalog = _Catalog(*_read(path))
+
+    def _current(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.maybe_reload()
+        return self._catalog
+
+    def maybe_reload(self):
+        """Swap in the catalog on disk if the file changed"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._catalog.mtime:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                catalog = _Catalog(*_read(self.path), previous=self._catalog)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                log.warning('opportunities_reload_skipped', error=str(e))
+                return False
+            self._catalog = catalog
+            log.info('opportunities_reloaded', count=len(catalog.opportunities))
+            return True
+        finally:
+            self._lock.release()
+
+    def all(self):
+        return list(self._current().opportunities.values())
+
+    def get(self, opp_id):
+        return self._current().opportunities.get(opp_id)
+
+    @property
+    def matcher(self):
+        return self._current().matcher
+
+    @contextmanager
+    def _exclusive(self):
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def upsert(self, opp):
+        """Add or replace one entry and persist the catalog atomically"""
+        with self._exclusive():
+            # Another worker may have written since our last check
+            self.maybe_reload()
+            catalog = self._catalog
+            opportunities = {**catalog.opportunities, opp['id']: opp}
+            fd, tmp_path = tempfile.mkstemp(prefix='.opportunities-', suffix='.tmp',
+                                            dir=os.path.dirname(os.path.abspath(self.path)))
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(list(opportunities.values()), f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            # Only the new entry's column of the match matrix is recomputed
+            catalog.matcher.upsert_opportunity(opp)
+            catalog.opportunities = opportunities
+            catalog.mtime = os.stat(self.path).st_mtime_ns
+        return opp
@@ -1,18 +1,159 @@
-import pandas as pd
+"""Compile Functions & Skills.xlsx into the skills_taxonomy.json artifact.
+
+The workbook is stream-read straight from its zip container (shared
+strings plus one worksheet, parsed incrementally with iterparse), so
+neither pandas nor openpyxl is needed. Rows are cleaned, deduplicated and
+grouped into a function -> specialisation tree with stable ids by
+taxonomy_store.compile_taxonomy. The artifact is written atomically; a
+running backend notices the new file within a couple of seconds, or
+immediately when --notify is given.
+
+Usage:
+    python parse_skills.py [--input XLSX] [--output JSON] [--sheet NAME]
+                           [--notify http://localhost:5001]
+"""
+import argparse
 import json
+import os
+import re
+import sys
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from taxonomy_index import FUNC_KEY, SPEC_KEY
+from taxonomy_store import clean_name, compile_taxonomy
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_CELL_REF_RE = re.compile(r'([A-Z]+)')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv('DATA_DIR', os.path.join(BASE_DIR, '..', 'data'))
+
+
+def column_index(cell_ref):
+    """'A1' -> 0, 'B7' -> 1, 'AA3' -> 26"""
+    letters = _CELL_REF_RE.match(cell_ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for _, elem in iterparse(f):
+            if elem.tag == MAIN_NS + 'si':
+                # Plain <t>, or rich text split over <r><t> runs; <rPh> phonetic hints are skipped
+                runs = elem.findall(MAIN_NS + 't') + elem.findall(f"{MAIN_NS}r/{MAIN_NS}t")
+                strings.append(''.join(t.text or '' for t in runs))
+                elem.clear()
+    return strings
+
+
+def _sheet_path(archive, sheet_name=None):
+    """Zip member of the named worksheet (the first one by default)"""
+    with archive.open('xl/workbook.xml') as f:
+        sheets = [(e.get('name'), e.get(REL_NS + 'id'))
+                  for _, e in iterparse(f) if e.tag == MAIN_NS + 'sheet']
+    with archive.open('xl/_rels/workbook.xml.rels') as f:
+        targets = {e.get('Id'): e.get('Target')
+                   for _, e in iterparse(f) if e.tag == PKG_REL_NS + 'Relationship'}
+    for name, rel_id in sheets:
+        if sheet_name is None or name == sheet_name:
+            target = targets[rel_id]
+            return target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    raise ValueError(f"Sheet {sheet_name!r} not found (sheets: {[n for n, _ in sheets]})")
+
+
+def _cell_value(cell, shared):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(MAIN_NS + 't'))
+    value = cell.find(MAIN_NS + 'v')
+    if value is None or value.text is None:
+        return None
+    if kind == 's':
+        return shared[int(value.text)]
+    if kind == 'b':
+        return value.text == '1'
+    if kind in ('str', 'e'):
+        return value.text
+    number = float(value.text)
+    return int(number) if number.is_integer() else number
+
+
+def iter_xlsx_rows(path, sheet_name=None):
+    """Yield each worksheet row as a list of cell values, streaming"""
+    with zipfile.ZipFile(path) as archive:
+        shared = _shared_strings(archive)
+        with archive.open(_sheet_path(archive, sheet_name)) as f:
+            for _, elem in iterparse(f):
+                if elem.tag != MAIN_NS + 'row':
+                    continue
+                row = []
+                for cell in elem.iter(MAIN_NS + 'c'):
+                    index = column_index(cell.get('r')) if cell.get('r') else len(row)
+                    row.extend([None] * (index - len(row)))
+                    row.append(_cell_value(cell, shared))
+                elem.clear()
+                yield row
+
+
+def read_taxonomy_rows(path, sheet_name=None):
+    """Workbook rows as {FUNC_KEY, SPEC_KEY} dicts, using the header row to find columns"""
+    rows = iter_xlsx_rows(path, sheet_name)
+    header = [clean_name(h) for h in next(rows, [])]
+    try:
+        func_col, spec_col = header.index(FUNC_KEY), header.index(SPEC_KEY)
+    except ValueError:
+        raise ValueError(f"Header must contain {FUNC_KEY!r} and {SPEC_KEY!r}, got {header}")
+    for row in rows:
+        row = row + [None] * (max(func_col, spec_col) + 1 - len(row))
+        yield {FUNC_KEY: row[func_col], SPEC_KEY: row[spec_col]}
+
+
+def write_artifact(artifact, path):
+    """Write atomically so the server never reads a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def notify(base_url):
+    """Ask a running backend to swap the new taxonomy in now"""
+    import requests
+    response = requests.post(f"{base_url.rstrip('/')}/api/taxonomy/reload", timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--input', default=os.path.join(DATA_DIR, 'Functions & Skills.xlsx'))
+    parser.add_argument('--output', default=os.path.join(DATA_DIR, 'skills_taxonomy.json'))
+    parser.add_argument('--sheet', help='worksheet name (default: first sheet)')
+    parser.add_argument('--notify', metavar='URL', help='backend base URL to reload')
+    args = parser.parse_args(argv)
 
-# Read the Excel file
-df = pd.read_excel('../data/Functions & Skills.xlsx')
+    artifact = compile_taxonomy(read_taxonomy_rows(args.input, args.sheet),
+                                source=os.path.basename(args.input))
+    write_artifact(artifact, args.output)
+    print(f"✓ Compiled {len(artifact['rows'])} specialisations in "
+          f"{len(artifact['functions'])} functions "
+          f"({artifact['duplicates_dropped']} duplicates dropped), version {artifact['version']}")
+    print(f"  → {args.output}")
 
-print("Column names:")
-print(df.columns.tolist())
-print("\nFirst few rows:")
-print(df.head())
-print(f"\nTotal rows: {len(df)}")
+    if args.notify:
+        result = notify(args.notify)
+        print(f"✓ Backend now serving taxonomy {result.get('version')}")
 
-# Save as JSON for easy use
-skills_data = df.to_dict('records')
-with open('../data/skills_taxonomy.json', 'w') as f:
-    json.dump(skills_data, f, indent=2)
 
-print("\n✓ Saved to skills_taxonomy.json")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
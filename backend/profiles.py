@@ -0,0 +1,213 @@
+"""Compact, interned employee profiles.
+
+json.load gives every profile its own nested dicts and its own copy of
+strings such as "Info Tech: Infrastructure" or "Advanced". Here each profile
+is a __slots__ record: skills and competencies are shared objects interned
+once per store in a Vocabulary and carry integer ids, other repeated
+strings go through sys.intern, and fields every request needs (skill
+aliases, years at PSA, department prefix...) are computed once at load. The full document is kept only as zlib-compressed JSON and is
+decoded for the few callers that need all of it; pack_documents() moves
+those blobs into one NumPy buffer (which snapshot.py memory-maps).
+
+Vocabulary ids are local to one employee snapshot, not taxonomy ids.
+Employees and the taxonomy reload independently, so a taxonomy id stored
+here would go stale on every taxonomy reload. Mapping profile skills onto
+taxonomy skill and function ids is done by TaxonomyIndex.employee_bits,
+which resolves each Skill's aliases once per taxonomy and employee version.
+"""
+import datetime
+import json
+import sys
+import zlib
+
+import numpy as np
+
+from taxonomy_index import normalize, skill_aliases
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Fields /api/employees can return (?fields=...), by public name
+SUMMARY_FIELDS = {
+    'id': lambda p: p.employee_id,
+    'name': lambda p: p.name,
+    'title': lambda p: p.job_title,
+    'department': lambda p: p.department,
+    'unit': lambda p: p.unit,
+    'line_manager': lambda p: p.line_manager,
+    'office_location': lambda p: p.office_location,
+    'email': lambda p: p.email,
+    'hire_date': lambda p: p.hire_date,
+    'years_at_psa': lambda p: p.years_at_psa,
+    'skills': lambda p: p.skill_names,
+}
+DEFAULT_SUMMARY_FIELDS = ('id', 'name', 'title', 'department')
+
+
+class Skill:
+    """One distinct (skill name, specialisation, function area) triple"""
+
+    __slots__ = ('id', 'name', 'specialization', 'function_area', 'aliases')
+
+    def __init__(self, skill_id, name, specialization, function_area):
+        self.id = skill_id
+        self.name = name
+        self.specialization = specialization
+        self.function_area = function_area
+        self.aliases = frozenset(skill_aliases(name, specialization))
+
+
+class Competency:
+    """One distinct (competency, level) pair"""
+
+    __slots__ = ('id', 'name', 'level')
+
+    def __init__(self, competency_id, name, level):
+        self.id = competency_id
+        self.name = name
+        self.level = level
+
+
+class Vocabulary:
+    """Interning tables shared by every profile in a store
+
+    Ids are dense per snapshot (0..n-1 in first-seen order) and only
+    identify a Skill or Competency within that snapshot.
+    """
+
+    def __init__(self):
+        self.skills = []
+        self.competencies = []
+        self._skill_ids = {}
+        self._competency_ids = {}
+
+    def skill(self, name, specialization, function_area):
+        key = (name, specialization, function_area)
+        skill_id = self._skill_ids.get(key)
+        if skill_id is None:
+            skill_id = self._skill_ids[key] = len(self.skills)
+            self.skills.append(Skill(skill_id, _intern(name), _intern(specialization),
+                                     _intern(function_area)))
+        return self.skills[skill_id]
+
+    def competency(self, name, level):
+        key = (name, level)
+        competency_id = self._competency_ids.get(key)
+        if competency_id is None:
+            competency_id = self._competency_ids[key] = len(self.competencies)
+            self.competencies.append(Competency(competency_id, _intern(name), _intern(level)))
+        return self.competencies[competency_id]
+
+
+class Profile:
+    """Read-only view of one employee for matching, filtering and prompts"""
+
+    __slots__ = (
+        'employee_id', 'name', 'email', 'office_location',
+        'job_title', 'department', 'department_prefix', 'unit', 'line_manager',
+        'hire_date', 'in_role_since', 'last_updated',
+        'skills', 'competencies', 'roles', 'programs',
+        'years_at_psa', 'years_experience', '_doc'
+    )
+
+    @classmethod
+    def from_dict(cls, emp, vocabulary, today=None):
+        today = today or datetime.date.today()
+        personal = emp.get('personal_info', {})
+        info = emp.get('employment_info', {})
+        self = cls()
+        self.employee_id = _intern(emp['employee_id'])
+        self.name = personal.get('name')
+        self.email = personal.get('email')
+        self.office_location = _intern(personal.get('office_location'))
+        self.job_title = _intern(info.get('job_title'))
+        self.department = _intern(info.get('department'))
+        self.department_prefix = _intern((self.department or '').split(':')[0])
+        self.unit = _intern(info.get('unit'))
+        self.line_manager = _intern(info.get('line_manager'))
+        self.hire_date = info.get('hire_date')
+        self.in_role_since = info.get('in_role_since')
+        self.last_updated = info.get('last_updated')
+
+        self.skills = tuple(
+            vocabulary.skill(s.get('skill_name'), s.get('specialization'), s.get('function_area'))
+            for s in emp.get('skills', [])
+        )
+        self.competencies = tuple(
+            vocabulary.competency(c.get('name'), c.get('level'))
+            for c in emp.get('competencies', [])
+        )
+        # (role title, focus areas, key skills used) and (programme, focus)
+        self.roles = tuple(
+            (_intern(p.get('role_title')),
+             tuple(_intern(a) for a in p.get('focus_areas', [])),
+             tuple(_intern(s) for s in p.get('key_skills_used', [])))
+            for p in emp.get('positions_history', [])
+        )
+        self.programs = tuple(
+            (_intern(x.get('program')), x.get('focus'))
+            for x in emp.get('experiences', [])
+        )
+
+        hired = _parse_date(self.hire_date)
+        self.years_at_psa = today.year - hired.year if hired else 0
+        starts = [hired] + [_parse_date(p.get('period', {}).get('start'))
+                            for p in emp.get('positions_history', [])]
+        starts = [d for d in starts if d]
+        self.years_experience = max(0.0, (today - min(starts)).days / 365.25) if starts else 0.0
+
+        self._doc = zlib.compress(json.dumps(emp, ensure_ascii=False).encode('utf-8'))
+        return self
+
+    @property
+    def skill_names(self):
+        return [s.name for s in self.skills]
+
+    def skill_keys(self):
+        """Normalized names of everything the employee holds: skill aliases and competencies"""
+        keys = set()
+        for skill in self.skills:
+            keys |= skill.aliases
+        keys.update(normalize(c.name) for c in self.competencies)
+        return keys
+
+    def summary(self, fields=DEFAULT_SUMMARY_FIELDS):
+        """The fields /api/employees lists"""
+        return {field: SUMMARY_FIELDS[field](self) for field in fields}
+
+    def to_dict(self):
+        """The full original profile document"""
+        doc = self._doc
+        if isinstance(doc, tuple):
+            pack, index = doc
+            doc = pack.get(index)
+        return json.loads(zlib.decompress(doc))
+
+
+class DocumentPack:
+    """Compressed profile documents concatenated into one uint8 array"""
+
+    def __init__(self, documents):
+        lengths = np.fromiter(map(len, documents), dtype=np.int64, count=len(documents))
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self.data = np.frombuffer(b''.join(documents), dtype=np.uint8)
+
+    def get(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]]
+
+
+def pack_documents(profiles):
+    """Point every profile's document at one shared DocumentPack"""
+    pack = DocumentPack([p._doc for p in profiles])
+    for index, profile in enumerate(profiles):
+        profile._doc = (pack, index)
+    return pack
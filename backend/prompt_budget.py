@@ -0,0 +1,138 @@
+"""Prompt and completion token budgeting for the AI routes.
+
+Three jobs:
+  * estimate prompt tokens locally, calibrated against the `usage` block
+    the API returns, so prompts can be sized before they are sent;
+  * record actual prompt/completion usage and truncations per route;
+  * size max_completion_tokens from the observed completion lengths of each
+    route instead of a fixed worst case, and trim list-valued prompt
+    sections (skills, taxonomy context) to a token allowance.
+"""
+import math
+import re
+import threading
+from collections import deque
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def raw_token_estimate(text):
+    """Approximate BPE token count: one per punctuation mark, ~4 chars per word piece"""
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _PIECE_RE.findall(text))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RouteUsage:
+    """Rolling usage history for one route"""
+
+    def __init__(self, window):
+        self.completion_tokens = deque(maxlen=window)
+        self.prompt_tokens = deque(maxlen=window)
+        self.calls = 0
+        self.truncated = 0
+        self.calls_since_truncation = None
+
+    def to_dict(self):
+        completions = list(self.completion_tokens)
+        prompts = list(self.prompt_tokens)
+        return {
+            'calls': self.calls,
+            'truncated': self.truncated,
+            'truncation_rate': round(self.truncated / self.calls, 3) if self.calls else 0.0,
+            'prompt_tokens_avg': round(sum(prompts) / len(prompts)) if prompts else None,
+            'completion_tokens_p50': percentile(completions, 50) if completions else None,
+            'completion_tokens_p95': percentile(completions, 95) if completions else None,
+            'completion_tokens_max': max(completions) if completions else None
+        }
+
+
+class PromptBudget:
+    """Token estimation, usage accounting and adaptive completion limits"""
+
+    def __init__(self, window=200, min_samples=20, headroom=1.25, floor=400, step=100):
+        self.window = window
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.floor = floor
+        self.step = step
+        self.calibration = 1.0
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def _route(self, route):
+        usage = self.routes.get(route)
+        if usage is None:
+            usage = self.routes[route] = RouteUsage(self.window)
+        return usage
+
+    def estimate(self, text):
+        """Prompt tokens for text, corrected by the observed estimate/actual ratio"""
+        return math.ceil(raw_token_estimate(text) * self.calibration)
+
+    def completion_limit(self, route, ceiling):
+        """max_completion_tokens for the next call on route.
+
+        Until enough calls have been seen this is the route's ceiling. After
+        that it is the p95 completion length plus headroom, rounded up and
+        clamped to [floor, ceiling]; any recent truncation sends it back to
+        the ceiling.
+        """
+        with self._lock:
+            usage = self._route(route)
+            samples = list(usage.completion_tokens)
+            recently_truncated = (usage.calls_since_truncation is not None and
+                                  usage.calls_since_truncation < self.min_samples)
+            if len(samples) < self.min_samples or recently_truncated:
+                return ceiling
+        limit = percentile(samples, 95) * self.headroom
+        limit = math.ceil(limit / self.step) * self.step
+        return int(max(self.floor, min(ceiling, limit)))
+
+    def record(self, route, prompt_text, usage=None, completion_text='', finish_reason=None):
+        """Record one call; usage is the API's usage block when available"""
+        estimated_prompt = raw_token_estimate(prompt_text)
+        usage = usage or {}
+        prompt_tokens = usage.get('prompt_tokens') or math.ceil(estimated_prompt * self.calibration)
+        completion_tokens = usage.get('completion_tokens') or raw_token_estimate(completion_text)
+
+        with self._lock:
+            stats = self._route(route)
+            stats.calls += 1
+            stats.prompt_tokens.append(prompt_tokens)
+            stats.completion_tokens.append(completion_tokens)
+            if finish_reason == 'length':
+                stats.truncated += 1
+                stats.calls_since_truncation = 0
+            elif stats.calls_since_truncation is not None:
+                stats.calls_since_truncation += 1
+            if usage.get('prompt_tokens') and estimated_prompt:
+                # Exponential moving average of actual / estimated
+                ratio = usage['prompt_tokens'] / estimated_prompt
+                self.calibration = 0.9 * self.calibration + 0.1 * ratio
+
+    def fit_items(self, items, max_tokens, separator=', '):
+        """Longest prefix of items whose joined text fits in max_tokens"""
+        kept = []
+        used = 0
+        sep_tokens = raw_token_estimate(separator)
+        for item in items:
+            cost = self.estimate(str(item)) + (sep_tokens if kept else 0)
+            if used + cost > max_tokens:
+                break
+            kept.append(item)
+            used += cost
+        return kept
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calibration': round(self.calibration, 3),
+                'routes': {route: usage.to_dict() for route, usage in self.routes.items()}
+            }
@@ -0,0 +1,81 @@
+"""Token-bucket model of the Azure OpenAI deployment quota.
+
+Azure enforces requests-per-minute and tokens-per-minute limits per
+deployment, where a request's token cost is its prompt tokens plus the
+requested max_completion_tokens. UpstreamQuota keeps one bucket for each and
+lets background work wait for capacity instead of running into 429s, while
+interactive calls simply debit the buckets so batch work backs off for them.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Refills at rate_per_minute, holding at most one minute of capacity"""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount can be taken (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        # May go negative: debits from interactive calls are never refused
+        self.level -= amount
+
+
+class UpstreamQuota:
+    """Requests-per-minute and tokens-per-minute buckets for one deployment"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens, block=True, timeout=None):
+        """Reserve one request and `tokens` tokens.
+
+        With block=False the reservation is always made immediately (the
+        buckets may go into debt). Returns False if timeout expired first.
+        """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                if wait == 0 or not block:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return True
+            if give_up_at is not None and time.monotonic() + wait > give_up_at:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    def penalize(self, seconds):
+        """Drain the request bucket after an upstream 429 so waiters back off"""
+        with self._lock:
+            self.requests.level = min(self.requests.level, -seconds * self.requests.rate)
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                'requests_available': round(self.requests.level, 1),
+                'requests_per_minute': self.requests.capacity,
+                'tokens_available': round(self.tokens.level),
+                'tokens_per_minute': self.tokens.capacity
+            }
@@ -0,0 +1,114 @@
+"""Pre-serialized, compressed and ETag'd responses for read-only GETs.
+
+The employee and taxonomy endpoints only change when their data version
+does, so each distinct payload is serialized once per version (orjson
+when installed), compressed once (gzip, plus brotli when installed) and
+served from memory with a strong ETag. A request whose If-None-Match
+still matches gets an empty 304.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies aren't worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+def dumps(data):
+    """Compact UTF-8 JSON with sorted keys (the same document jsonify builds)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class PreparedResponse:
+    """One JSON payload, serialized and compressed up front"""
+
+    __slots__ = ('body', 'digest', 'encoded', 'headers')
+
+    def __init__(self, data, headers=None):
+        self.body = dumps(data)
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.headers = headers or {}
+        self.encoded = {}
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            self.encoded['gzip'] = gzip.compress(self.body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(self.body, quality=5)
+
+    def etag(self, encoding=None):
+        # Strong ETags must differ per representation, so encodings get a suffix
+        return f"{self.digest}-{encoding}" if encoding else self.digest
+
+
+class ResponseCache:
+    """Bounded LRU of PreparedResponses, each valid for one data version"""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'builds': 0, 'not_modified': 0}
+
+    def get(self, key, version, build):
+        """Cached response for key at version, calling build() on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[1]
+        # Built outside the lock; a concurrent duplicate build is harmless
+        prepared = build()
+        with self._lock:
+            self.counters['builds'] += 1
+            self._entries[key] = (version, prepared)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prepared
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'entries': len(self._entries)}
+
+    def send(self, prepared, cache_control):
+        """Response for the current request: 304, or the best encoding the client accepts"""
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in prepared.encoded and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        headers = {
+            'ETag': f'"{prepared.etag(encoding)}"',
+            'Cache-Control': cache_control,
+            'Vary': 'Accept-Encoding',
+            **prepared.headers
+        }
+        # Any representation of the same content counts as a match
+        if any(request.if_none_match.contains_weak(prepared.etag(e))
+               for e in (None, *prepared.encoded)):
+            with self._lock:
+                self.counters['not_modified'] += 1
+            return Response(status=304, headers=headers)
+
+        body = prepared.body
+        if encoding:
+            body = prepared.encoded[encoding]
+            headers['Content-Encoding'] = encoding
+        return Response(body, status=200, mimetype='application/json', headers=headers)
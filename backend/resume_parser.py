@@ -0,0 +1,217 @@
+"""Resume text extraction in a process pool.
+
+Uploads arrive as files on disk (see UploadRequest in app.py), so only a
+path crosses the process boundary. Parsing PDF and DOCX is CPU-bound and
+would hold the GIL for the whole request, so it runs in worker processes
+while request threads just wait on the futures.
+
+TXT is decoded directly, DOCX is stream-read from its zip container and
+PDF goes through pypdf when it is installed, with a basic built-in reader
+of uncompressed/Flate text operators otherwise.
+"""
+import importlib.machinery
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import zipfile
+import zlib
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree.ElementTree import iterparse
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_PDF_STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.DOTALL)
+_PDF_TEXT_BLOCK_RE = re.compile(rb'BT(.*?)ET', re.DOTALL)
+_PDF_STRING_RE = re.compile(rb'\((?:\\.|[^\\)])*\)|T\*|\'|"|Td|TD|Tm')
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+_PDF_ESCAPE_RE = re.compile(rb'\\([0-7]{1,3}|.)', re.DOTALL)
+
+
+class UnsupportedResume(ValueError):
+    """The upload isn't a format we can read text from"""
+
+
+def _read_txt(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    for encoding in ('utf-8-sig', 'utf-16'):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode('latin-1')
+
+
+def _read_docx(path):
+    paragraphs = []
+    current = []
+    try:
+        with zipfile.ZipFile(path) as archive, archive.open('word/document.xml') as f:
+            for _, elem in iterparse(f):
+                if elem.tag == WORD_NS + 't' and elem.text:
+                    current.append(elem.text)
+                elif elem.tag == WORD_NS + 'tab':
+                    current.append('\t')
+                elif elem.tag == WORD_NS + 'p':
+                    paragraphs.append(''.join(current))
+                    current = []
+                    elem.clear()
+    except Exception as e:
+        # Not a zip, no document part, corrupt XML (ParseError), a truncated
+        # deflate stream...: all just mean the upload can't be read
+        raise UnsupportedResume(f"Not a readable .docx file: {e}")
+    return '\n'.join(paragraphs)
+
+
+def _unescape_pdf_string(literal):
+    def replace(match):
+        code = match.group(1)
+        if code[:1].isdigit():
+            return bytes([int(code, 8) & 0xFF])
+        return _PDF_ESCAPES.get(code, code if code not in b'\r\n' else b'')
+    return _PDF_ESCAPE_RE.sub(replace, literal[1:-1])
+
+
+def _read_pdf_basic(path):
+    """Text shown by Tj/TJ operators in plain or Flate-compressed content streams"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(b'%PDF'):
+        raise UnsupportedResume('Not a PDF file')
+    lines = []
+    for match in _PDF_STREAM_RE.finditer(data):
+        stream = match.group(1)
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for block in _PDF_TEXT_BLOCK_RE.finditer(stream):
+            line = []
+            for token in _PDF_STRING_RE.findall(block.group(1)):
+                if token.startswith(b'('):
+                    line.append(_unescape_pdf_string(token))
+                elif line:
+                    # Text positioning: treat as a line break
+                    lines.append(b''.join(line))
+                    line = []
+            lines.append(b''.join(line))
+    return '\n'.join(l.decode('latin-1') for l in lines if l.strip())
+
+
+def _read_pdf(path):
+    if pypdf is None:
+        return _read_pdf_basic(path)
+    try:
+        reader = pypdf.PdfReader(path)
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    except Exception as e:
+        # pypdf raises its own errors but also ValueError, KeyError,
+        # struct.error and friends on malformed files
+        raise UnsupportedResume(f"Not a readable PDF file: {e}")
+
+
+_READERS = {'.pdf': _read_pdf, '.docx': _read_docx, '.txt': _read_txt}
+
+
+def check_supported(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in _READERS:
+        raise UnsupportedResume(
+            f"Unsupported file type {extension or '(none)'}; use {', '.join(SUPPORTED_EXTENSIONS)}")
+    return extension
+
+
+def extract_text(path, filename):
+    """Plain text of the resume at path; filename decides the format"""
+    return _READERS[check_supported(filename)](path)
+
+
+def _detach_main():
+    """Keep pool processes from re-running the parent's main script
+
+    A spawn or forkserver child imports the parent's __main__ again (as
+    __mp_main__) unless that module's spec names it __main__. Under
+    `python app.py` that would load the whole app, its data files and its
+    job workers into every parser process; extract_text lives here, so the
+    children never need the main module.
+    """
+    main = sys.modules.get('__main__')
+    if main is not None and getattr(main, '__spec__', None) is None:
+        main.__spec__ = importlib.machinery.ModuleSpec('__main__', None)
+
+
+class ResumeParser:
+    """Runs extract_text in a lazily started pool of worker processes"""
+
+    def __init__(self, max_workers=None, timeout=30):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is not None:
+                return self._pool
+            # Never fork: the caller is a gevent-patched (and, under preload,
+            # pre-forked) process whose hub, locks and threads a forked child
+            # would inherit half-copied. forkserver forks from a clean server
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if context.get_start_method() == 'forkserver':
+                # The server only needs the readers, not the app
+                context.set_forkserver_preload([__name__])
+            _detach_main()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            return self._pool
+
+    def extract_many(self, files):
+        """[(path, filename)] -> [text or UnsupportedResume], parsed in parallel"""
+        for _, filename in files:
+            check_supported(filename)
+        pool = self._executor()
+        futures = [pool.submit(extract_text, path, filename) for path, filename in files]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=self.timeout))
+            except UnsupportedResume as e:
+                results.append(e)
+            except FutureTimeout:
+                # cancel() can't stop a parse that is already running, and a
+                # hung one would hold its process forever: kill the pool
+                self._discard(pool, terminate=True)
+                results.append(UnsupportedResume(f"Parsing took longer than {self.timeout}s"))
+            except (BrokenProcessPool, CancelledError):
+                # A worker died (e.g. out of memory on a hostile file, or
+                # killed above); start afresh next time
+                self._discard(pool)
+                results.append(UnsupportedResume('Parser crashed on this file'))
+        return results
+
+    def _discard(self, pool, terminate=False):
+        """Stop using pool (unless another call already replaced it),
+        killing its processes with terminate"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        if terminate:
+            processes = list((pool._processes or {}).values())
+            pool.shutdown(wait=False)
+            for process in processes:
+                process.terminate()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,67 @@
+"""Coalesce identical in-flight calls into one.
+
+The first caller for a key (the leader) runs the function; callers arriving
+with the same key while it is running (followers) wait for that call and get
+its return value, or re-raise its exception. The entry is dropped as soon as
+the leader finishes, so later callers start a fresh call (the response cache
+covers repeats after that).
+
+A follower that stops waiting (timeout) only gives up its own wait; the
+leader's call keeps running and still completes for everyone else. Nothing
+a follower does can cancel the shared call.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent function calls"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = {'leaders': 0, 'coalesced': 0}
+
+    def do(self, key, fn, timeout=None, on_timeout=TimeoutError):
+        """Run fn() once per key at a time; return its result to every caller.
+
+        Followers wait at most timeout seconds and then raise on_timeout().
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.counters['leaders'] += 1
+            else:
+                call.followers += 1
+                self.counters['coalesced'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise on_timeout()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,232 @@
+"""Organisation-wide skill coverage and gap analytics.
+
+Employees become rows of two uint8 matrices over the taxonomy's skill ids:
+H ("holds the skill") and G ("the skill is a gap": it sits in a function
+area related to the employee's own skills but they don't hold it), both
+taken from TaxonomyIndex.employee_bits. For every grouping (department,
+unit, office) each group keeps its headcount and the column sums of its
+rows of H and G, so coverage, missing-skill rankings and concentration risk
+for every group are a few vectorized reductions over small (groups x
+skills) count matrices.
+
+When profiles change, only the changed rows are rewritten and their old
+and new values subtracted from / added to their groups' sums; the org is
+rebuilt only when employees are added or removed or the taxonomy changes.
+"""
+import threading
+
+import numpy as np
+
+from skill_matcher import bits_to_mask
+from taxonomy_index import normalize
+
+# Groupings, as Profile attribute names
+GROUP_FIELDS = ('department', 'unit', 'office_location')
+
+UNASSIGNED = 'Unassigned'
+
+
+class _Groups:
+    """Interned groups of one field with their headcounts and per-skill sums"""
+
+    def __init__(self, skills):
+        self.ids = {}       # normalized value -> group code
+        self.names = []     # group code -> display name
+        self.size = np.zeros(0, dtype=np.int32)
+        self.held = np.zeros((0, skills), dtype=np.int32)
+        self.gaps = np.zeros((0, skills), dtype=np.int32)
+
+    def code(self, value):
+        key = normalize(value or '')
+        code = self.ids.get(key)
+        if code is None:
+            code = self.ids[key] = len(self.names)
+            self.names.append(' '.join(str(value).split()) if value else UNASSIGNED)
+            self.size = np.append(self.size, np.int32(0))
+            self.held = np.vstack([self.held, np.zeros((1, self.held.shape[1]), np.int32)])
+            self.gaps = np.vstack([self.gaps, np.zeros((1, self.gaps.shape[1]), np.int32)])
+        return code
+
+    def add(self, codes, held, gaps, sign=1):
+        """Add (or with sign=-1 remove) rows of H and G to their groups' sums"""
+        np.add.at(self.size, codes, sign)
+        np.add.at(self.held, codes, sign * held.astype(np.int32))
+        np.add.at(self.gaps, codes, sign * gaps.astype(np.int32))
+
+
+class SkillGapAnalytics:
+    """Employee x skill matrices and per-group aggregates for coverage reports"""
+
+    def __init__(self):
+        self.version = None
+        self._lock = threading.RLock()
+        self._reset(None)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _reset(self, index):
+        self.index = index
+        skills = len(index) if index is not None else 0
+        self.ids = []
+        self.signatures = []
+        self.held = np.zeros((0, skills), dtype=np.uint8)
+        self.gaps = np.zeros((0, skills), dtype=np.uint8)
+        self.codes = {field: np.zeros(0, dtype=np.int32) for field in GROUP_FIELDS}
+        self.groups = {field: _Groups(skills) for field in GROUP_FIELDS}
+
+    def _signature(self, emp, employee_version):
+        held, candidates = self.index.employee_bits(emp, employee_version)
+        return held, candidates & ~held, tuple(getattr(emp, field) or '' for field in GROUP_FIELDS)
+
+    def _vectors(self, signature):
+        size = len(self.index)
+        return bits_to_mask(signature[0], size), bits_to_mask(signature[1], size)
+
+    def sync(self, employees, taxonomy, employee_version):
+        """Bring matrices and aggregates up to date with the employees and taxonomy"""
+        version = (employee_version, taxonomy.version)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            employees = list(employees)
+            if (self.index is None or taxonomy.version != self.index.version or
+                    [emp.employee_id for emp in employees] != self.ids):
+                self._rebuild(employees, taxonomy.index, employee_version)
+            else:
+                changed = []
+                for row, emp in enumerate(employees):
+                    signature = self._signature(emp, employee_version)
+                    if signature != self.signatures[row]:
+                        changed.append((row, signature))
+                if changed:
+                    self._update_rows(changed)
+            self.version = version
+
+    def _rebuild(self, employees, index, employee_version):
+        self._reset(index)
+        self.ids = [emp.employee_id for emp in employees]
+        self.signatures = [self._signature(emp, employee_version) for emp in employees]
+        self.held = np.zeros((len(employees), len(index)), dtype=np.uint8)
+        self.gaps = np.zeros_like(self.held)
+        for row, signature in enumerate(self.signatures):
+            self.held[row], self.gaps[row] = self._vectors(signature)
+        for position, field in enumerate(GROUP_FIELDS):
+            groups = self.groups[field]
+            codes = [groups.code(signature[2][position]) for signature in self.signatures]
+            self.codes[field] = np.array(codes, dtype=np.int32)
+            groups.add(self.codes[field], self.held, self.gaps)
+
+    def _update_rows(self, changed):
+        rows = np.array([row for row, _ in changed], dtype=np.int64)
+        for field in GROUP_FIELDS:
+            self.groups[field].add(self.codes[field][rows], self.held[rows], self.gaps[rows], sign=-1)
+        for row, signature in changed:
+            self.signatures[row] = signature
+            self.held[row], self.gaps[row] = self._vectors(signature)
+            for position, field in enumerate(GROUP_FIELDS):
+                self.codes[field][row] = self.groups[field].code(signature[2][position])
+        for field in GROUP_FIELDS:
+            self.groups[field].add(self.codes[field][rows], self.held[rows], self.gaps[rows])
+
+    def _skill(self, skill_id, **fields):
+        return {
+            'skill': self.index.skill_names[skill_id],
+            'function_area': self.index.function_names[self.index.skill_functions[skill_id]],
+            **fields
+        }
+
+    def has_group(self, field, name):
+        return normalize(name) in self.groups[field].ids
+
+    def matrices(self):
+        """Copies of (version, employee ids, H, G, {field: group codes},
+        {field: {normalized name: code}}) taken together under the lock"""
+        with self._lock:
+            return (self.version, list(self.ids), self.held.copy(), self.gaps.copy(),
+                    {field: codes.copy() for field, codes in self.codes.items()},
+                    {field: dict(self.groups[field].ids) for field in GROUP_FIELDS})
+
+    def report(self, field, group=None, top=10, risk_max=2):
+        """Coverage, top missing skills and concentration risk for every group of field
+
+        A skill is missing for an employee when it belongs to a function area
+        related to their own skills and they don't hold it; groups rank skills
+        by how many of their employees miss them. Concentration risk lists the
+        skills held by at least one but at most risk_max people in the group.
+        With group set, only that group is reported, and its at-risk skills
+        name their holders.
+        """
+        with self._lock:
+            groups = self.groups[field]
+            codes = np.arange(len(groups.names))
+            if group:
+                codes = codes[[groups.ids[normalize(group)]]]
+            codes = codes[groups.size[codes] > 0]
+            size, held, gaps = groups.size[codes], groups.held[codes], groups.gaps[codes]
+            skills = held.shape[1]
+            # Every grouping partitions the org, so any one gives the org totals
+            org_held = self.groups[GROUP_FIELDS[0]].held.sum(axis=0)
+
+            covered = (held > 0).sum(axis=1)
+            # Most employees missing the skill first, then the fewest holders
+            missing_order = np.lexsort((held, -gaps))[:, :top]
+            at_risk = (held >= 1) & (held <= risk_max)
+            # Fewest holders first, then the most demand
+            risk_order = np.lexsort((-gaps, np.where(at_risk, held, risk_max + 1)))[:, :top]
+
+            reports = []
+            for i, code in enumerate(codes):
+                entry = {
+                    'name': groups.names[code],
+                    'employees': int(size[i]),
+                    'skills_covered': int(covered[i]),
+                    'coverage_percentage': round(float(covered[i]) / skills * 100, 1) if skills else 0.0,
+                    'avg_skills_per_employee': round(int(held[i].sum()) / int(size[i]), 2),
+                    'at_risk_skills': int(at_risk[i].sum()),
+                    'top_missing': [
+                        self._skill(s, employees_missing=int(gaps[i, s]), holders=int(held[i, s]),
+                                    org_holders=int(org_held[s]))
+                        for s in missing_order[i] if gaps[i, s]
+                    ],
+                    'concentration_risk': [
+                        self._skill(s, holders=int(held[i, s]), employees_missing=int(gaps[i, s]))
+                        for s in risk_order[i] if at_risk[i, s]
+                    ]
+                }
+                if group:
+                    members = self.codes[field] == code
+                    for s, risk in zip(risk_order[i], entry['concentration_risk']):
+                        rows = np.flatnonzero(members & (self.held[:, s] > 0))
+                        risk['holder_ids'] = [self.ids[row] for row in rows]
+                reports.append(entry)
+
+            org_at_risk = (org_held >= 1) & (org_held <= risk_max)
+            return {
+                'by': field,
+                'total_employees': len(self.ids),
+                'total_skills': skills,
+                'organization': {
+                    'skills_covered': int((org_held > 0).sum()),
+                    'coverage_percentage': round(float((org_held > 0).sum()) / skills * 100, 1) if skills else 0.0,
+                    'uncovered_skills': [self.index.skill_names[s] for s in np.flatnonzero(org_held == 0)],
+                    'at_risk_skills': [
+                        self._skill(s, holders=int(org_held[s])) for s in np.flatnonzero(org_at_risk)
+                    ]
+                },
+                'groups': reports,
+                # Holders per group (rows) and skill (columns), for the coverage heatmap
+                'heatmap': {
+                    'groups': [groups.names[code] for code in codes],
+                    'skills': list(self.index.skill_names),
+                    'holders': held.tolist()
+                }
+            }
@@ -0,0 +1,195 @@
+"""Local skill extraction from free text (resumes).
+
+Every known way of naming a skill, from taxonomy specialisations, the skill
+names on employee profiles and a short synonym list, is compiled into one
+token-level Aho-Corasick automaton. A document is then tokenized once and
+walked once, finding every phrase at every position in time linear in the
+document length, however many phrases there are. Working on tokens rather
+than characters means matches always fall on word boundaries.
+"""
+import re
+import threading
+from collections import deque
+
+from taxonomy_index import FUNC_KEY, SPEC_KEY, normalize
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+# Dropped from phrases and text alike, so "A & B" matches "A and B"
+_SKIP_TOKENS = {'and'}
+
+# Extra phrases for a skill, keyed by the skill's (normalized) name or
+# specialisation. Entries whose skill isn't loaded are ignored.
+SKILL_SYNONYMS = {
+    'machine learning & ai': ['machine learning', 'ml', 'artificial intelligence', 'ai', 'deep learning'],
+    'devops / devsecops': ['devops', 'devsecops', 'ci/cd', 'continuous integration',
+                           'continuous delivery', 'kubernetes', 'k8s', 'docker'],
+    'robotic process automation': ['rpa', 'uipath', 'blue prism', 'automation anywhere'],
+    'agile methodology': ['agile', 'scrum', 'kanban'],
+    'data visualisation': ['data visualization', 'tableau', 'power bi', 'dashboards'],
+    'predictive / prescriptive analytics': ['predictive analytics', 'predictive modelling',
+                                            'predictive modeling', 'forecasting'],
+    'relational database/datagrid design and management': ['sql', 'postgresql', 'mysql',
+                                                           'relational database', 'oracle database'],
+    'automated test development and testing': ['test automation', 'automated testing', 'selenium'],
+    'user interface design': ['ui design', 'figma'],
+    'cloud architecture': ['aws', 'azure', 'gcp', 'google cloud', 'cloud computing'],
+    'financial modeling': ['financial modelling'],
+    'talent acquisition / recruitment': ['talent acquisition', 'recruitment', 'recruiting'],
+    'cybersecurity threat intelligence and detection': ['threat intelligence', 'siem'],
+    'vulnerability management': ['vulnerability assessment', 'penetration testing'],
+    'network security management': ['network security'],
+}
+
+
+def tokenize(text):
+    return tuple(t for t in _TOKEN_RE.findall(text.lower()) if t not in _SKIP_TOKENS)
+
+
+class AhoCorasick:
+    """Automaton over token sequences; find() reports every phrase occurrence"""
+
+    def __init__(self, phrases):
+        self.phrases = phrases
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for phrase_id, tokens in enumerate(phrases):
+            state = 0
+            for token in tokens:
+                following = self.goto[state].get(token)
+                if following is None:
+                    following = self.goto[state][token] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = following
+            self.out[state] += (phrase_id,)
+
+        # Breadth-first, so every fail target is finished before it's used
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[following] = self.goto[fallback].get(token, 0)
+                self.out[following] += self.out[self.fail[following]]
+
+    def find(self, tokens):
+        """Yield (end position, phrase id) for every match, overlapping ones included"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for phrase_id in out[state]:
+                yield position, phrase_id
+
+
+def _taxonomy_terms(rows):
+    """(phrase, skill name, function, source) for each specialisation and its short forms"""
+    for row in rows:
+        name = row[SPEC_KEY]
+        phrases = [name]
+        tail = name.split(':')[-1].strip()
+        phrases.append(tail)
+        # "Talent Acquisition / Recruitment": either multi-word side on its own
+        phrases += [side for side in tail.split(' / ') if len(tokenize(side)) > 1]
+        for phrase in phrases:
+            yield phrase, name, row[FUNC_KEY], 'taxonomy'
+
+
+def _profile_terms(employees):
+    seen = set()
+    for emp in employees:
+        for skill in emp.skills:
+            if skill.id in seen:
+                continue
+            seen.add(skill.id)
+            yield skill.name, skill.name, skill.function_area, 'profiles'
+            if skill.specialization:
+                yield skill.specialization.split(':')[-1].strip(), skill.name, skill.function_area, 'profiles'
+
+
+class SkillExtractor:
+    """Aho-Corasick skill matcher, rebuilt when the taxonomy or profiles change"""
+
+    def __init__(self, synonyms=SKILL_SYNONYMS):
+        self.synonyms = synonyms
+        self.versions = None
+        # (automaton, skill index per phrase id, skills), replaced as a whole
+        self._compiled = (AhoCorasick([]), [], [])
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._compiled[2])
+
+    def sync(self, taxonomy, employees, employee_version):
+        versions = (taxonomy.version, employee_version)
+        if versions == self.versions:
+            return
+        with self._lock:
+            if versions == self.versions:
+                return
+            self._build(taxonomy.rows, employees)
+            self.versions = versions
+
+    def _build(self, taxonomy_rows, employees):
+        skills = []          # (name, function, source, normalized names)
+        skill_ids = {}       # normalized skill name -> index into skills
+        phrase_skill = {}    # phrase tokens -> skill index; the first source wins
+        for phrase, name, function, source in (*_taxonomy_terms(taxonomy_rows),
+                                               *_profile_terms(employees)):
+            skill_id = skill_ids.get(normalize(name))
+            if skill_id is None:
+                skill_id = skill_ids[normalize(name)] = len(skills)
+                skills.append((name, function, source, set()))
+            tokens = tokenize(phrase)
+            if tokens:
+                phrase_skill.setdefault(tokens, skill_id)
+                skills[skill_id][3].add(normalize(phrase))
+
+        for target, phrases in self.synonyms.items():
+            skill_id = phrase_skill.get(tokenize(target))
+            if skill_id is None:
+                continue
+            for phrase in phrases:
+                phrase_skill.setdefault(tokenize(phrase), skill_id)
+
+        phrases = list(phrase_skill)
+        self._compiled = (AhoCorasick(phrases), [phrase_skill[p] for p in phrases], skills)
+
+    def extract(self, text, held=frozenset()):
+        """Skills mentioned in text, most mentioned first.
+
+        held is the normalized skill names someone already has (see
+        Profile.skill_keys); skills answering to any of them get is_new False.
+        """
+        automaton, phrase_skills, skills = self._compiled
+        spans = {}
+        for end, phrase_id in automaton.find(tokenize(text)):
+            start = end - len(automaton.phrases[phrase_id]) + 1
+            spans.setdefault(phrase_skills[phrase_id], []).append((start, -end))
+
+        found = []
+        for skill_id, skill_spans in spans.items():
+            # "Machine Learning & AI" is one mention, not three (the phrase,
+            # "machine learning" and "ai"): skip spans inside an earlier one
+            count, covered = 0, -1
+            for start, negative_end in sorted(skill_spans):
+                if -negative_end > covered:
+                    count += 1
+                    covered = -negative_end
+            name, function, source, names = skills[skill_id]
+            found.append({
+                'skill': name,
+                'function_area': function,
+                'source': source,
+                'mentions': count,
+                'is_new': not (names & held)
+            })
+        found.sort(key=lambda s: (-s['mentions'], s['skill']))
+        return found
@@ -0,0 +1,177 @@
+"""Local semantic matching between free text and taxonomy skills.
+
+Every taxonomy specialisation (with its function area) is turned into a
+hashed TF-IDF vector over word tokens and character trigrams, and the
+vectors are stacked into one L2-normalised NumPy matrix at load time. A query
+(target role, job title, an employee's skills...) is vectorised the same way,
+so ranking the whole taxonomy is a single matrix-vector product followed by
+argpartition for the top k. Character trigrams let "Cloud Architect" match
+"Cloud Architecture" without any stemming rules.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def bits_to_mask(bits, size):
+    """Python int bitset -> NumPy bool array of length size"""
+    raw = bits.to_bytes((size + 7) // 8 or 1, 'little')
+    return np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder='little')[:size].astype(bool)
+
+
+def features(text):
+    """Word and character-trigram features of text"""
+    feats = []
+    for word in _WORD_RE.findall(str(text).lower()):
+        feats.append('w:' + word)
+        padded = f' {word} '
+        feats.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return feats
+
+
+class HashingTfidf:
+    """TF-IDF over features hashed into a fixed number of buckets"""
+
+    def __init__(self, dim=2048):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _counts(self, text):
+        row = np.zeros(self.dim, dtype=np.float32)
+        for feat in features(text):
+            # crc32 rather than hash(): stable across processes and restarts
+            row[zlib.crc32(feat.encode('utf-8')) % self.dim] += 1
+        return row
+
+    def fit_transform(self, docs):
+        counts = np.vstack([self._counts(doc) for doc in docs]) if docs else np.zeros((0, self.dim), np.float32)
+        return self.fit_counts(counts)
+
+    def fit_counts(self, counts):
+        """Fit idf on a (n_docs, dim) matrix of raw counts and weight it"""
+        df = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(counts)) / (1 + df)) + 1).astype(np.float32)
+        return self.weight(counts)
+
+    def counts(self, texts, weights=None, memo=None):
+        """Summed (optionally weighted) raw feature counts of several texts.
+
+        memo, if given, is a dict reused across calls to skip re-hashing
+        texts seen before (skill names repeat across most documents).
+        """
+        row = np.zeros(self.dim, dtype=np.float32)
+        for i, text in enumerate(texts):
+            if text:
+                if memo is None:
+                    counts = self._counts(text)
+                else:
+                    counts = memo.get(text)
+                    if counts is None:
+                        counts = memo[text] = self._counts(text)
+                row += counts * (weights[i] if weights else 1.0)
+        return row
+
+    def transform(self, texts, weights=None):
+        """One query vector from several texts, optionally weighted"""
+        return self.weight(self.counts(texts, weights)[None, :])[0]
+
+    def weight(self, counts):
+        """TF-IDF weight and L2-normalise rows of raw counts"""
+        weighted = np.log1p(counts) * self.idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return weighted / norms
+
+
+class SkillMatcher:
+    """Ranks taxonomy skills against employees and free-text roles"""
+
+    def __init__(self, taxonomy_index, dim=2048):
+        self.taxonomy = taxonomy_index
+        self.vectorizer = HashingTfidf(dim)
+        docs = [
+            f"{name} {name} {taxonomy_index.function_names[func_id]}"
+            for name, func_id in zip(taxonomy_index.skill_names, taxonomy_index.skill_functions)
+        ]
+        # (n_skills, dim) float32, rows L2-normalised
+        self.matrix = self.vectorizer.fit_transform(docs)
+        self._profile_cache = {}
+        self._profile_version = None
+        self._lock = threading.Lock()
+        self.cache_counters = {'hits': 0, 'misses': 0}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock'], state['_profile_cache'], state['cache_counters']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._profile_cache = {}
+        self._profile_version = None
+        self._lock = threading.Lock()
+        self.cache_counters = {'hits': 0, 'misses': 0}
+
+    def top_k(self, query, k, exclude=None, boost=None):
+        """Indexes and scores of the k best skills for a query vector.
+
+        exclude is a bool mask of skills to drop; boost is a float array added
+        to the cosine scores (e.g. to favour the employee's function areas).
+        """
+        scores = self.matrix @ query
+        if boost is not None:
+            scores = scores + boost
+        if exclude is not None:
+            scores = np.where(exclude, -np.inf, scores)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def profile_vector(self, emp, version=None):
+        """Query vector describing an employee's current role and skills"""
+        with self._lock:
+            if version != self._profile_version:
+                self._profile_cache = {}
+                self._profile_version = version
+            vector = self._profile_cache.get(emp.employee_id)
+            self.cache_counters['misses' if vector is None else 'hits'] += 1
+        if vector is None:
+            texts = [emp.job_title, emp.unit, emp.department] + emp.skill_names
+            weights = [2.0, 1.0, 1.0] + [1.0] * (len(texts) - 3)
+            vector = self.vectorizer.transform(texts, weights)
+            with self._lock:
+                self._profile_cache[emp.employee_id] = vector
+        return vector
+
+    def relevant_skills(self, emp, target_role='', k=10, version=None):
+        """Taxonomy skill names most relevant to an employee and target role"""
+        query = self.profile_vector(emp, version)
+        if target_role:
+            # The target role dominates; the profile breaks ties
+            query = 0.3 * query + self.vectorizer.transform([target_role])
+        top, scores = self.top_k(query, k)
+        return [self.taxonomy.skill_names[i] for i, score in zip(top, scores) if score > 0]
+
+    def recommend(self, emp, version=None, limit=15):
+        """Skills the employee doesn't hold, ranked by similarity to their profile"""
+        held, related = self.taxonomy.employee_bits(emp, version)
+        size = len(self.taxonomy)
+        in_domain = bits_to_mask(related, size)
+        top, scores = self.top_k(
+            self.profile_vector(emp, version), limit,
+            exclude=bits_to_mask(held, size),
+            boost=in_domain.astype(np.float32) * 0.25
+        )
+        return [{
+            'function': self.taxonomy.function_names[self.taxonomy.skill_functions[i]],
+            'skill': self.taxonomy.skill_names[i],
+            'relevance': 'high' if in_domain[i] else 'medium',
+            'score': round(float(score), 3)
+        } for i, score in zip(top, scores)]
@@ -0,0 +1,200 @@
+"""Prebuilt binary snapshot of profiles, taxonomy and derived indexes.
+
+Parsing Employee_Profiles.json and skills_taxonomy.json and rebuilding the
+employee indexes, taxonomy index, skill vectors, mentor index, skill-gap
+analytics and staffing bitsets costs seconds per worker at scale.
+compile_sources() does all of that once. write_snapshot() then stores the
+result in a single file:
+
+    MAGIC | header length | JSON header | pickle | 64-byte aligned arrays
+
+The pickle uses protocol 5 with NumPy arrays stored out-of-band, so on load
+the arrays are views straight into a copy-on-write mmap of the file. Pages
+stay shared between forked workers and the page cache until a worker
+actually writes to one. The header records a content hash of the source
+files plus the format and index settings; when the sources' size and mtime
+are unchanged since the build, the hash isn't even recomputed. A missing,
+corrupt or stale snapshot is rebuilt from the JSON.
+
+Build it ahead of deploys with:  python snapshot.py
+"""
+import datetime
+import gc
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+
+from employee_store import EmployeeStore
+from mentor_index import MentorIndex
+from profiles import pack_documents
+from skill_analytics import SkillGapAnalytics
+from staffing import StaffingIndex
+from taxonomy_store import load_taxonomy
+
+MAGIC = b'PSASNAP1'
+# Bump whenever the pickled classes change shape
+FORMAT_VERSION = 5
+ALIGN = 64
+
+
+def settings_key(**settings):
+    """Everything besides the source contents that the build depends on"""
+    digest = hashlib.sha256(f"format={FORMAT_VERSION}".encode())
+    # Years of experience are computed at build time
+    digest.update(datetime.date.today().isoformat().encode())
+    for name, value in sorted(settings.items()):
+        digest.update(f"{name}={value}".encode())
+    return digest.hexdigest()
+
+
+def content_hash(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def source_stats(paths):
+    return [[st.st_size, st.st_mtime_ns] for st in map(os.stat, paths)]
+
+
+def compile_sources(employees_path, taxonomy_path, mentor_dim=512, mentor_exact_limit=20000):
+    """Parse the JSON sources and build every derived index"""
+    employee_state = EmployeeStore(employees_path).state()
+    employees = employee_state.employees
+    # Documents become one out-of-band array instead of a bytes object each
+    pack_documents(employees)
+    mentor_index = MentorIndex(dim=mentor_dim, exact_limit=mentor_exact_limit)
+    mentor_index.sync(employees, employee_state.version)
+    taxonomy = load_taxonomy(taxonomy_path)
+    skill_gaps = SkillGapAnalytics()
+    skill_gaps.sync(employees, taxonomy, employee_state.version)
+    staffing = StaffingIndex()
+    staffing.sync(skill_gaps, employees)
+    return {
+        'employees': employee_state,
+        'taxonomy': taxonomy,
+        'mentor_index': mentor_index,
+        'skill_gaps': skill_gaps,
+        'staffing': staffing
+    }
+
+
+def _pad(offset):
+    return -offset % ALIGN
+
+
+def write_snapshot(path, key, source_paths, state):
+    """Serialize state atomically (temp file + rename)"""
+    buffers = []
+    payload = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+    raw = [buffer.raw() for buffer in buffers]
+
+    header = {
+        'key': key,
+        'content': content_hash(source_paths),
+        'stats': source_stats(source_paths),
+        'created': time.time(),
+        'pickle_length': len(payload),
+        'buffers': []
+    }
+    # Offsets are relative to the end of the header so they don't depend on its length
+    offset = len(payload)
+    for view in raw:
+        offset += _pad(offset)
+        header['buffers'].append([offset, view.nbytes])
+        offset += view.nbytes
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        base = f.tell()
+        # Align the data section itself so array offsets stay aligned in memory
+        f.write(b'\0' * _pad(base))
+        base += _pad(base)
+        f.write(payload)
+        for (start, _), view in zip(header['buffers'], raw):
+            f.write(b'\0' * (base + start - f.tell()))
+            f.write(view)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path, key, source_paths):
+    """Load a snapshot built with key from the current sources, or return None"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length))
+            if header.get('key') != key:
+                return None
+            if (header.get('stats') != source_stats(source_paths) and
+                    header.get('content') != content_hash(source_paths)):
+                return None
+            base = len(MAGIC) + 8 + header_length
+            base += _pad(base)
+            # ACCESS_COPY: shared pages until written, writes never reach the file
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    view = memoryview(mapped)
+    payload = view[base:base + header['pickle_length']]
+    buffers = [view[base + start:base + start + length] for start, length in header['buffers']]
+    # Unpickling creates many small objects but no garbage, so the cyclic
+    # collector would only waste time rescanning them
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(payload, buffers=buffers)
+    except Exception as e:
+        print(f"Snapshot {path} unreadable, rebuilding: {e}")
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def load_or_build(path, employees_path, taxonomy_path, mentor_dim=512, mentor_exact_limit=20000):
+    """Profiles and indexes from the snapshot, rebuilding it first if stale"""
+    started = time.perf_counter()
+    sources = [employees_path, taxonomy_path]
+    key = settings_key(mentor_dim=mentor_dim, mentor_exact_limit=mentor_exact_limit)
+    state = read_snapshot(path, key, sources)
+    if state is not None:
+        print(f"✓ Loaded snapshot {os.path.basename(path)} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return state
+
+    state = compile_sources(employees_path, taxonomy_path, mentor_dim, mentor_exact_limit)
+    try:
+        write_snapshot(path, key, sources, state)
+    except OSError as e:
+        # Read-only deploys still work, just without the fast path
+        print(f"Snapshot not written: {e}")
+    print(f"✓ Built snapshot {os.path.basename(path)} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return state
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.getenv('DATA_DIR', os.path.join(base_dir, '..', 'data'))
+    snapshot_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv(
+        'SNAPSHOT_PATH', os.path.join(base_dir, 'snapshot.bin'))
+    load_or_build(
+        snapshot_path,
+        os.path.join(data_dir, 'Employee_Profiles.json'),
+        os.path.join(data_dir, 'skills_taxonomy.json'),
+        mentor_dim=int(os.getenv('MENTOR_INDEX_DIM', 512)),
+        mentor_exact_limit=int(os.getenv('MENTOR_EXACT_LIMIT', 20000))
+    )
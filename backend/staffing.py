@@ -0,0 +1,267 @@
+"""Project staffing: small teams that cover an opportunity's weighted skills.
+
+Picking at most k people whose combined skills cover the most required
+weight is weighted maximum coverage (set cover with a budget). The greedy
+rule, take whoever adds the most still-uncovered weight, is within 1 - 1/e
+of optimal (1/2 under a per-unit cap); a swap pass then replaces any member
+whom someone outside the team beats given the rest of the team, and drops
+members who add nothing. A skill can ask for several people (count); each
+holder up to count earns weight / count.
+
+The pool is the "holds skill" matrix of the skill-gap analytics, stored
+per taxonomy skill as a packed bitset over employees, so the candidates
+for a request are the OR of a handful of 12.5 KB bitsets at 100k
+employees. Candidates with the same required skills (and, under a per-unit
+cap, the same unit) are interchangeable for coverage, so the search runs
+over those few distinct signatures rather than over every employee, and
+each signature hands out its most experienced members first. Greedy plus
+swaps is restarted from each of the strongest few first picks, which
+matters most under a tight per-unit cap where single swaps get stuck.
+"""
+import threading
+
+import numpy as np
+
+from skill_analytics import GROUP_FIELDS
+from taxonomy_index import normalize
+
+# Passes of the swap search over the team
+SWAP_ROUNDS = 5
+# Greedy runs, each starting from a different one of the best first picks
+RESTARTS = 8
+
+_EPSILON = 1e-9
+
+
+class _Pool:
+    """One immutable generation of the packed employee x skill bitsets"""
+
+    __slots__ = ('version', 'ids', 'rows', 'skill_bits', 'gap_bits', 'years', 'codes', 'group_ids')
+
+    def __init__(self, version, ids, held, gaps, codes, group_ids, years):
+        self.version = version
+        self.ids = ids
+        self.rows = {emp_id: row for row, emp_id in enumerate(ids)}
+        # skill -> bitset of the employees holding it; employee -> bitset of their gaps
+        self.skill_bits = np.packbits(held.T, axis=1, bitorder='little')
+        self.gap_bits = np.packbits(gaps, axis=1, bitorder='little')
+        self.years = years
+        self.codes = codes
+        self.group_ids = group_ids
+
+
+class StaffingIndex:
+    """Weighted team search over every employee's taxonomy skills"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = _Pool(None, [], np.zeros((0, 0), np.uint8), np.zeros((0, 0), np.uint8),
+                           {field: np.zeros(0, np.int32) for field in GROUP_FIELDS},
+                           {field: {} for field in GROUP_FIELDS}, np.zeros(0, np.float32))
+        self._aliases = (None, {})
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._pool.version
+
+    def sync(self, analytics, employees):
+        """Rebuild the bitsets when the analytics' version moved on"""
+        if analytics.version == self._pool.version:
+            return
+        with self._lock:
+            if analytics.version == self._pool.version:
+                return
+            version, ids, held, gaps, codes, group_ids = analytics.matrices()
+            by_id = {emp.employee_id: emp for emp in employees}
+            years = np.array([by_id[emp_id].years_experience if emp_id in by_id else 0.0
+                              for emp_id in ids], dtype=np.float32)
+            # One reference assignment, so a running search keeps its generation
+            self._pool = _Pool(version, ids, held, gaps, codes, group_ids, years)
+
+    def resolve(self, index, name):
+        """Taxonomy skill ids a skill name matches: its own, else every
+        "Group: Specialisation" entry it is a half of (several when the name
+        is ambiguous); empty if it isn't in the taxonomy"""
+        skill_id = index.skill_id(name)
+        if skill_id is not None:
+            return [skill_id]
+        version, aliases = self._aliases
+        if version != index.version:
+            aliases = {}
+            for skill_id, full in enumerate(index.skill_names):
+                for half in {normalize(half) for half in full.split(':')} if ':' in full else ():
+                    if half:
+                        aliases.setdefault(half, []).append(skill_id)
+            self._aliases = (index.version, aliases)
+        return list(aliases.get(normalize(name), ()))
+
+    def group_code(self, field, name):
+        """Group code of a department, unit or office name, or None if unknown"""
+        return self._pool.group_ids[field].get(normalize(name))
+
+    def plan(self, requirements, team_size, teams=1, office=None, department=None,
+             max_per_unit=None, exclude=()):
+        """Up to teams disjoint teams of at most team_size people
+
+        requirements is a list of (skill id, weight, count). office and
+        department are group codes from group_code(); max_per_unit caps the
+        members any one unit gives a team. Each team is a dict of members
+        (employee id, years of experience, indexes of the requirements they
+        hold and the uncovered ones that sit in their related function
+        areas, i.e. could be learnt) and the staffed count per requirement.
+        """
+        pool = self._pool
+        skills = np.array([skill for skill, _, _ in requirements], dtype=np.int64)
+        weights = np.array([weight for _, weight, _ in requirements], dtype=np.float64)
+        counts = np.array([count for _, _, count in requirements], dtype=np.int64)
+        value = (weights / counts).astype(np.float32)
+
+        # Anyone holding at least one required skill, within the filters
+        size = len(pool.ids)
+        bits = np.unpackbits(pool.skill_bits[skills], axis=1, count=size, bitorder='little')
+        rows = np.flatnonzero(bits.any(axis=0)) if size else np.zeros(0, np.int64)
+        for field, code in (('office_location', office), ('department', department)):
+            if code is not None:
+                rows = rows[pool.codes[field][rows] == code]
+        excluded = [pool.rows[emp_id] for emp_id in exclude if emp_id in pool.rows]
+        if excluded:
+            rows = rows[~np.isin(rows, excluded)]
+        held = bits[:, rows].T
+
+        # Interchangeable candidates: same required skills (and unit, when
+        # capped). Signatures are the held bits packed into 64-bit words
+        units = pool.codes['unit'][rows]
+        width = -(-len(skills) // 64) * 64 or 64
+        words = np.packbits(np.pad(held, ((0, 0), (0, width - held.shape[1]))), axis=1,
+                            bitorder='little').view(np.uint64)
+        keys = [words[:, i] for i in range(words.shape[1])] + ([units] if max_per_unit else [])
+        # Members of each signature, most experienced first
+        order = np.lexsort([rows, -pool.years[rows]] + keys[::-1])
+        members = rows[order]
+        changed = np.zeros(max(len(rows) - 1, 0), dtype=bool)
+        for key in keys:
+            changed |= key[order][1:] != key[order][:-1]
+        starts = np.flatnonzero(np.r_[True, changed]) if len(rows) else np.zeros(0, np.int64)
+        ends = np.r_[starts[1:], len(members)].astype(np.int64)
+        # Ties go to the signature with the most experienced member
+        rank = np.argsort(-pool.years[members[starts]], kind='stable')
+        starts, ends = starts[rank], ends[rank]
+        matrix = held[order][starts].astype(np.float32)
+        group_units = units[order][starts]
+
+        taken = np.zeros(len(starts), dtype=np.int64)
+        results = []
+        for _ in range(teams):
+            team = _best_team(matrix, group_units, ends - starts - taken, value, counts,
+                              team_size, max_per_unit)
+            if results and not team:
+                break
+            staffed = np.minimum(matrix[team].sum(axis=0), counts).astype(np.int64) if team else \
+                np.zeros(len(skills), np.int64)
+            missing = set(np.flatnonzero(staffed < counts).tolist())
+            team_members = []
+            for g in team:
+                row = int(members[starts[g] + taken[g]])
+                taken[g] += 1
+                gaps = np.unpackbits(pool.gap_bits[row], count=len(pool.skill_bits),
+                                     bitorder='little')[skills]
+                team_members.append({
+                    'employee_id': pool.ids[row],
+                    'years_experience': round(float(pool.years[row]), 1),
+                    'holds': np.flatnonzero(matrix[g]).tolist(),
+                    'gaps': [i for i in np.flatnonzero(gaps).tolist() if i in missing]
+                })
+            results.append({
+                'members': team_members,
+                'staffed': staffed.tolist()
+            })
+        return {'candidates': int(len(rows)), 'teams': results}
+
+
+def _best_team(matrix, group_units, available, value, counts, team_size, max_per_unit):
+    """Signature indexes of the best team over the restarts"""
+    if not len(available):
+        return []
+    firsts = np.argsort(-np.where(available > 0, matrix @ value, -1.0), kind='stable')[:RESTARTS]
+    best, best_score = [], 0.0
+    for first in firsts:
+        if available[first] <= 0:
+            break
+        team = _search(matrix, group_units, available.copy(), value, counts, team_size,
+                       max_per_unit, int(first))
+        coverage = matrix[team].sum(axis=0) if team else np.zeros(len(counts))
+        score = float(value @ np.minimum(coverage, counts))
+        if score > best_score + _EPSILON:
+            best, best_score = team, score
+    return best
+
+
+def _search(matrix, group_units, available, value, counts, team_size, max_per_unit, first):
+    """One team starting from signature first: greedy coverage, then swaps"""
+    unit_count = {}
+
+    def usable():
+        ok = available > 0
+        if max_per_unit:
+            full = [unit for unit, n in unit_count.items() if n >= max_per_unit]
+            if full:
+                ok &= ~np.isin(group_units, full)
+        return ok
+
+    def gains(coverage):
+        return matrix @ (value * (coverage < counts))
+
+    def take(g):
+        available[g] -= 1
+        unit = group_units[g]
+        unit_count[unit] = unit_count.get(unit, 0) + 1
+
+    def give_back(g):
+        available[g] += 1
+        unit_count[group_units[g]] -= 1
+
+    take(first)
+    team = [first]
+    coverage = matrix[first].copy()
+    while len(team) < team_size:
+        scores = np.where(usable(), gains(coverage), -1.0)
+        best = int(np.argmax(scores))
+        if scores[best] <= _EPSILON:
+            break
+        take(best)
+        team.append(best)
+        coverage += matrix[best]
+
+    for _ in range(SWAP_ROUNDS):
+        improved = False
+        for position in range(len(team) - 1, -1, -1):
+            g = team[position]
+            rest = coverage - matrix[g]
+            own = float(matrix[g] @ (value * (rest < counts)))
+            give_back(g)
+            scores = np.where(usable(), gains(rest), -1.0)
+            best = int(np.argmax(scores))
+            if own <= _EPSILON and scores[best] <= own + _EPSILON:
+                # Adds nothing the rest of the team doesn't already cover
+                del team[position]
+                coverage = rest
+                improved = True
+            elif scores[best] > own + _EPSILON:
+                take(best)
+                team[position] = best
+                coverage = rest + matrix[best]
+                improved = True
+            else:
+                take(g)
+        if not improved:
+            break
+    return team
@@ -0,0 +1,126 @@
+"""Structured, non-blocking logging.
+
+Request threads only put the log record on an in-memory queue
+(QueueHandler); a single listener thread formats it as one JSON object
+per line and writes it to stderr. A slow terminal or log shipper then
+never stalls a request the way a print() to a full pipe can. Without a
+running listener (a pre-fork master) records are written directly.
+
+    log = get_logger('app')
+    log.info('analysis_completed', employee_id='E1', duration_ms=812)
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+_queue = None
+_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+            **getattr(record, 'fields', {})
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock handler folds the traceback into the message; keep them
+        # apart, formatting the traceback now while its frames are current
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if _listener is None:
+            # No writer thread (e.g. a gunicorn master once it has forked
+            # workers): write synchronously rather than queue for nobody
+            _handler.handle(self.prepare(record))
+        else:
+            super().emit(record)
+
+
+def setup_logging(level=None, stream=None):
+    """Route the root logger through a queue to a JSON-lines stream (idempotent)"""
+    global _queue, _handler
+    if _queue is not None:
+        return
+    _handler = logging.StreamHandler(stream or sys.stderr)
+    _handler.setFormatter(JsonFormatter())
+    _queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(_QueueHandler(_queue))
+    root.setLevel(level or os.getenv('LOG_LEVEL', 'INFO').upper())
+    start_listener()
+    # Flush what's queued when the process exits
+    atexit.register(stop_listener)
+
+
+def start_listener():
+    """Start the writer thread. A forked process (e.g. a gunicorn worker)
+    needs its own, since only the thread that forked survives the fork"""
+    global _listener
+    if _queue is None or _listener is not None:
+        return
+    _listener = logging.handlers.QueueListener(_queue, _handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_listener():
+    """Write out what's queued and stop the writer thread; under gevent a
+    pre-fork master must do this before forking, or its writer greenlet
+    would be copied into the workers. Records logged afterwards are
+    written synchronously"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+class EventLogger:
+    """logging.Logger wrapper taking an event name plus keyword fields"""
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(name)
+
+    def _log(self, level, event, fields, exc_info=False):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, extra={'fields': fields}, exc_info=exc_info)
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event, **fields):
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name):
+    return EventLogger(name)
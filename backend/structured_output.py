@@ -0,0 +1,312 @@
+"""Schema-constrained JSON answers from the model, with local repair.
+
+Every AI route has a JSON Schema for its answer. Requests carry it as a
+response_format (strict json_schema, or plain JSON mode on deployments
+that don't take schemas) and every completion is checked against it.
+Completions that still aren't clean JSON (markdown fences, trailing
+commas, an array left open, an answer cut off at max_completion_tokens)
+are repaired here without another call: a truncated answer is cut back to
+its last complete element, at whatever depth, and whatever was left open
+is closed.
+The sections still missing or invalid after that are named, so the caller
+can ask the model for just those instead of regenerating the whole answer.
+"""
+import json
+import threading
+
+from structured_log import get_logger
+
+log = get_logger('structured_output')
+
+
+def _string():
+    return {'type': 'string'}
+
+
+def _strings():
+    return {'type': 'array', 'items': _string()}
+
+
+def _object(**properties):
+    # Strict mode wants every property required and nothing else allowed
+    return {'type': 'object', 'properties': properties, 'required': list(properties),
+            'additionalProperties': False}
+
+
+def _array(items):
+    return {'type': 'array', 'items': items}
+
+
+_WEEK = _object(week={'type': 'integer'}, focus=_string(), activities=_strings(),
+                deliverable=_string())
+
+SCHEMAS = {
+    'analyze': _object(
+        readiness_score={'type': 'integer'},
+        summary=_string(),
+        skill_gaps=_array(_object(skill=_string(), priority=_string(), why=_string())),
+        learning_path=_array(_object(step={'type': 'integer'}, skill=_string(), action=_string(),
+                                     timeline=_string(), resources=_strings())),
+        internal_opportunities=_strings(),
+        mentorship_match=_string(),
+        next_30_days=_strings()
+    ),
+    'learning-detail': _object(
+        weekly_plan=_array(_WEEK),
+        success_metrics=_strings(),
+        getting_started=_strings()
+    ),
+    'analyze-opportunity': _object(
+        opportunity_title=_string(),
+        readiness_assessment=_string(),
+        time_to_ready=_string(),
+        learning_steps=_array(_object(skill=_string(), week_by_week=_array(_WEEK),
+                                      resources=_strings(), timeline=_string())),
+        quick_wins=_strings(),
+        success_metrics=_strings(),
+        next_step=_string()
+    ),
+    'resume-refine': _object(
+        confirmed=_strings(),
+        additional=_strings()
+    ),
+}
+
+# response_format modes, strictest first
+FORMAT_MODES = ('json_schema', 'json_object', 'none')
+
+_STRING_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+
+
+def section_schema(route, keys=None):
+    """The route's schema, or with keys only those top-level sections"""
+    schema = SCHEMAS[route]
+    if keys is None:
+        return schema
+    return _object(**{key: schema['properties'][key] for key in keys})
+
+
+def _strip_fences(text):
+    if '```json' in text:
+        return text.split('```json')[1].split('```')[0].strip()
+    if '```' in text:
+        return text.split('```')[1].split('```')[0].strip()
+    return text
+
+
+def _drop_trailing_comma(out):
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ',':
+        del out[i]
+
+
+def repair_json(text, schema=None):
+    """Best-effort JSON object from model output
+
+    Text around the object is ignored, raw newlines inside strings are
+    escaped, trailing commas dropped and containers the model forgot to
+    close are closed at the next closer. If the object never closes (the
+    completion was cut off), it is cut after its last complete element and
+    the containers still open are closed there, so a half-written list
+    keeps the items before the cut. With schema, a top-level section left
+    open that doesn't conform to it is dropped instead, i.e. the cut falls
+    back to the last complete top-level member. Raises ValueError when no
+    object can be recovered.
+    """
+    start = text.find('{')
+    if start < 0:
+        raise ValueError('No JSON object in completion')
+    out = []
+    closers = []        # closing characters of the open containers
+    in_string = escape = False
+    boundary = None     # len(out) after the last complete top-level member
+    cut = None          # (len(out), open closers) after the last complete element
+    complete = False
+    for ch in text[start:]:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch in _STRING_ESCAPES:
+                ch = _STRING_ESCAPES[ch]
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            closers.append('}' if ch == '{' else ']')
+            out.append(ch)
+            if len(closers) == 1:
+                # Only the root counts as complete while still empty; a
+                # section cut right after its opener is dropped, not emptied
+                cut = (len(out), list(closers))
+            continue
+        elif ch in '}]':
+            if ch not in closers:
+                continue
+            _drop_trailing_comma(out)
+            while closers[-1] != ch:
+                out.append(closers.pop())
+            closers.pop()
+            out.append(ch)
+            if not closers:
+                complete = True
+                break
+            cut = (len(out), list(closers))
+            continue
+        elif ch == ',' and closers:
+            if len(closers) == 1:
+                boundary = len(out)
+            cut = (len(out), list(closers))
+        out.append(ch)
+
+    if complete:
+        value = json.loads(''.join(out))
+    else:
+        value = json.loads(_close(out, cut))
+        open_section = cut is not None and len(cut[1]) > 1 and isinstance(value, dict) and value
+        if open_section and schema is not None:
+            key = next(reversed(value))
+            node = schema['properties'].get(key)
+            try:
+                if node is not None:
+                    _conform(node, value[key])
+            except _Invalid:
+                value = json.loads(_close(out, (boundary, ['}']) if boundary is not None else None))
+    if not isinstance(value, dict):
+        raise ValueError('Completion is not a JSON object')
+    return value
+
+
+def _close(out, cut):
+    """Text of out up to cut, with the containers open there closed"""
+    if cut is None:
+        return '{}'
+    length, closers = cut
+    return ''.join(out[:length]) + ''.join(reversed(closers))
+
+
+def parse_json(text, route=None):
+    """(object, repaired) from a completion; repaired is True if the text
+    needed more than fence stripping. With route, a truncated section is
+    only kept if it conforms to the route's schema. Raises ValueError if
+    nothing usable"""
+    try:
+        value = json.loads(_strip_fences(text))
+        if isinstance(value, dict):
+            return value, False
+    except ValueError:
+        pass
+    return repair_json(text, SCHEMAS[route] if route else None), True
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _conform(schema, value):
+    """value checked against a schema node, leniently: unknown properties
+    and invalid array items are dropped, whole-number floats and numeric
+    strings accepted as integers and scalars as strings"""
+    kind = schema['type']
+    if kind == 'object':
+        if not isinstance(value, dict):
+            raise _Invalid()
+        conformed = {}
+        for key, node in schema['properties'].items():
+            if key not in value:
+                raise _Invalid()
+            conformed[key] = _conform(node, value[key])
+        return conformed
+    if kind == 'array':
+        if not isinstance(value, list):
+            raise _Invalid()
+        items = []
+        for item in value:
+            try:
+                items.append(_conform(schema['items'], item))
+            except _Invalid:
+                pass
+        if value and not items:
+            raise _Invalid()
+        return items
+    if kind == 'integer':
+        if isinstance(value, bool):
+            raise _Invalid()
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and value.strip().isdigit():
+            return int(value)
+        if not isinstance(value, int):
+            raise _Invalid()
+        return value
+    if isinstance(value, (dict, list)) or value is None:
+        raise _Invalid()
+    return value if isinstance(value, str) else str(value)
+
+
+def validate_sections(route, value, keys=None):
+    """(valid sections, names of missing or invalid ones) of an answer for
+    route, looking at keys only when given"""
+    schema = SCHEMAS[route]['properties']
+    sections, missing = {}, []
+    for key in keys or schema:
+        try:
+            if key not in value:
+                raise _Invalid()
+            sections[key] = _conform(schema[key], value[key])
+        except _Invalid:
+            missing.append(key)
+    return sections, missing
+
+
+def sections_prompt(prompt, sections, missing):
+    """Follow-up prompt asking only for the missing sections of an answer"""
+    return f"""{prompt}
+
+Part of this answer has already been written:
+{json.dumps(sections, ensure_ascii=False)}
+
+Return ONLY a JSON object with the remaining fields, consistent with the part above: {', '.join(missing)}"""
+
+
+class OutputFormats:
+    """The strictest response_format the deployment accepts
+
+    Starts at the configured mode and steps down (json_schema, then
+    json_object, then none) the first time the deployment rejects one with
+    a 400 naming response_format.
+    """
+
+    def __init__(self, mode='json_schema'):
+        if mode not in FORMAT_MODES:
+            raise ValueError(f"response format must be one of: {', '.join(FORMAT_MODES)}")
+        self.mode = mode
+        self._lock = threading.Lock()
+
+    def apply(self, body, route, keys=None):
+        """(body with the current response_format for route, mode used)"""
+        mode = self.mode
+        if mode == 'json_schema':
+            schema = section_schema(route, keys)
+            body = {**body, 'response_format': {
+                'type': 'json_schema',
+                'json_schema': {'name': route.replace('-', '_'), 'strict': True, 'schema': schema}
+            }}
+        elif mode == 'json_object':
+            body = {**body, 'response_format': {'type': 'json_object'}}
+        return body, mode
+
+    def downgrade(self, error, mode):
+        """Step down from mode after error; True if the call should be sent
+        again with the (now simpler) format"""
+        if mode == 'none' or error.status_code != 400 or 'response_format' not in str(error.details):
+            return False
+        with self._lock:
+            if self.mode == mode:
+                self.mode = FORMAT_MODES[FORMAT_MODES.index(mode) + 1]
+                log.warning('response_format_unsupported', rejected=mode, now=self.mode)
+        return True
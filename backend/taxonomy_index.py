@@ -0,0 +1,167 @@
+"""Precompiled skills-taxonomy index.
+
+The flat taxonomy rows are compiled once into interned skill ids, a
+function -> skills bitmask table and a token -> function inverted index.
+Employee skill lists are turned into integer bitsets over the same ids, so
+coverage and recommendations are plain bitwise operations per request.
+"""
+import hashlib
+import json
+import re
+import sys
+import threading
+
+FUNC_KEY = 'Function / Unit / Skill'
+SPEC_KEY = 'Specialisation / Unit'
+
+# Words that would otherwise link unrelated function areas together
+STOPWORDS = {'and', 'the', 'for', 'with'}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(name):
+    """Canonical form used to intern skill and function names"""
+    return ' '.join(str(name).lower().split())
+
+
+def skill_aliases(skill_name, specialization=None):
+    """Normalized names a profile skill answers to: its skill_name, its full
+    "Group: Specialisation" label and either half of that label"""
+    specialization = specialization or ''
+    names = (skill_name, specialization, *specialization.split(':'))
+    return {normalize(name) for name in names if name and name.strip()}
+
+
+def tokenize(name):
+    return {t for t in _TOKEN_RE.findall(name.lower()) if len(t) > 2 and t not in STOPWORDS}
+
+
+def iter_bits(mask):
+    """Yield the indexes of set bits in ascending order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class TaxonomyIndex:
+    """Interned, bitset-backed view of skills_taxonomy.json"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.version = self.content_version(rows)
+        self.skill_names = []       # skill id -> specialisation name
+        self.skill_functions = []   # skill id -> function id
+        self.function_names = []    # function id -> function name
+        self.skill_ids = {}         # normalized specialisation -> skill id
+        self.function_ids = {}      # normalized function -> function id
+        self.function_masks = []    # function id -> bitmask of its skills
+        self.token_functions = {}   # token -> bitmask of function ids
+
+        for row in rows:
+            func = sys.intern(str(row[FUNC_KEY]))
+            spec = sys.intern(str(row[SPEC_KEY]))
+
+            func_id = self.function_ids.get(normalize(func))
+            if func_id is None:
+                func_id = len(self.function_names)
+                self.function_ids[normalize(func)] = func_id
+                self.function_names.append(func)
+                self.function_masks.append(0)
+                for token in tokenize(func):
+                    self.token_functions[token] = self.token_functions.get(token, 0) | (1 << func_id)
+
+            key = normalize(spec)
+            if key in self.skill_ids:
+                continue
+            skill_id = len(self.skill_names)
+            self.skill_ids[key] = skill_id
+            self.skill_names.append(spec)
+            self.skill_functions.append(func_id)
+            self.function_masks[func_id] |= 1 << skill_id
+
+        self._employee_cache = {}
+        self._employee_version = None
+        self._lock = threading.Lock()
+        self.cache_counters = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def content_version(rows):
+        """Content hash, used to invalidate anything derived from the taxonomy"""
+        return hashlib.sha256(
+            json.dumps(rows, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:16]
+
+    def __getstate__(self):
+        # Locks can't be pickled and the per-employee cache is rebuilt lazily
+        state = self.__dict__.copy()
+        del state['_lock'], state['_employee_cache'], state['cache_counters']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._employee_cache = {}
+        self._employee_version = None
+        self._lock = threading.Lock()
+        self.cache_counters = {'hits': 0, 'misses': 0}
+
+    def __len__(self):
+        return len(self.skill_names)
+
+    def skill_id(self, name):
+        return self.skill_ids.get(normalize(name))
+
+    def related_functions(self, function_area):
+        """Bitmask of taxonomy functions sharing a token with function_area"""
+        mask = 0
+        for token in tokenize(function_area):
+            mask |= self.token_functions.get(token, 0)
+        return mask
+
+    def skills_mask(self, function_mask):
+        mask = 0
+        for func_id in iter_bits(function_mask):
+            mask |= self.function_masks[func_id]
+        return mask
+
+    def _compile_employee(self, emp):
+        held = 0
+        related = 0
+        for skill in emp.skills:
+            for name in skill.aliases:
+                skill_id = self.skill_ids.get(name)
+                if skill_id is not None:
+                    held |= 1 << skill_id
+            related |= self.related_functions(skill.function_area or '')
+        return held, self.skills_mask(related)
+
+    def employee_bits(self, emp, version=None):
+        """(held skills mask, candidate skills mask) for one employee
+
+        Results are cached per employee and dropped whenever the employee
+        data version changes.
+        """
+        with self._lock:
+            if version != self._employee_version:
+                self._employee_cache = {}
+                self._employee_version = version
+            bits = self._employee_cache.get(emp.employee_id)
+            if bits is None:
+                self.cache_counters['misses'] += 1
+                bits = self._compile_employee(emp)
+                self._employee_cache[emp.employee_id] = bits
+            else:
+                self.cache_counters['hits'] += 1
+        return bits
+
+    def coverage(self, emp, version=None):
+        """Share of the taxonomy the employee holds, as a percentage"""
+        held, _ = self.employee_bits(emp, version)
+        if not self.skill_names:
+            return 0.0
+        return round(popcount(held) / len(self.skill_names) * 100, 1)
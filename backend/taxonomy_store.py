@@ -0,0 +1,168 @@
+"""Compiled skills taxonomy with hot reload.
+
+parse_skills.py compiles the Functions & Skills workbook into
+skills_taxonomy.json: normalized, deduplicated flat rows plus a
+function -> specialisation tree with stable ids and a content version.
+A Taxonomy bundles everything derived from one such artifact (rows, tree,
+TaxonomyIndex, SkillMatcher) so a request always sees one consistent
+generation. TaxonomyStore watches the artifact and swaps a new bundle in
+with a single reference assignment, the same way EmployeeStore does.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from skill_matcher import SkillMatcher
+from structured_log import get_logger
+from taxonomy_index import FUNC_KEY, SPEC_KEY, TaxonomyIndex, normalize
+
+log = get_logger('taxonomy_store')
+
+# Bump when the compiled artifact's layout changes
+ARTIFACT_FORMAT = 1
+
+
+def clean_name(value):
+    """Display form of a workbook cell: trimmed, inner whitespace collapsed"""
+    return ' '.join(str(value).split()) if value is not None else ''
+
+
+def stable_id(prefix, *names):
+    """Id derived from the normalized names, so it survives reordering and inserts"""
+    key = '|'.join(normalize(name) for name in names)
+    return f"{prefix}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}"
+
+
+def compile_taxonomy(rows, source=None):
+    """Flat {function, specialisation} rows -> compiled artifact dict.
+
+    Names are cleaned, empty rows dropped and case/whitespace duplicates
+    removed (first spelling wins).
+    """
+    functions = {}
+    flat = []
+    duplicates = 0
+    for row in rows:
+        func = clean_name(row.get(FUNC_KEY))
+        spec = clean_name(row.get(SPEC_KEY))
+        if not func or not spec:
+            continue
+        node = functions.get(normalize(func))
+        if node is None:
+            node = functions[normalize(func)] = {
+                'id': stable_id('F', func), 'name': func, 'specialisations': [], '_seen': set()
+            }
+        if normalize(spec) in node['_seen']:
+            duplicates += 1
+            continue
+        node['_seen'].add(normalize(spec))
+        node['specialisations'].append({'id': stable_id('S', func, spec), 'name': spec})
+        flat.append({FUNC_KEY: func, SPEC_KEY: spec})
+
+    tree = []
+    for node in functions.values():
+        del node['_seen']
+        tree.append(node)
+    return {
+        'format': ARTIFACT_FORMAT,
+        # Same content hash TaxonomyIndex computes, so cache keys line up
+        'version': TaxonomyIndex.content_version(flat),
+        'source': source,
+        'compiled_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'duplicates_dropped': duplicates,
+        'functions': tree,
+        'rows': flat
+    }
+
+
+def read_artifact(path):
+    """Compiled artifact from path; a legacy flat row list is compiled on the fly"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return compile_taxonomy(data, source=os.path.basename(path))
+    if data.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported taxonomy artifact format {data.get('format')!r}")
+    return data
+
+
+class Taxonomy:
+    """One immutable generation of the taxonomy and its derived indexes"""
+
+    __slots__ = ('version', 'rows', 'functions', 'index', 'matcher', 'mtime')
+
+    def __init__(self, artifact, mtime=None):
+        self.rows = artifact['rows']
+        self.functions = artifact['functions']
+        self.index = TaxonomyIndex(self.rows)
+        self.version = self.index.version
+        self.matcher = SkillMatcher(self.index)
+        self.mtime = mtime
+
+    def tree(self):
+        return {'version': self.version, 'functions': self.functions}
+
+
+def load_taxonomy(path):
+    mtime = os.stat(path).st_mtime_ns
+    return Taxonomy(read_artifact(path), mtime)
+
+
+class TaxonomyStore:
+    """Current Taxonomy, reloaded when the compiled artifact changes"""
+
+    def __init__(self, path, check_interval=2.0, taxonomy=None):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.last_error = None  # why the last reload attempt failed, if it did
+        if taxonomy is None:
+            taxonomy = load_taxonomy(path)
+        else:
+            # Prebuilt from the current file contents (see snapshot.py)
+            taxonomy.mtime = os.stat(path).st_mtime_ns
+        self._taxonomy = taxonomy
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.maybe_reload()
+        return self._taxonomy
+
+    def maybe_reload(self, force=False):
+        """Rebuild and swap in the taxonomy if the artifact changed (or force)
+
+        Returns True if a new taxonomy was swapped in. A failed attempt
+        leaves its reason in last_error; one skipped because another thread
+        is already reloading leaves last_error as None.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        if mtime == self._taxonomy.mtime and not force:
+            return False
+
+        if not self._lock.acquire(blocking=False):
+            self.last_error = None
+            return False
+        try:
+            try:
+                taxonomy = load_taxonomy(self.path)
+            except (OSError, ValueError, KeyError) as e:
+                log.warning('taxonomy_reload_skipped', error=str(e))
+                self.last_error = str(e)
+                return False
+            previous = self._taxonomy
+            self._taxonomy = taxonomy
+            self.last_error = None
+            if taxonomy.version != previous.version:
+                log.info('taxonomy_reloaded', version=taxonomy.version, specialisations=len(taxonomy.rows))
+            return True
+        finally:
+            self._lock.release()
@@ -0,0 +1,79 @@
+"""Forum posts are stored as written and only ever rendered escaped.
+
+    cd backend && python -m pytest tests
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_HTML = os.path.join(BACKEND_DIR, '..', 'frontend', 'index.html')
+PAYLOAD = '<img src=x onerror=alert(1)>'
+
+# Runtime state of the app under test goes to a scratch directory
+_scratch = tempfile.mkdtemp(prefix='forum-test-')
+for _name, _file in (('FORUM_DB_PATH', 'forum.sqlite3'), ('JOB_QUEUE_PATH', 'jobs.sqlite3'),
+                     ('LLM_CACHE_PATH', 'llm_cache.sqlite3'), ('SNAPSHOT_PATH', 'snapshot.bin')):
+    os.environ[_name] = os.path.join(_scratch, _file)
+sys.path.insert(0, BACKEND_DIR)
+
+import app  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def client():
+    yield app.app.test_client()
+    app.forum_store.stop(5)
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+
+def _frontend():
+    with open(INDEX_HTML, encoding='utf-8') as f:
+        return f.read()
+
+
+def _function(source, name):
+    """Source of a top-level function in the page script"""
+    start = source.index(f'function {name}(')
+    depth, i = 0, source.index('{', start)
+    while True:
+        depth += {'{': 1, '}': -1}.get(source[i], 0)
+        i += 1
+        if depth == 0:
+            return source[start:i]
+
+
+def test_html_in_a_post_is_stored_as_data(client):
+    response = client.post('/api/forum/posts', json={
+        'category': 'general', 'title': PAYLOAD, 'content': f'{PAYLOAD} body', 'author': PAYLOAD
+    })
+    assert response.status_code == 201
+    post_id = response.get_json()['id']
+
+    post = client.get(f'/api/forum/posts/{post_id}').get_json()
+    assert post['title'] == PAYLOAD
+    assert post['author'] == PAYLOAD
+    assert any(p['id'] == post_id for p in client.get('/api/forum/posts').get_json())
+
+
+def test_forum_views_escape_post_fields():
+    source = _frontend()
+    for name in ('displayForumPosts', 'viewForumPost'):
+        body = _function(source, name)
+        # ${post.content.length ...} only reads a number
+        raw = re.findall(r'\$\{\s*post\.(title|content|author|category|timestamp)\b(?!\.length)', body)
+        assert not raw, f'{name} interpolates post.{raw[0]} without escapeHtml'
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_escape_html_neutralises_markup():
+    script = _function(_frontend(), 'escapeHtml') + f'\nprocess.stdout.write(escapeHtml({json.dumps(PAYLOAD)}));'
+    escaped = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+    assert escaped == '&lt;img src=x onerror=alert(1)&gt;'
+    assert '<' not in escaped
@@ -0,0 +1,7 @@
+"""WSGI entry point for production serving (see gunicorn.conf.py):
+
+    cd backend && gunicorn wsgi:app
+"""
+from app import app
+
+__all__ = ['app']
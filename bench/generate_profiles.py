@@ -0,0 +1,197 @@
+"""Synthetic Employee_Profiles.json generator for load tests.
+
+Profiles follow the schema of data/Employee_Profiles.json (personal_info,
+employment_info, skills, competencies, experiences, positions_history).
+Skills are drawn from the real taxonomy and the sample profiles, so every
+index and matcher sees realistic vocabulary. Output is written one profile
+at a time and is deterministic for a given seed, so a 100k-employee file
+costs no more memory than a small one and runs are comparable.
+
+Usage:
+    python generate_profiles.py --count 100000 [--seed 7] [--output FILE]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+BENCH_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+
+FUNC_KEY = 'Function / Unit / Skill'
+SPEC_KEY = 'Specialisation / Unit'
+
+FIRST_NAMES = [
+    'Samantha', 'Nur', 'Rohan', 'Grace', 'Felicia', 'Wei Ming', 'Arjun', 'Siti', 'Daniel', 'Mei Ling',
+    'Hafiz', 'Priya', 'Jun Jie', 'Aisha', 'Marcus', 'Li Na', 'Kumar', 'Chloe', 'Farid', 'Hui Min',
+    'Benjamin', 'Nadia', 'Vikram', 'Jia Hui', 'Ethan', 'Zarina', 'Ravi', 'Xin Yi', 'Adrian', 'Lakshmi'
+]
+LAST_NAMES = [
+    'Lee', 'Tan', 'Lim', 'Ng', 'Wong', 'Goh', 'Chua', 'Ong', 'Koh', 'Teo', 'Rahman', 'Mehta', 'Pillai',
+    'Nair', 'Ismail', 'Hassan', 'Chen', 'Wang', 'Singh', 'Kaur', 'Yeo', 'Low', 'Sim', 'Ho', 'Chan'
+]
+OFFICES = ['PSA Singapore', 'PSA Antwerp', 'PSA Busan', 'PSA Genoa', 'PSA Panama', 'PSA Mumbai',
+           'PSA Sines', 'PSA Dammam']
+LANGUAGES = ['English', 'Mandarin', 'Malay', 'Tamil', 'Korean', 'Dutch', 'Italian', 'Spanish', 'Hindi']
+PROFICIENCIES = ['Native', 'Fluent', 'Intermediate', 'Basic']
+COMPETENCY_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+SENIORITY = ['', '', 'Senior ', 'Lead ', 'Principal ']
+ROLES = ['Engineer', 'Analyst', 'Specialist', 'Manager', 'Consultant', 'Architect', 'Officer']
+PROGRAM_TYPES = ['Program', 'Rotation', 'Project']
+PROGRAMS = [
+    'Hybrid Cloud Migration', 'Infrastructure Automation', 'Tuas Port Automation', 'PORTNET 2.0',
+    'Green Port Initiative', 'Data Platform Modernisation', 'Zero Trust Rollout', 'Finance Transformation',
+    'Talent Analytics', 'Terminal Digital Twin', 'Electrification Programme', 'Process Excellence'
+]
+FOCUS_AREAS = [
+    'Cost optimization', 'Security-by-design', 'Stakeholder engagement', 'Process automation',
+    'Vendor management', 'Data quality', 'Regulatory compliance', 'Capacity planning', 'Team leadership',
+    'Change management', 'Reporting', 'Incident response', 'Performance tuning', 'Budgeting'
+]
+
+
+def load_vocabulary(data_dir=DATA_DIR):
+    """(skills grouped by department, competency names) from the real data files"""
+    with open(os.path.join(data_dir, 'skills_taxonomy.json'), 'r', encoding='utf-8') as f:
+        taxonomy = json.load(f)
+    rows = taxonomy['rows'] if isinstance(taxonomy, dict) else taxonomy
+    with open(os.path.join(data_dir, 'Employee_Profiles.json'), 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+
+    # Departments are the top-level function ("Info Tech: Infrastructure" -> "Info Tech")
+    by_department = {}
+    for row in rows:
+        function, spec = row[FUNC_KEY], row[SPEC_KEY]
+        by_department.setdefault(function.split(':')[0].strip(), []).append({
+            'function_area': function,
+            'specialization': spec,
+            'skill_name': spec.split(':')[-1].strip()
+        })
+    for emp in samples:
+        department = emp['employment_info']['department']
+        by_department.setdefault(department, []).extend(emp['skills'])
+    competencies = sorted({c['name'] for emp in samples for c in emp['competencies']})
+    return by_department, competencies
+
+
+def _date(rng, start_year, end_year):
+    start = datetime.date(start_year, 1, 1)
+    days = (datetime.date(end_year, 12, 31) - start).days
+    return start + datetime.timedelta(days=rng.randrange(max(days, 1)))
+
+
+def make_profile(index, rng, by_department, competencies, today):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    department = rng.choice(list(by_department))
+    pool = by_department[department]
+    skills = rng.sample(pool, min(len(pool), rng.randint(3, 9)))
+    unit = skills[0]['function_area'].split(':')[-1].strip()
+    title = f"{rng.choice(SENIORITY)}{unit} {rng.choice(ROLES)}"
+
+    hire_date = _date(rng, 1998, today.year - 1)
+    in_role_since = _date(rng, hire_date.year, today.year)
+    positions = [{
+        'role_title': title,
+        'organization': rng.choice(OFFICES),
+        'period': {'start': in_role_since.isoformat(), 'end': None},
+        'focus_areas': rng.sample(FOCUS_AREAS, 3),
+        'key_skills_used': [s['skill_name'] for s in skills[:3]]
+    }]
+    previous_end = in_role_since - datetime.timedelta(days=1)
+    if previous_end > hire_date:
+        positions.append({
+            'role_title': f"{unit} {rng.choice(ROLES)}",
+            'organization': positions[0]['organization'],
+            'period': {'start': hire_date.isoformat(), 'end': previous_end.isoformat()},
+            'focus_areas': rng.sample(FOCUS_AREAS, 2)
+        })
+
+    experiences = []
+    for _ in range(rng.randint(0, 3)):
+        start = _date(rng, hire_date.year, today.year)
+        experiences.append({
+            'type': rng.choice(PROGRAM_TYPES),
+            'organization': positions[0]['organization'],
+            'program': rng.choice(PROGRAMS),
+            'period': {'start': start.isoformat(),
+                       'end': (start + datetime.timedelta(days=rng.randint(90, 900))).isoformat()},
+            'focus': f"{rng.choice(FOCUS_AREAS)}; {rng.choice(FOCUS_AREAS).lower()}."
+        })
+
+    return {
+        'employee_id': f"EMP-{100000 + index}",
+        'personal_info': {
+            'name': f"{first} {last}",
+            'email': f"{first.lower().replace(' ', '')}.{last.lower()}{index}@globalpsa.com",
+            'office_location': rng.choice(OFFICES),
+            'languages': [{'language': language, 'proficiency': rng.choice(PROFICIENCIES)}
+                          for language in rng.sample(LANGUAGES, rng.randint(1, 3))]
+        },
+        'employment_info': {
+            'job_title': title,
+            'department': department,
+            'unit': unit,
+            'line_manager': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'in_role_since': in_role_since.isoformat(),
+            'hire_date': hire_date.isoformat(),
+            'last_updated': _date(rng, today.year - 1, today.year).isoformat()
+        },
+        'skills': skills,
+        'competencies': [{'name': name, 'level': rng.choice(COMPETENCY_LEVELS)}
+                         for name in rng.sample(competencies, min(len(competencies), rng.randint(2, 4)))],
+        'experiences': experiences,
+        'positions_history': positions
+    }
+
+
+def write_profiles(path, count, seed=7, data_dir=DATA_DIR):
+    """Stream count synthetic profiles to path as one JSON array"""
+    rng = random.Random(seed)
+    by_department, competencies = load_vocabulary(data_dir)
+    # Fixed "today" so the same seed always gives the same file
+    today = datetime.date(2025, 10, 1)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for index in range(count):
+            if index:
+                f.write(',\n')
+            f.write(json.dumps(make_profile(index, rng, by_department, competencies, today),
+                               ensure_ascii=False))
+        f.write('\n]\n')
+    os.replace(tmp_path, path)
+
+
+def prepare_data_dir(count, seed=7, root=BENCH_DATA_DIR):
+    """A DATA_DIR with count synthetic profiles plus the real taxonomy and
+    opportunities; generated once per (count, seed) and reused after that"""
+    data_dir = os.path.join(root, f"{count}-{seed}")
+    profiles_path = os.path.join(data_dir, 'Employee_Profiles.json')
+    os.makedirs(data_dir, exist_ok=True)
+    if not os.path.exists(profiles_path):
+        write_profiles(profiles_path, count, seed)
+    for name in ('skills_taxonomy.json', 'opportunities.json'):
+        shutil.copyfile(os.path.join(DATA_DIR, name), os.path.join(data_dir, name))
+    return data_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='profiles file (default: a reusable data dir under bench/.data)')
+    args = parser.parse_args(argv)
+
+    if args.output:
+        write_profiles(args.output, args.count, args.seed)
+        print(f"✓ Wrote {args.count} profiles to {args.output}")
+    else:
+        print(f"✓ Data dir ready: {prepare_data_dir(args.count, args.seed)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Local stand-in for the Azure OpenAI chat-completions deployment.
+
+Answers any POST with a plausible JSON document for the route the prompt
+belongs to (career plan, weekly learning plan, opportunity plan, resume
+review), limited to the properties of a json_schema response_format, in
+the regular or the streaming (SSE) wire format, with a usage block.
+Latency, throttling (429 with Retry-After) and truncated outputs
+(finish_reason "length") are injected at configurable rates, so the
+backend's retry, truncation and streaming paths get exercised offline.
+
+Point the backend at it with:
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8089/chat AZURE_OPENAI_KEY=x AZURE_OPENAI_API_VERSION=x
+
+Usage:
+    python mock_azure.py [--port 8089] [--latency-ms 300] [--jitter-ms 100]
+                         [--rate-429 0.02] [--truncate-rate 0.02] [--chunk-ms 5]
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CAREER_PLAN = {
+    'readiness_score': 72,
+    'summary': 'Solid foundation in the current role. Two skill gaps stand between the employee and the target.',
+    'skill_gaps': [
+        {'skill': 'Cloud Architecture', 'priority': 'High', 'why': 'Core to the target role'},
+        {'skill': 'Data Visualisation', 'priority': 'Medium', 'why': 'Needed for stakeholder reporting'},
+        {'skill': 'Risk Management', 'priority': 'Low', 'why': 'Rounds out the profile'}
+    ],
+    'learning_path': [
+        {'step': 1, 'skill': 'Cloud Architecture', 'action': 'Complete the foundation course',
+         'timeline': '3 months', 'resources': ['PSA Digital Academy: Cloud Fundamentals']},
+        {'step': 2, 'skill': 'Data Visualisation', 'action': 'Build a terminal KPI dashboard',
+         'timeline': '2 months', 'resources': ['Workshop']}
+    ],
+    'internal_opportunities': ['Tuas Port Automation - NextGen Terminal'],
+    'mentorship_match': 'A senior architect from the Infrastructure unit.',
+    'next_30_days': ['Week 1: Enrol', 'Week 2: Shadow a design review', 'Week 3: First deliverable']
+}
+LEARNING_PLAN = {
+    'weekly_plan': [{'week': w, 'focus': f'Focus {w}', 'activities': ['Read', 'Practise', 'Review'],
+                     'deliverable': f'Deliverable {w}'} for w in range(1, 5)],
+    'success_metrics': ['Metric 1', 'Metric 2', 'Metric 3', 'Metric 4'],
+    'getting_started': ['Action 1', 'Action 2', 'Action 3', 'Action 4']
+}
+OPPORTUNITY_PLAN = {
+    'opportunity_title': 'Opportunity',
+    'readiness_assessment': 'Ready within two months with focused practice.',
+    'time_to_ready': '6-8 weeks',
+    'learning_steps': [{'skill': 'Cloud Architecture', 'week_by_week': [
+        {'week': 1, 'focus': 'Basics', 'activities': ['Course'], 'deliverable': 'Notes'}],
+        'resources': ['PSA Digital Academy'], 'timeline': '3-4 weeks'}],
+    'quick_wins': ['Action 1', 'Action 2', 'Action 3'],
+    'success_metrics': ['Milestone 1', 'Milestone 2'],
+    'next_step': 'Book time with the project lead'
+}
+RESUME_REVIEW = {'confirmed': [], 'additional': ['Stakeholder & Partnership Management']}
+
+
+def completion_for(prompt):
+    """A JSON answer shaped like the one the prompt asks for"""
+    if '"weekly_plan"' in prompt:
+        return LEARNING_PLAN
+    if '"opportunity_title"' in prompt:
+        return OPPORTUNITY_PLAN
+    if '"confirmed"' in prompt:
+        return RESUME_REVIEW
+    return CAREER_PLAN
+
+
+class MockSettings:
+    def __init__(self, latency_ms=300, jitter_ms=100, rate_429=0.0, truncate_rate=0.0,
+                 chunk_ms=5, chunks=40, retry_after=1, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.truncate_rate = truncate_rate
+        self.chunk_ms = chunk_ms
+        self.chunks = chunks
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'throttled': 0, 'truncated': 0, 'streamed': 0}
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def delay(self):
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    settings = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(200, self.settings.counters)
+
+    def do_POST(self):
+        settings = self.settings
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}')
+        settings.count('requests')
+
+        if settings.roll(settings.rate_429):
+            settings.count('throttled')
+            self._send_json(429, {'error': {'code': '429', 'message': 'Rate limit exceeded'}},
+                            {'Retry-After': str(settings.retry_after)})
+            return
+
+        prompt = (request.get('messages') or [{}])[-1].get('content', '')
+        answer = completion_for(prompt)
+        response_format = request.get('response_format') or {}
+        if response_format.get('type') == 'json_schema':
+            # Only the fields the schema asks for, as a schema-following model would
+            properties = response_format['json_schema']['schema'].get('properties', {})
+            answer = {key: value for key, value in answer.items() if key in properties}
+        content = json.dumps(answer, indent=2)
+        finish_reason = 'stop'
+        if settings.roll(settings.truncate_rate):
+            settings.count('truncated')
+            content = content[:len(content) // 2]
+            finish_reason = 'length'
+        usage = {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        settings.delay()
+        if request.get('stream'):
+            settings.count('streamed')
+            self._stream(content, finish_reason)
+        else:
+            self._send_json(200, {
+                'choices': [{'index': 0, 'finish_reason': finish_reason,
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': usage
+            })
+
+    def _stream(self, content, finish_reason):
+        settings = self.settings
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(data):
+            payload = f"data: {data}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(payload):x}\r\n".encode('ascii') + payload + b"\r\n")
+            self.wfile.flush()
+
+        size = max(1, len(content) // settings.chunks)
+        for start in range(0, len(content), size):
+            send(json.dumps({'choices': [{'index': 0, 'delta': {'content': content[start:start + size]},
+                                          'finish_reason': None}]}))
+            time.sleep(settings.chunk_ms / 1000)
+        send(json.dumps({'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}]}))
+        send('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class MockAzureServer:
+    """The mock on a background thread, for embedding in the benchmark harness"""
+
+    def __init__(self, host='127.0.0.1', port=0, **settings):
+        self.settings = MockSettings(**settings)
+        handler = type('Handler', (MockHandler,), {'settings': self.settings})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/chat"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--rate-429', type=float, default=0.0, help='share of calls answered with 429')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='share cut off with finish_reason length')
+    parser.add_argument('--chunk-ms', type=float, default=5, help='delay between streamed chunks')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = MockAzureServer(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                             rate_429=args.rate_429, truncate_rate=args.truncate_rate,
+                             chunk_ms=args.chunk_ms, seed=args.seed)
+    print(f"✓ Mock Azure OpenAI on {server.url} (GET / for counters)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
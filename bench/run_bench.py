@@ -0,0 +1,339 @@
+"""Offline load test for backend/app.py.
+
+For each data size the harness generates (or reuses) a synthetic data
+dir, starts the mock Azure OpenAI server and a backend process pointed at
+both, waits for it to boot, then drives every scenario at every
+concurrency level with closed-loop workers (each sends its next request
+as soon as the previous one returns). Per scenario it reports
+throughput, error count and p50/p95/p99 latency.
+
+Results can be saved with --output and compared against a saved run
+with --baseline: the exit status is 1 when any p95 got worse by more than
+--tolerance, so the run can gate a deploy.
+
+Usage:
+    python run_bench.py [--sizes 1000,10000,100000] [--concurrency 1,8,32]
+                        [--duration 10] [--scenarios employees,analyze,...]
+                        [--output results.json] [--baseline old.json]
+    python run_bench.py --server gunicorn ...              # production settings
+    python run_bench.py --url http://127.0.0.1:5001 ...   # an already running backend
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from generate_profiles import prepare_data_dir
+from mock_azure import MockAzureServer
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+RESUME_TEXT = """Senior engineer with 8 years in port operations IT.
+Designed hybrid cloud platforms on AWS and Azure; CI/CD pipelines with Kubernetes.
+Built Tableau dashboards for terminal KPIs. Machine learning models for berth planning.
+Stakeholder management, vendor and contract management, risk management."""
+
+FORUM_QUERIES = ['cloud', 'kubernetes pipelines', 'dashboards', 'machine learn', 'vendor risk']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(pct / 100 * len(values)) - 1))]
+
+
+class Context:
+    """What scenarios need to build requests: a session, the base URL and sample ids"""
+
+    def __init__(self, base_url, employee_ids, departments, opportunity_ids=()):
+        self.base_url = base_url
+        self.employee_ids = employee_ids
+        self.departments = departments
+        self.opportunity_ids = list(opportunity_ids)
+        self.counter = itertools.count()
+        self.random = random.Random(1)
+
+    def employee(self):
+        return self.random.choice(self.employee_ids)
+
+    def unique(self):
+        # Fresh AI cache keys, so AI scenarios measure the full upstream path
+        return next(self.counter)
+
+
+def _sse(session, url, **kwargs):
+    with session.post(url, stream=True, **kwargs) as response:
+        for _ in response.iter_lines():
+            pass
+        return response
+
+
+# name -> fn(session, context) returning a requests.Response
+SCENARIOS = {
+    'employees': lambda s, c: s.get(f"{c.base_url}/api/employees", params={'limit': 100}),
+    'employees-filtered': lambda s, c: s.get(f"{c.base_url}/api/employees", params={
+        'department': c.random.choice(c.departments), 'limit': 50}),
+    'employee': lambda s, c: s.get(f"{c.base_url}/api/employee/{c.employee()}"),
+    'skills-taxonomy': lambda s, c: s.get(f"{c.base_url}/api/skills-taxonomy"),
+    'match-skills': lambda s, c: s.get(f"{c.base_url}/api/match-skills/{c.employee()}"),
+    'opportunities': lambda s, c: s.get(f"{c.base_url}/api/opportunities/{c.employee()}"),
+    'mentors': lambda s, c: s.get(f"{c.base_url}/api/mentors/{c.employee()}"),
+    'skill-gaps': lambda s, c: s.get(f"{c.base_url}/api/analytics/skill-gaps", params={
+        'by': c.random.choice(['department', 'unit', 'office_location'])}),
+    'staffing': lambda s, c: s.post(f"{c.base_url}/api/staffing", json={
+        'opportunity_id': c.random.choice(c.opportunity_ids), 'team_size': 8, 'teams': 2,
+        'max_per_unit': 2}),
+    'upload-resume': lambda s, c: s.post(f"{c.base_url}/api/upload-resume",
+                                         data={'employee_id': c.employee()},
+                                         files={'resume': ('resume.txt', RESUME_TEXT.encode('utf-8'))}),
+    'forum-post': lambda s, c: s.post(f"{c.base_url}/api/forum/posts", json={
+        'category': 'skills', 'title': f"Question {c.unique()}", 'content': RESUME_TEXT}),
+    'forum-search': lambda s, c: s.get(f"{c.base_url}/api/forum/posts", params={
+        'q': c.random.choice(FORUM_QUERIES), 'limit': 20}),
+    'analyze': lambda s, c: s.post(f"{c.base_url}/api/analyze", json={
+        'employee_id': c.employee(), 'target_role': f"Role {c.unique()}"}),
+    'analyze-stream': lambda s, c: _sse(s, f"{c.base_url}/api/analyze/stream", json={
+        'employee_id': c.employee(), 'target_role': f"Role {c.unique()}"}),
+    'learning-detail': lambda s, c: s.post(f"{c.base_url}/api/learning-detail", json={
+        'skill': f"Skill {c.unique()}", 'timeline': '1 month', 'action': 'Course',
+        'resources': ['PSA Digital Academy']}),
+}
+
+
+def run_scenario(name, context, concurrency, duration):
+    """Closed-loop load for duration seconds; returns the summary dict"""
+    scenario = SCENARIOS[name]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        session = requests.Session()
+        local, failed = [], 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = scenario(session, context)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - started)
+            failed += not ok
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99))
+    }
+
+
+def wait_until_ready(base_url, process=None, timeout=900):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Backend exited with status {process.returncode} during startup")
+        try:
+            if requests.get(f"{base_url}/api/test", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Backend not ready after {timeout}s")
+
+
+def start_backend(data_dir, mock_url, port, workdir, server='dev'):
+    """app.py on the threaded development server, or with server='gunicorn'
+    under the production settings in gunicorn.conf.py; all state (and the
+    log, backend.log) lives in workdir"""
+    env = {
+        **os.environ,
+        'DATA_DIR': data_dir,
+        'SNAPSHOT_PATH': os.path.join(workdir, 'snapshot.bin'),
+        'LLM_CACHE_PATH': os.path.join(workdir, 'llm_cache.sqlite3'),
+        'JOB_QUEUE_PATH': os.path.join(workdir, 'jobs.sqlite3'),
+        'FORUM_DB_PATH': os.path.join(workdir, 'forum.sqlite3'),
+        'BATCH_RESULTS_DIR': os.path.join(workdir, 'batch_results'),
+        'AZURE_OPENAI_ENDPOINT': mock_url,
+        'AZURE_OPENAI_KEY': 'bench',
+        'AZURE_OPENAI_API_VERSION': 'bench',
+        # The mock has no quota; don't let the local quota model throttle
+        'AZURE_OPENAI_RPM': '1000000',
+        'AZURE_OPENAI_TPM': '1000000000'
+    }
+    if server == 'gunicorn':
+        env['BIND'] = f'127.0.0.1:{port}'
+        command = [sys.executable, '-m', 'gunicorn', 'wsgi:app']
+    else:
+        code = f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"
+        command = [sys.executable, '-c', code]
+    with open(os.path.join(workdir, 'backend.log'), 'wb') as log:
+        # Own session, so stop_backend() also reaches the resume parser's worker processes
+        return subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                                stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def stop_backend(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def log_tail(workdir, lines=20):
+    with open(os.path.join(workdir, 'backend.log'), 'r', encoding='utf-8', errors='replace') as f:
+        return ''.join(f.readlines()[-lines:])
+
+
+def free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def sample_context(base_url):
+    page = requests.get(f"{base_url}/api/employees", params={'limit': 1000,
+                                                              'fields': 'id,department'}).json()
+    opportunities = requests.get(f"{base_url}/api/opportunities").json()
+    return Context(base_url, [e['id'] for e in page], sorted({e['department'] for e in page}),
+                   [opp['id'] for opp in opportunities])
+
+
+def print_table(size, rows):
+    print(f"\n=== {size} employees ===" if size else "\n=== external backend ===")
+    print(f"{'scenario':<20}{'conc':>5}{'reqs':>8}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in rows:
+        print(f"{r['scenario']:<20}{r['concurrency']:>5}{r['requests']:>8}{r['errors']:>6}{r['rps']:>9}"
+              f"{r['p50_ms'] or '-':>10}{r['p95_ms'] or '-':>10}{r['p99_ms'] or '-':>10}")
+
+
+def compare(results, baseline, tolerance):
+    """Regressions: rows whose p95 exceeds the baseline's by more than tolerance"""
+    key = lambda r: (r.get('size'), r['scenario'], r['concurrency'])
+    before = {key(r): r for r in baseline}
+    regressions = []
+    for row in results:
+        old = before.get(key(row))
+        if old and old.get('p95_ms') and row.get('p95_ms') and \
+                row['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append((row, old))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated employee counts')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated worker counts')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per scenario and level')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--url', help='benchmark this running backend instead of starting one')
+    parser.add_argument('--server', choices=('dev', 'gunicorn'), default='dev',
+                        help='how to start the backend (gunicorn: see backend/gunicorn.conf.py)')
+    parser.add_argument('--latency-ms', type=float, default=300, help='mock upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--truncate-rate', type=float, default=0.0)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='earlier --output file to compare p95 against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 growth (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios {unknown}; choose from {list(SCENARIOS)}")
+    levels = [int(c) for c in args.concurrency.split(',')]
+    results = []
+
+    def run_all(size, context):
+        rows = []
+        for name in scenarios:
+            for concurrency in levels:
+                rows.append({'size': size, **run_scenario(name, context, concurrency, args.duration)})
+        print_table(size, rows)
+        results.extend(rows)
+
+    if args.url:
+        wait_until_ready(args.url, timeout=30)
+        run_all(None, sample_context(args.url))
+    else:
+        mock = MockAzureServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                               rate_429=args.rate_429, truncate_rate=args.truncate_rate, seed=args.seed).start()
+        try:
+            for size in [int(s) for s in args.sizes.split(',')]:
+                started = time.perf_counter()
+                data_dir = prepare_data_dir(size, args.seed)
+                with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+                    port = free_port()
+                    base_url = f"http://127.0.0.1:{port}"
+                    process = start_backend(data_dir, mock.url, port, workdir, args.server)
+                    try:
+                        wait_until_ready(base_url, process)
+                    except RuntimeError:
+                        stop_backend(process)
+                        print(log_tail(workdir), file=sys.stderr)
+                        raise
+                    try:
+                        print(f"\n✓ {size} employees: data + cold boot in {time.perf_counter() - started:.1f}s")
+                        run_all(size, sample_context(base_url))
+                    finally:
+                        stop_backend(process)
+            print(f"\nMock upstream: {mock.settings.counters}")
+        finally:
+            mock.stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for row, old in regressions:
+            print(f"REGRESSION {row['scenario']} @ {row['size']} x{row['concurrency']}: "
+                  f"p95 {old['p95_ms']} -> {row['p95_ms']} ms")
+        if regressions:
+            return 1
+        print(f"✓ No p95 regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())